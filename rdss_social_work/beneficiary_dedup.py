@@ -0,0 +1,318 @@
+"""
+Fuzzy duplicate detection for Beneficiary records
+
+Exact beneficiary_name matches miss the duplicates a registry actually
+accumulates: "Tan Ah Kow" / "Ah Kow Tan", "Muhammad Ali bin Osman" /
+"Mohamed Ali Osman", a typo in one letter. Comparing every pair of records
+would be O(n^2), so records are only compared inside blocks that share a
+blocking key:
+
+    * nric:      the normalized BC / NRIC number
+    * dob:       date of birth plus the Soundex code of one name token
+    * postal:    postal code
+    * phonetic:  the Soundex codes of the whole name (catches exact and
+                 near-exact names with nothing else in common)
+
+Inside a block, records are sorted by their normalized name and each is
+scored against its next `window` neighbours only (sorted neighbourhood), so
+even a large block (a common name, a big HDB block) costs O(b log b). Pairs
+scoring above the threshold are joined into clusters with union-find.
+
+The score starts from the Jaro-Winkler similarity of the token-sorted
+names, and is adjusted by the other identifiers: a shared NRIC is a
+duplicate outright, a shared date of birth, postal code or mobile number
+raises it, and two different NRICs or dates of birth lower it. A pair
+with nothing in common but the name is never reported.
+
+The per-save check (Beneficiary.validate) needs no extra storage: one query
+over the indexed bc_nric_no, date_of_birth, postal_code and beneficiary_name
+columns fetches the record's blocks, and only those few rows are scored.
+"""
+
+import re
+import unicodedata
+
+import frappe
+from frappe.utils import cint, flt
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_WINDOW = 10
+
+# Highest score for a pair whose names match but nothing else does (below the threshold)
+NAME_ONLY_MAX_SCORE = 0.85
+
+# Rows fetched for one per-save check; a block is never close to this
+MAX_CANDIDATES = 500
+
+# Fields whose change can make a record a duplicate of another
+DEDUP_FIELDS = ("beneficiary_name", "bc_nric_no", "date_of_birth", "postal_code", "mobile_number")
+
+RECORD_FIELDS = ("name",) + DEDUP_FIELDS
+
+# Name particles that carry no identity ("bin", "s/o" once punctuation is dropped, ...)
+NAME_PARTICLES = {"bin", "binte", "binti", "bte", "so", "do", "al", "ap"}
+
+SOUNDEX_CODES = {
+    letter: code
+    for code, letters in (("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"), ("4", "l"), ("5", "mn"), ("6", "r"))
+    for letter in letters
+}
+
+
+def normalize_name(name):
+    """Lower-case ASCII name tokens without punctuation or particles, sorted"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    tokens = re.sub(r"[^a-z0-9 ]+", "", text.replace("-", " ")).split()
+    return " ".join(sorted(token for token in tokens if token not in NAME_PARTICLES))
+
+
+def normalize_nric(value):
+    cleaned = re.sub(r"[^A-Za-z0-9]", "", value or "").upper()
+    return cleaned if len(cleaned) >= 4 else ""
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", value or "")
+    # Compare local numbers, with or without the +65 country code
+    return digits[-8:] if len(digits) >= 8 else ""
+
+
+def soundex(token):
+    """American Soundex code of one name token ("" for tokens without letters)"""
+    letters = [c for c in token.lower() if "a" <= c <= "z"]
+    if not letters:
+        return ""
+
+    code, last = letters[0].upper(), SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":
+            last = digit
+    return code.ljust(4, "0")
+
+
+def jaro_winkler(a, b):
+    """Jaro-Winkler similarity of two strings, from 0.0 to 1.0"""
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(max(len_a, len_b) // 2 - 1, 0)
+    matched_a, matched_b = [False] * len_a, [False] * len_b
+    matches = 0
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(i + window + 1, len_b)):
+            if not matched_b[j] and b[j] == char:
+                matched_a[i] = matched_b[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    transpositions, j = 0, 0
+    for i in range(len_a):
+        if matched_a[i]:
+            while not matched_b[j]:
+                j += 1
+            if a[i] != b[j]:
+                transpositions += 1
+            j += 1
+
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for char_a, char_b in zip(a[:4], b[:4]):
+        if char_a != char_b:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def prepare_record(row):
+    """Normalized identifiers of a Beneficiary row or document"""
+    name_key = normalize_name(row.get("beneficiary_name"))
+    return frappe._dict(
+        name=row.get("name"),
+        beneficiary_name=row.get("beneficiary_name"),
+        name_key=name_key,
+        phonetic=sorted({soundex(token) for token in name_key.split()} - {""}),
+        nric=normalize_nric(row.get("bc_nric_no")),
+        dob=str(row.get("date_of_birth") or ""),
+        postal=(row.get("postal_code") or "").strip(),
+        phone=normalize_phone(row.get("mobile_number")),
+    )
+
+
+def blocking_keys(record):
+    keys = []
+    if record.nric:
+        keys.append(f"nric:{record.nric}")
+    if record.dob:
+        keys.extend(f"dob:{record.dob}:{code}" for code in record.phonetic)
+    if record.postal:
+        keys.append(f"postal:{record.postal}")
+    if record.phonetic:
+        keys.append(f"phonetic:{'-'.join(record.phonetic)}")
+    return keys
+
+
+def score_pair(a, b):
+    """Likelihood, from 0.0 to 1.0, that two prepared records are the same person"""
+    if a.nric and a.nric == b.nric:
+        return 1.0
+
+    score = jaro_winkler(a.name_key, b.name_key)
+    # Two different identity numbers are two people, unless one was mistyped
+    if a.nric and b.nric:
+        score -= 0.3 if jaro_winkler(a.nric, b.nric) < 0.9 else 0.05
+    if a.dob and b.dob:
+        score += 0.1 if a.dob == b.dob else -0.15
+    if a.postal and a.postal == b.postal:
+        score += 0.05
+    if a.phone and a.phone == b.phone:
+        score += 0.05
+
+    # Many people share a name: a name alone is never enough
+    corroborated = (a.dob and a.dob == b.dob) or (a.postal and a.postal == b.postal) or (a.phone and a.phone == b.phone)
+    if not corroborated:
+        score = min(score, NAME_ONLY_MAX_SCORE)
+    return max(0.0, min(score, 1.0))
+
+
+def cluster_records(records, threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW):
+    """
+    Group prepared records into clusters of likely duplicates
+
+    Args:
+        records (list): Records from prepare_record
+        threshold (float): Minimum score_pair for two records to be linked
+        window (int): Neighbours each record is compared with inside a block
+
+    Returns:
+        list: [{"members": [names], "pairs": [(name, name, score)]}], largest clusters first
+    """
+    blocks = {}
+    for position, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks.setdefault(key, []).append(position)
+
+    parent = list(range(len(records)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    scored = {}
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda position: records[position].name_key)
+        for offset, i in enumerate(members):
+            for j in members[offset + 1:offset + 1 + window]:
+                pair = (i, j) if i < j else (j, i)
+                if pair in scored:
+                    continue
+                scored[pair] = score = score_pair(records[i], records[j])
+                if score >= threshold:
+                    parent[find(i)] = find(j)
+
+    clusters = {}
+    for (i, j), score in scored.items():
+        if score >= threshold:
+            cluster = clusters.setdefault(find(i), {"members": set(), "pairs": []})
+            cluster["members"].update((records[i].name, records[j].name))
+            cluster["pairs"].append((records[i].name, records[j].name, round(score, 3)))
+
+    return sorted(
+        ({"members": sorted(cluster["members"]), "pairs": cluster["pairs"]} for cluster in clusters.values()),
+        key=lambda cluster: -len(cluster["members"]),
+    )
+
+
+def find_duplicate_clusters(threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW):
+    """Cluster likely duplicates across the whole registry (one query, then in memory)"""
+    rows = frappe.get_all("Beneficiary", fields=list(RECORD_FIELDS))
+    return cluster_records([prepare_record(row) for row in rows], flt(threshold), cint(window))
+
+
+def find_possible_duplicates(doc, threshold=DEFAULT_THRESHOLD, limit=5):
+    """
+    Existing beneficiaries that are likely duplicates of one record
+
+    Args:
+        doc: Beneficiary document or dict with the DEDUP_FIELDS
+        threshold (float): Minimum score_pair to report
+        limit (int): Maximum number of matches
+
+    Returns:
+        list: [{"name", "beneficiary_name", "score"}], best match first
+    """
+    record = prepare_record(doc)
+    conditions = []
+    if doc.get("beneficiary_name"):
+        conditions.append("beneficiary_name = %(beneficiary_name)s")
+    if record.nric:
+        conditions.append("bc_nric_no = %(bc_nric_no)s")
+    if record.dob:
+        conditions.append("date_of_birth = %(date_of_birth)s")
+    if record.postal:
+        conditions.append("postal_code = %(postal_code)s")
+    if not conditions:
+        return []
+
+    rows = frappe.db.sql(f"""
+        SELECT {", ".join(f"`{field}`" for field in RECORD_FIELDS)}
+        FROM `tabBeneficiary`
+        WHERE name != %(name)s AND ({" OR ".join(conditions)})
+        LIMIT {MAX_CANDIDATES}
+    """, {
+        "name": doc.get("name") or "",
+        "beneficiary_name": doc.get("beneficiary_name"),
+        "bc_nric_no": doc.get("bc_nric_no"),
+        "date_of_birth": record.dob,
+        "postal_code": record.postal,
+    }, as_dict=True)
+
+    matches = []
+    for row in rows:
+        candidate = prepare_record(row)
+        # The same blocking rule as the batch mode: no shared key, no comparison
+        if not set(blocking_keys(candidate)) & set(blocking_keys(record)):
+            continue
+        score = score_pair(record, candidate)
+        if score >= threshold:
+            matches.append({"name": row.name, "beneficiary_name": row.beneficiary_name, "score": round(score, 3)})
+
+    return sorted(matches, key=lambda match: -match["score"])[:limit]
+
+
+@frappe.whitelist()
+def get_possible_duplicates(beneficiary):
+    """Likely duplicates of a saved Beneficiary, for the form"""
+    doc = frappe.get_doc("Beneficiary", beneficiary)
+    doc.check_permission("read")
+    return find_possible_duplicates(doc)
+
+
+def run_duplicate_scan(threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW, verbose=True):
+    """
+    Batch mode: print and return every cluster of likely duplicates
+
+    Usage:
+        bench --site [site-name] execute rdss_social_work.beneficiary_dedup.run_duplicate_scan
+    """
+    clusters = find_duplicate_clusters(threshold, window)
+    if verbose:
+        print(f"{len(clusters)} clusters of likely duplicates, "
+              f"{sum(len(cluster['members']) for cluster in clusters)} beneficiaries")
+        for cluster in clusters[:50]:
+            print("  " + ", ".join(f"{a}~{b} ({score})" for a, b, score in cluster["pairs"]))
+    return clusters
@@ -3,16 +3,18 @@
 Beneficiary Family geocoding hooks for RDSS Social Work Case Management System
 
 This module provides geocoding functionality that is triggered automatically
-when Beneficiary Family documents are saved.
+when Beneficiary Family documents are saved. Addresses the geocode cache does
+not know yet are geocoded by a background job after the save commits.
 """
 
 import frappe
-from rdss_social_work.geocoding_utils import geocode_beneficiary_family, should_geocode_beneficiary_family
+from rdss_social_work.geocoding_utils import should_geocode_beneficiary_family
+from rdss_social_work.geocoding_queue import queue_geocoding, STATUS_GEOCODED, STATUS_FAILED
 
 def beneficiary_family_before_save(doc, method):
     """
     Hook that runs before saving a Beneficiary Family document
-    Automatically geocodes the family's address if needed
+    Geocodes the family's address from cache or queues it for background geocoding
     
     Args:
         doc: The Beneficiary Family document being saved
@@ -23,13 +25,13 @@ def beneficiary_family_before_save(doc, method):
         is_new = doc.is_new()
         
         if should_geocode_beneficiary_family(doc, is_new):
-            # Attempt to geocode the family's address
-            success = geocode_beneficiary_family(doc)
+            # Resolve from cache, or mark Pending and enqueue after commit
+            status = queue_geocoding(doc)
             
-            if success:
+            if status == STATUS_GEOCODED:
                 frappe.msgprint(f"Address geocoded successfully for family: {doc.family_name}", 
                               alert=True, indicator='green')
-            else:
+            elif status == STATUS_FAILED:
                 frappe.msgprint(f"Could not geocode address for family: {doc.family_name}. "
                               "Please check the address details.", 
                               alert=True, indicator='orange')
@@ -2,16 +2,19 @@
 Server script for automatic geocoding of Beneficiary addresses
 
 This module contains server-side hooks that automatically geocode
-beneficiary addresses when documents are saved.
+beneficiary addresses when documents are saved. Addresses the geocode
+cache does not know yet are geocoded by a background job after the save
+commits, so save latency does not depend on the geocoding API.
 """
 
 import frappe
-from rdss_social_work.geocoding_utils import geocode_beneficiary, should_geocode_beneficiary
+from rdss_social_work.geocoding_utils import should_geocode_beneficiary
+from rdss_social_work.geocoding_queue import queue_geocoding, STATUS_GEOCODED, STATUS_FAILED
 
 def beneficiary_before_save(doc, method):
     """
     Hook function called before saving a Beneficiary document
-    Automatically geocodes the address if conditions are met
+    Geocodes the address from cache or queues it for background geocoding
     
     Args:
         doc: Beneficiary document object
@@ -21,11 +24,11 @@ def beneficiary_before_save(doc, method):
         is_new = doc.is_new()
         
         if should_geocode_beneficiary(doc, is_new):
-            success = geocode_beneficiary(doc)
-            if success:
+            status = queue_geocoding(doc)
+            if status == STATUS_GEOCODED:
                 frappe.msgprint(f"Address geocoded successfully for {doc.beneficiary_name}", 
                               alert=True, indicator="green")
-            else:
+            elif status == STATUS_FAILED:
                 frappe.msgprint(f"Could not geocode address for {doc.beneficiary_name}. Please check the address details.", 
                               alert=True, indicator="orange")
     except Exception as e:
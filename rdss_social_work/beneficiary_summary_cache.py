@@ -0,0 +1,172 @@
+"""
+Redis cache of the Beneficiary form overview
+
+get_beneficiary_overview recomputes every panel on each form open, although
+a beneficiary's related records rarely change between opens. Computed
+overviews are cached in Redis under a key that embeds two version tokens:
+
+    * the beneficiary's version, changed whenever an Appointment, Initial or
+      Follow Up Assessment, Service Plan or Document Attachment linked to
+      the beneficiary (or the Beneficiary itself) is saved or deleted
+    * the family's version, changed whenever a Case of the family, the
+      Beneficiary Family or one of its members is saved or deleted
+
+A write never deletes entries; it replaces the token, so every entry built
+from older data becomes unreachable at once. Tokens are replaced when the
+document event fires and again after the transaction commits: an overview
+computed from uncommitted or pre-commit data can only be stored under a
+token that is already gone once the write is visible. Tokens are random
+rather than counters, so a token lost to Redis eviction can never bring an
+old entry back.
+
+On a miss the overview is computed in a fresh database snapshot, started
+after the tokens are read, so it is never older than the key it is stored
+under; get_or_compute must therefore only be called from read-only requests.
+
+Entries are per user (panels honour the user's permissions), per day (the
+upcoming / past appointment split moves at midnight) and per panel and field
+selection. Writes that bypass document events (bulk inserts, db_set) are
+covered by the entry lifetime only.
+"""
+
+import hashlib
+import json
+from functools import partial
+
+import frappe
+from frappe.utils import today
+
+ENTRY_TTL = 60 * 60
+
+CACHE_PREFIX = "beneficiary_summary"
+
+
+def _version_key(kind, name):
+    return frappe.cache().make_key(f"{CACHE_PREFIX}:{kind}_version:{name}")
+
+
+def _new_token():
+    return frappe.generate_hash(length=10)
+
+
+def get_versions(beneficiary, family):
+    """
+    Current version tokens of a beneficiary and its family, created on first use
+
+    Returns:
+        tuple: (beneficiary token, family token or "-")
+    """
+    cache = frappe.cache()
+    keys = [_version_key("beneficiary", beneficiary)]
+    if family:
+        keys.append(_version_key("family", family))
+
+    tokens = cache.mget(keys)
+    for position, token in enumerate(tokens):
+        if token is None:
+            # Concurrent first readers agree on whichever token was set first
+            cache.set(keys[position], _new_token(), nx=True)
+            token = cache.get(keys[position])
+        tokens[position] = token.decode() if isinstance(token, bytes) else str(token)
+
+    return tokens[0], tokens[1] if family else "-"
+
+
+def get_entry_key(beneficiary, family, variant):
+    """Cache key of one overview; changes whenever the beneficiary or family version does"""
+    beneficiary_version, family_version = get_versions(beneficiary, family)
+    digest = hashlib.sha1(json.dumps(variant, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return ":".join((
+        CACHE_PREFIX, beneficiary, beneficiary_version, family_version, frappe.session.user, today(), digest,
+    ))
+
+
+def get_or_compute(record, variant, compute):
+    """
+    Cached overview of a beneficiary, computed and stored on a miss
+
+    Args:
+        record (dict): Beneficiary name and beneficiary_family
+        variant: JSON-serializable request parameters the overview depends on
+        compute (callable): Builds the overview on a miss
+
+    Returns:
+        The cached or freshly computed overview
+    """
+    # The key (and with it the versions) is taken before computing, so a
+    # write that lands during the computation makes this entry unreachable
+    key = get_entry_key(record.name, record.beneficiary_family, variant)
+    overview = frappe.cache().get_value(key)
+    if overview is not None:
+        return overview
+
+    # The request has already read the database (permissions, the record), and
+    # under REPEATABLE READ compute() would see that snapshot, older than the
+    # tokens. This path only reads, so end the transaction: compute() then sees
+    # every write whose tokens were bumped before they were read above.
+    frappe.db.rollback()
+    family = frappe.db.get_value("Beneficiary", record.name, "beneficiary_family")
+    if family != record.beneficiary_family:
+        # Moved to another family since the record was read: the key names the old one
+        record.beneficiary_family = family
+        return compute()
+
+    overview = compute()
+    frappe.cache().set_value(key, overview, expires_in_sec=ENTRY_TTL)
+    return overview
+
+
+def bump_versions(beneficiaries=(), families=()):
+    """Replace the version tokens, making every cached overview of these records unreachable"""
+    cache = frappe.cache()
+    pipeline = cache.pipeline()
+    for name in beneficiaries:
+        pipeline.set(_version_key("beneficiary", name), _new_token())
+    for name in families:
+        pipeline.set(_version_key("family", name), _new_token())
+    pipeline.execute()
+
+
+def invalidate(beneficiaries=(), families=()):
+    """Bump versions now and once more after the current transaction commits"""
+    beneficiaries = sorted(name for name in set(beneficiaries) if name)
+    families = sorted(name for name in set(families) if name)
+    if not beneficiaries and not families:
+        return
+
+    bump_versions(beneficiaries, families)
+    frappe.db.after_commit.add(partial(bump_versions, beneficiaries, families))
+
+
+def get_affected_records(doc):
+    """
+    Beneficiaries and families whose overview shows this document
+
+    Returns:
+        tuple: (set of Beneficiary names, set of Beneficiary Family names)
+    """
+    beneficiaries, families = set(), set()
+    # The values before the save too, so moving a record also clears where it was
+    for version in (doc, doc.get_doc_before_save()):
+        if not version:
+            continue
+        if doc.doctype == "Case":
+            families.add(version.beneficiary_family)
+        elif doc.doctype == "Beneficiary Family":
+            families.add(version.name)
+        elif doc.doctype == "Beneficiary":
+            beneficiaries.add(version.name)
+            families.add(version.beneficiary_family)
+        else:
+            beneficiaries.add(version.get("beneficiary"))
+            if doc.doctype == "Initial Assessment" and version.client_name:
+                # Older assessments are matched to the beneficiary by name
+                beneficiaries.update(frappe.get_all(
+                    "Beneficiary", filters={"beneficiary_name": version.client_name}, pluck="name"
+                ))
+    return beneficiaries, families
+
+
+def invalidate_for_doc(doc, method=None):
+    """on_update / on_trash hook of every doctype shown in the Beneficiary overview"""
+    invalidate(*get_affected_records(doc))
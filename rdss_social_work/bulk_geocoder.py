@@ -0,0 +1,295 @@
+"""
+Concurrent bulk geocoder for RDSS Social Work Case Management System
+
+Geocodes every Beneficiary Family (or Beneficiary) that is missing a
+geolocation:
+
+    * addresses are reduced to geocode cache keys and deduplicated before any
+      request goes out, and keys already in the geocode cache are resolved
+      without touching the network
+    * the remaining keys are fetched by a bounded thread pool behind a token
+      bucket, with backoff when Google reports OVER_QUERY_LIMIT / HTTP 429
+    * results are written back with one bulk UPDATE per chunk instead of a
+      full document save per record
+    * the last committed record is stored as a checkpoint, so an interrupted
+      run resumes where it stopped
+
+Worker threads only make HTTP requests; all database and cache access stays
+on the calling thread, which owns the Frappe site connection.
+
+Usage:
+    bench execute rdss_social_work.bulk_geocoder.run
+    bench execute rdss_social_work.bulk_geocoder.run --kwargs "{'doctype': 'Beneficiary', 'workers': 16, 'rate': 40}"
+
+    # Enqueue as a background job
+    bench execute rdss_social_work.bulk_geocoder.enqueue_bulk_geocoding
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import frappe
+import requests
+from requests.adapters import HTTPAdapter
+
+from rdss_social_work import geocode_cache
+from rdss_social_work.db_utils import bulk_set_value, bulk_update_column
+from rdss_social_work.electoral_boundaries import locate_geolocation
+from rdss_social_work.spatial_search import TITLE_FIELDS, publish_locations
+from rdss_social_work.geocoding_utils import (
+    ADDRESS_FIELDS,
+    get_geocoding_api_url,
+    get_google_maps_api_key,
+    make_geojson,
+)
+
+TARGETS = ADDRESS_FIELDS
+
+MAX_RETRIES = 4
+
+
+class RateLimited(Exception):
+    """Google asked us to slow down (HTTP 429 or OVER_QUERY_LIMIT)"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Allows bursts of up to `capacity` requests and a sustained `rate`
+    requests per second. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_coordinates(session, url, api_key, query_address, bucket):
+    """
+    Geocode one address; safe to call from worker threads (no Frappe access)
+
+    Returns:
+        tuple: (status, geolocation, error) where status is "OK", "NOT_FOUND" or "ERROR"
+    """
+    backoff = 1.0
+    for attempt in range(MAX_RETRIES + 1):
+        bucket.acquire()
+        try:
+            response = session.get(url, params={"address": query_address, "key": api_key}, timeout=10)
+            if response.status_code == 429:
+                raise RateLimited()
+            response.raise_for_status()
+            data = response.json()
+            status = data.get("status")
+
+            if status == "OK" and data.get("results"):
+                location = data["results"][0]["geometry"]["location"]
+                return "OK", make_geojson(location["lat"], location["lng"]), None
+            if status == "ZERO_RESULTS":
+                return "NOT_FOUND", None, None
+            if status == "OVER_QUERY_LIMIT":
+                raise RateLimited()
+            return "ERROR", None, data.get("error_message", status or "Unknown error")
+
+        except RateLimited:
+            if attempt == MAX_RETRIES:
+                return "ERROR", None, "Rate limited"
+            time.sleep(backoff)
+            backoff *= 2
+        except requests.exceptions.RequestException as e:
+            return "ERROR", None, str(e)
+        except (ValueError, KeyError) as e:
+            return "ERROR", None, f"Malformed response: {e}"
+
+
+def get_checkpoint_key(doctype):
+    return f"bulk_geocoder_checkpoint:{doctype}"
+
+
+def get_pending_records(doctype, force=False, after=None, limit=None):
+    """Return records with an address that still need geocoding, ordered by name"""
+    fields = TARGETS[doctype]
+    filters = [[fields["address_line_1"], "!=", ""]]
+    if not force:
+        filters.append(["geolocation", "in", ["", None]])
+    if after:
+        filters.append(["name", ">", after])
+
+    return frappe.get_all(
+        doctype,
+        filters=filters,
+        fields=["name", TITLE_FIELDS[doctype]] + list(fields.values()),
+        order_by="name asc",
+        limit=limit or 0,
+    )
+
+
+def run(doctype="Beneficiary Family", force=False, workers=8, rate=40, chunk_size=500, resume=True, verbose=True):
+    """
+    Geocode all pending records of a DocType
+
+    Args:
+        doctype (str): "Beneficiary Family" or "Beneficiary"
+        force (bool): Re-geocode records that already have a geolocation
+        workers (int): Maximum concurrent HTTP requests
+        rate (float): Maximum requests per second across all workers
+        chunk_size (int): Records per chunk; each chunk is written and committed together
+        resume (bool): Continue after the last committed checkpoint of a previous run
+
+    Returns:
+        dict: Run statistics
+    """
+    if doctype not in TARGETS:
+        frappe.throw(f"Bulk geocoding is not supported for {doctype}")
+
+    api_key = get_google_maps_api_key()
+    if not api_key:
+        frappe.throw("Google Maps API key not found in site config")
+
+    checkpoint_key = get_checkpoint_key(doctype)
+    after = frappe.db.get_global(checkpoint_key) if resume else None
+    if not resume:
+        frappe.db.set_global(checkpoint_key, "")
+
+    fields = TARGETS[doctype]
+    url = get_geocoding_api_url()
+    bucket = TokenBucket(rate)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    stats = frappe._dict(
+        records=0, uncached_keys=0, cache_hits=0, requests=0,
+        geocoded=0, not_found=0, errors=0, resumed_after=after
+    )
+    resolved = {}  # cache_key -> geolocation (or None) for this run
+    started = time.perf_counter()
+
+    def log(message):
+        if verbose:
+            print(message)
+
+    log(f"Bulk geocoding {doctype}" + (f", resuming after {after}" if after else ""))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            records = get_pending_records(doctype, force=force, after=after, limit=chunk_size)
+            if not records:
+                break
+
+            # Reduce the chunk to unique cache keys before any request goes out
+            record_keys = {}
+            pending = {}
+            for record in records:
+                cache_key, key_type, query_address = geocode_cache.make_cache_key(
+                    record.get(fields["address_line_1"]),
+                    record.get(fields["address_line_2"]),
+                    record.get(fields["postal_code"]),
+                )
+                if not cache_key:
+                    continue
+                record_keys[record.name] = cache_key
+                if cache_key in resolved or cache_key in pending:
+                    continue
+
+                cached = None if force else geocode_cache.lookup(cache_key)
+                if cached and geocode_cache.is_fresh(cached):
+                    resolved[cache_key] = cached["geolocation"]
+                    stats.cache_hits += 1
+                else:
+                    pending[cache_key] = (key_type, query_address)
+
+            stats.uncached_keys += len(pending)
+
+            futures = {
+                pool.submit(fetch_coordinates, session, url, api_key, query_address, bucket): cache_key
+                for cache_key, (key_type, query_address) in pending.items()
+            }
+            for future in as_completed(futures):
+                cache_key = futures[future]
+                key_type, query_address = pending[cache_key]
+                status, geolocation, error = future.result()
+                stats.requests += 1
+
+                if status == "ERROR":
+                    stats.errors += 1
+                    frappe.log_error(f"Bulk geocoding failed for '{query_address}': {error}", "Bulk Geocoding Error")
+                    continue
+
+                geocode_cache.store(cache_key, key_type, query_address, geolocation)
+                resolved[cache_key] = geolocation
+
+            updates = {}
+            not_found = []
+            for name, cache_key in record_keys.items():
+                geolocation = resolved.get(cache_key)
+                if geolocation:
+                    updates[name] = geolocation
+                elif cache_key in resolved:
+                    not_found.append(name)
+
+            bulk_update_column(doctype, "geolocation", updates, static_values={"geocoding_status": "Geocoded"})
+            bulk_update_column(
+                doctype, "electoral_division", {name: locate_geolocation(geo) for name, geo in updates.items()}
+            )
+            coordinates = {name: geocode_cache.extract_coordinates(geo) for name, geo in updates.items()}
+            bulk_update_column(doctype, "latitude", {name: lat for name, (lat, lng) in coordinates.items()})
+            bulk_update_column(doctype, "longitude", {name: lng for name, (lat, lng) in coordinates.items()})
+            bulk_set_value(doctype, not_found, {"geocoding_status": "Failed"})
+            stats.not_found += len(not_found)
+            stats.geocoded += len(updates)
+            stats.records += len(records)
+
+            after = records[-1].name
+            frappe.db.set_global(checkpoint_key, after)
+            frappe.db.commit()
+
+            titles = {record.name: record.get(TITLE_FIELDS[doctype]) for record in records}
+            publish_locations(doctype, [[name, lat, lng, titles[name]] for name, (lat, lng) in coordinates.items()])
+
+            log(f"  {stats.records} records, {stats.requests} requests, {stats.cache_hits} cache hits, "
+                f"{stats.geocoded} geocoded, {stats.errors} errors (checkpoint {after})")
+
+    # Finished cleanly: the next run starts from the beginning
+    frappe.db.set_global(checkpoint_key, "")
+    frappe.db.commit()
+
+    stats.elapsed = round(time.perf_counter() - started, 2)
+    log(f"Bulk geocoding completed in {stats.elapsed}s: {dict(stats)}")
+    return stats
+
+
+@frappe.whitelist()
+def enqueue_bulk_geocoding(doctype="Beneficiary Family", force=False):
+    """Run the bulk geocoder as a long background job"""
+    frappe.only_for("System Manager")
+
+    frappe.enqueue(
+        "rdss_social_work.bulk_geocoder.run",
+        queue="long",
+        timeout=4 * 60 * 60,
+        job_id=f"bulk_geocoding::{doctype}",
+        deduplicate=True,
+        doctype=doctype,
+        force=frappe.parse_json(force) if isinstance(force, str) else force,
+        verbose=False,
+    )
+    return {"status": "queued"}
@@ -0,0 +1,203 @@
+"""
+Case metrics and timeline for RDSS Social Work Case Management System
+
+Case.update_case_metrics runs on every Case save. It used to list the
+family's members and count Initial Assessments one member at a time, and
+get_case_timeline did the same with one get_all per member. Here:
+
+    * the totals (assessments of the family's members, visits and
+      referrals of the case) come from one SELECT of scalar subqueries,
+      with the per-member counts done by a JOIN
+    * the timeline reads each activity stream (assessments, follow ups,
+      case notes, appointments, referrals) with one date-ordered query and
+      merges the sorted streams with heapq.merge instead of sorting the lot
+
+Initial Assessments are matched to family members by client_name, as they
+always have been, and to the case by case_no.
+"""
+
+import heapq
+from datetime import date
+
+import frappe
+from frappe.utils import getdate, today
+
+# Sort key for undated activities: after every dated one, as the queries order them
+UNDATED = date.max
+
+# Activity streams of the timeline: doctype, date field, SQL condition, and
+# how a row reads in the timeline. Conditions take %(case)s and %(family)s.
+TIMELINE_STREAMS = [
+    {
+        "doctype": "Initial Assessment",
+        "date_field": "assessment_date",
+        "fields": ["assessed_by"],
+        "condition": """`case_no` = %(case)s OR `client_name` IN (
+            SELECT `beneficiary_name` FROM `tabBeneficiary` WHERE `beneficiary_family` = %(family)s
+        )""",
+        "type": "assessment",
+        "activity": lambda row: "Assessment Completed",
+        "details": lambda row: f"Initial Assessment by {row.assessed_by}",
+        "status": lambda row: "Completed",
+    },
+    {
+        "doctype": "Follow Up Assessment",
+        "date_field": "assessment_date",
+        "fields": ["assessment_type", "assessed_by"],
+        "condition": "`case` = %(case)s",
+        "type": "assessment",
+        "activity": lambda row: f"{row.assessment_type or 'Follow Up'} Assessment",
+        "details": lambda row: f"Follow Up Assessment by {row.assessed_by}",
+        "status": lambda row: "Completed",
+    },
+    {
+        "doctype": "Case Notes",
+        "date_field": "visit_date",
+        "fields": ["visit_type", "social_worker", "visit_outcome"],
+        "condition": "`case` = %(case)s",
+        "type": "case_note",
+        "activity": lambda row: row.visit_type or "Case Note",
+        "details": lambda row: f"Recorded by {row.social_worker}",
+        "status": lambda row: row.visit_outcome or "Recorded",
+    },
+    {
+        "doctype": "Appointment",
+        "date_field": "appointment_date",
+        "fields": ["appointment_type", "appointment_status", "appointment_outcome", "social_worker"],
+        "condition": "`case` = %(case)s",
+        "type": "appointment",
+        "activity": lambda row: f"{row.appointment_type or ''} Appointment".strip(),
+        "details": lambda row: f"With {row.social_worker}",
+        "status": lambda row: row.appointment_status or row.appointment_outcome,
+    },
+    {
+        "doctype": "Referral",
+        "date_field": "referral_date",
+        "fields": ["referral_type", "referred_to_organization", "status"],
+        "condition": "`case` = %(case)s",
+        "type": "referral",
+        "activity": lambda row: f"{row.referral_type or ''} Referral".strip(),
+        "details": lambda row: f"Referred to {row.referred_to_organization or 'external provider'}",
+        "status": lambda row: row.status,
+    },
+]
+
+
+def get_case_totals(case_name, family=None):
+    """
+    Assessment, visit and referral totals of a case with one query
+
+    Args:
+        case_name (str): Case name
+        family (str, optional): The case's Beneficiary Family; without one the
+            assessment total is not computed
+
+    Returns:
+        dict: total_visits, total_referrals and, with a family, total_assessments
+    """
+    assessments_sql = """(
+        SELECT COUNT(*)
+        FROM `tabBeneficiary` b
+        JOIN `tabInitial Assessment` ia ON ia.`client_name` = b.`beneficiary_name`
+        WHERE b.`beneficiary_family` = %(family)s
+    )""" if family else "NULL"
+
+    totals = frappe.db.sql(f"""
+        SELECT
+            {assessments_sql} AS total_assessments,
+            (SELECT COUNT(*) FROM `tabCase Notes` WHERE `case` = %(case)s) AS total_visits,
+            (SELECT COUNT(*) FROM `tabReferral` WHERE `case` = %(case)s) AS total_referrals
+    """, {"case": case_name, "family": family}, as_dict=True)[0]
+
+    if not family:
+        totals.pop("total_assessments")
+    return totals
+
+
+def update_case_metrics(case):
+    """
+    Store a case's totals and last activity date with one SELECT and one UPDATE
+
+    Args:
+        case: Case document, or any row with name and beneficiary_family
+    """
+    values = get_case_totals(case.name, case.beneficiary_family)
+    values["last_activity_date"] = today()
+    frappe.db.set_value("Case", case.name, values, update_modified=False)
+    case.update(values)
+
+
+def fetch_stream(stream, case_name, family):
+    """One activity stream of a case as timeline entries, oldest first"""
+    date_field = stream["date_field"]
+    fields = ", ".join(f"`{field}`" for field in ["name", date_field] + stream["fields"])
+    rows = frappe.db.sql(f"""
+        SELECT {fields}
+        FROM `tab{stream['doctype']}`
+        WHERE {stream['condition']}
+        ORDER BY `{date_field}` IS NULL, `{date_field}`, `name`
+    """, {"case": case_name, "family": family or ""}, as_dict=True)
+
+    for row in rows:
+        yield {
+            "date": row[date_field],
+            "activity": stream["activity"](row),
+            "details": stream["details"](row),
+            "type": stream["type"],
+            "status": stream["status"](row),
+            "reference_doctype": stream["doctype"],
+            "reference": row.name,
+        }
+
+
+def get_case_events(case):
+    """Opening and closing of the case itself, oldest first"""
+    events = [{
+        "date": case.case_opened_date,
+        "activity": "Case Opened",
+        "details": f"Case opened by {case.primary_social_worker}",
+        "type": "case_event",
+        "status": "Open",
+    }]
+    if case.case_status == "Closed" and case.actual_closure_date:
+        events.append({
+            "date": case.actual_closure_date,
+            "activity": "Case Closed",
+            "details": f"Closed by {case.closed_by} - Reason: {case.closure_reason}",
+            "type": "case_event",
+            "status": "Closed",
+        })
+    return sorted(events, key=timeline_key)
+
+
+def timeline_key(entry):
+    return getdate(entry["date"]) if entry["date"] else UNDATED
+
+
+def get_case_timeline(case, check_permissions=False):
+    """
+    Chronological timeline of a case, merged from per-doctype date-ordered streams
+
+    Args:
+        case: Case document
+        check_permissions (bool): Leave out streams the session user cannot read
+
+    Returns:
+        list: Entries with date, activity, details, type, status and, for
+            related records, reference_doctype and reference; oldest first
+    """
+    streams = [get_case_events(case)]
+    for stream in TIMELINE_STREAMS:
+        if check_permissions and not frappe.has_permission(stream["doctype"], "read"):
+            continue
+        streams.append(fetch_stream(stream, case.name, case.beneficiary_family))
+
+    return list(heapq.merge(*streams, key=timeline_key))
+
+
+@frappe.whitelist()
+def get_timeline(case):
+    """Timeline of a case for the Case form"""
+    doc = frappe.get_doc("Case", case)
+    doc.check_permission("read")
+    return get_case_timeline(doc, check_permissions=True)
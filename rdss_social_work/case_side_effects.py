@@ -0,0 +1,109 @@
+"""
+Deferred side effects of Case saves
+
+Case.on_update used to recompute the case metrics, load the Beneficiary
+Family just to add a comment to it, and send status / priority emails, all
+inside the save and once per save. A batch touching many cases of one
+family repeated that work for every case and every save.
+
+on_update now only records the case in a per-transaction queue:
+
+    * several saves of the same case in one request or job collapse into
+      one entry; the status / priority change flags are OR-ed together
+    * once the transaction commits, one background job is enqueued for the
+      whole queue; a rollback discards it
+    * the job recomputes each case's metrics once, adds one comment per
+      family naming every updated case (without loading the family), and
+      sends the notifications from the case's committed state
+
+A transaction that commits in chunks enqueues one job per chunk.
+"""
+
+from functools import partial
+
+import frappe
+
+from rdss_social_work.case_metrics import update_case_metrics
+
+JOB_METHOD = "rdss_social_work.case_side_effects.process_case_side_effects"
+
+
+def get_pending():
+    """Cases queued in the current transaction, {case: {status_changed, priority_changed}}"""
+    pending = getattr(frappe.local, "case_side_effects", None)
+    if pending is None:
+        pending = frappe.local.case_side_effects = {}
+        frappe.db.after_commit.add(flush)
+        frappe.db.after_rollback.add(discard)
+    return pending
+
+
+def queue_case_side_effects(doc):
+    """on_update of Case: defer metrics, the family comment and notifications until after commit"""
+    entry = get_pending().setdefault(doc.name, {"status_changed": False, "priority_changed": False})
+    entry["status_changed"] |= bool(doc.has_value_changed("case_status"))
+    entry["priority_changed"] |= bool(doc.has_value_changed("case_priority"))
+
+
+def discard():
+    frappe.local.case_side_effects = None
+
+
+def flush():
+    """Enqueue one job for every case saved in the transaction that just committed"""
+    pending = getattr(frappe.local, "case_side_effects", None)
+    discard()
+    if pending:
+        frappe.enqueue(JOB_METHOD, queue="short", cases=pending)
+
+
+def process_case_side_effects(cases):
+    """
+    Background job: run the coalesced side effects of saved cases
+
+    Args:
+        cases (dict): {case: {status_changed, priority_changed}}
+    """
+    rows = frappe.get_all(
+        "Case",
+        filters={"name": ["in", list(cases)]},
+        fields=["name", "case_title", "beneficiary_family"],
+    )
+
+    updated_by_family = {}
+    for row in rows:
+        try:
+            update_case_metrics(row)
+        except Exception:
+            frappe.log_error(title=f"Case Metrics Error: {row.name}")
+        if row.beneficiary_family:
+            updated_by_family.setdefault(row.beneficiary_family, []).append(row.case_title or row.name)
+
+    add_family_comments(updated_by_family)
+
+    for row in rows:
+        changes = cases[row.name]
+        if not (changes["status_changed"] or changes["priority_changed"]):
+            continue
+        try:
+            doc = frappe.get_doc("Case", row.name)
+            if changes["status_changed"]:
+                doc.send_status_change_notification()
+            if changes["priority_changed"]:
+                doc.send_priority_change_notification()
+        except Exception:
+            frappe.log_error(title=f"Case Notification Error: {row.name}")
+
+
+def add_family_comments(updated_by_family):
+    """One Info comment per family listing its updated cases"""
+    for family, titles in updated_by_family.items():
+        content = f"Case updated: {titles[0]}" if len(titles) == 1 else f"Cases updated: {', '.join(titles)}"
+        frappe.get_doc({
+            "doctype": "Comment",
+            "comment_type": "Info",
+            "reference_doctype": "Beneficiary Family",
+            "reference_name": family,
+            "comment_email": frappe.session.user,
+            "content": content,
+        }).insert(ignore_permissions=True)
@@ -0,0 +1,100 @@
+"""
+Bulk database helpers for RDSS Social Work Case Management System
+
+Used by background jobs that write one column for many records at once,
+where a full document save per record would be far too slow.
+"""
+
+import frappe
+
+
+def bulk_update_column(doctype, fieldname, updates, static_values=None, chunk_size=1000):
+    """
+    Set one column to a per-record value with one UPDATE ... CASE per chunk
+
+    Document hooks and `modified` are intentionally left untouched.
+
+    Args:
+        doctype (str): DocType to update
+        fieldname (str): Column receiving the per-record values
+        updates (dict): {name: value}
+        static_values (dict, optional): {column: value} applied to every updated record
+        chunk_size (int): Records per UPDATE statement
+    """
+    if not updates:
+        return
+
+    static_values = static_values or {}
+    static_sql = "".join(f", `{column}` = %s" for column in static_values)
+
+    names = list(updates)
+    for start in range(0, len(names), chunk_size):
+        chunk = names[start:start + chunk_size]
+
+        values = []
+        for name in chunk:
+            values.extend([name, updates[name]])
+        values.extend(static_values.values())
+        values.extend(chunk)
+
+        frappe.db.sql(f"""
+            UPDATE `tab{doctype}`
+            SET `{fieldname}` = CASE name {" ".join(["WHEN %s THEN %s"] * len(chunk))} END{static_sql}
+            WHERE name IN ({", ".join(["%s"] * len(chunk))})
+        """, values)
+
+
+def bulk_set_value(doctype, names, values, chunk_size=1000):
+    """
+    Apply the same {column: value} to many records with one UPDATE per chunk
+
+    Args:
+        doctype (str): DocType to update
+        names (list): Record names
+        values (dict): {column: value}
+        chunk_size (int): Records per UPDATE statement
+    """
+    names = list(names)
+    if not names or not values:
+        return
+
+    set_sql = ", ".join(f"`{column}` = %s" for column in values)
+    for start in range(0, len(names), chunk_size):
+        chunk = names[start:start + chunk_size]
+        frappe.db.sql(f"""
+            UPDATE `tab{doctype}`
+            SET {set_sql}
+            WHERE name IN ({", ".join(["%s"] * len(chunk))})
+        """, list(values.values()) + chunk)
+
+
+def reserve_series_names(naming_series, count, digits=5):
+    """
+    Reserve a block of names from a naming series with one UPDATE
+
+    Used when records are written with bulk inserts instead of doc.insert(),
+    so the names follow the same series as documents saved through the form.
+    The series row stays locked until the transaction commits.
+
+    Args:
+        naming_series (str): Series such as "BEN-.YYYY.-"
+        count (int): Number of names to reserve
+        digits (int): Zero padding of the counter, as in make_autoname
+
+    Returns:
+        list: The reserved names in order
+    """
+    from frappe.model.naming import parse_naming_series
+
+    if count <= 0:
+        return []
+
+    prefix = parse_naming_series(naming_series)
+    frappe.db.sql("""
+        INSERT INTO `tabSeries` (`name`, `current`) VALUES (%s, 0)
+        ON DUPLICATE KEY UPDATE `name` = `name`
+    """, prefix)
+    frappe.db.sql("UPDATE `tabSeries` SET `current` = `current` + %s WHERE `name` = %s", (count, prefix))
+    last = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s", prefix)[0][0]
+
+    return [f"{prefix}{number:0{digits}d}" for number in range(last - count + 1, last + 1)]
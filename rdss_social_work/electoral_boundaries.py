@@ -0,0 +1,341 @@
+"""
+Electoral boundary lookups for RDSS Social Work Case Management System
+
+Attributes a stored geolocation to its GE2025 electoral division using the
+boundaries shipped in public/ElectoralBoundary2025GEOJSON.geojson.
+
+The GeoJSON is parsed once per process into compact coordinate arrays:
+
+    * a uniform grid over Singapore maps each cell to the polygon parts
+      whose bounding box overlaps it, so a lookup only considers a handful
+      of candidates
+    * every polygon ring keeps its edges bucketed into horizontal slabs, so
+      the ray-casting test only visits the few edges that span the point's
+      latitude instead of every vertex of the boundary
+
+Together these answer a point-in-polygon query in microseconds. For bulk
+tagging, locate_many() runs the same test vectorized with NumPy.
+
+Usage:
+    # Tag every Beneficiary and Beneficiary Family with its electoral division
+    bench execute rdss_social_work.electoral_boundaries.tag_electoral_divisions
+"""
+
+import json
+import os
+from array import array
+
+import frappe
+import numpy as np
+
+from rdss_social_work.geocode_cache import extract_coordinates
+
+GEOJSON_FILE = "ElectoralBoundary2025GEOJSON.geojson"
+GRID_SIZE = 48
+EDGES_PER_SLAB = 4
+
+
+class Ring:
+    """A closed ring stored as flat coordinate arrays with a slab index over its edges"""
+
+    __slots__ = ("xs", "ys", "min_y", "max_y", "slab_count", "slab_height", "slabs", "slab_matrix")
+
+    def __init__(self, coordinates):
+        # GeoJSON rings repeat the first vertex at the end; edge i joins vertex i and i + 1
+        self.xs = array("d", (c[0] for c in coordinates))
+        self.ys = array("d", (c[1] for c in coordinates))
+        if self.xs[0] != self.xs[-1] or self.ys[0] != self.ys[-1]:
+            self.xs.append(self.xs[0])
+            self.ys.append(self.ys[0])
+
+        edge_count = len(self.xs) - 1
+        self.min_y = min(self.ys)
+        self.max_y = max(self.ys)
+        self.slab_count = max(1, edge_count // EDGES_PER_SLAB)
+        self.slab_height = (self.max_y - self.min_y) / self.slab_count or 1.0
+
+        slabs = [[] for _ in range(self.slab_count)]
+        for i in range(edge_count):
+            low, high = sorted((self.ys[i], self.ys[i + 1]))
+            for slab in range(self._slab(low), self._slab(high) + 1):
+                slabs[slab].append(i)
+        self.slabs = [array("i", edges) for edges in slabs]
+        self.slab_matrix = None
+
+    def _slab(self, y):
+        return min(self.slab_count - 1, max(0, int((y - self.min_y) / self.slab_height)))
+
+    def contains(self, x, y):
+        """Ray-casting test restricted to the edges in the point's slab"""
+        if y < self.min_y or y > self.max_y:
+            return False
+
+        xs, ys = self.xs, self.ys
+        inside = False
+        for i in self.slabs[self._slab(y)]:
+            y1, y2 = ys[i], ys[i + 1]
+            if (y1 > y) != (y2 > y):
+                x1 = xs[i]
+                if x < (xs[i + 1] - x1) * (y - y1) / (y2 - y1) + x1:
+                    inside = not inside
+        return inside
+
+    def contains_brute_force(self, x, y):
+        """Ray-casting test over every edge; used as the benchmark baseline"""
+        xs, ys = self.xs, self.ys
+        inside = False
+        for i in range(len(xs) - 1):
+            y1, y2 = ys[i], ys[i + 1]
+            if (y1 > y) != (y2 > y):
+                x1 = xs[i]
+                if x < (xs[i + 1] - x1) * (y - y1) / (y2 - y1) + x1:
+                    inside = not inside
+        return inside
+
+    def contains_many(self, x, y):
+        """
+        Vectorized ray-casting test for arrays of points
+
+        Each point only gathers the edges of its own slab; the slab lists are
+        padded into a matrix whose filler entries point at a NaN edge that
+        never crosses the ray.
+        """
+        edges = self._slab_matrix()
+        x1 = np.append(np.frombuffer(self.xs, dtype=np.float64)[:-1], np.nan)
+        y1 = np.append(np.frombuffer(self.ys, dtype=np.float64)[:-1], np.nan)
+        x2 = np.append(np.frombuffer(self.xs, dtype=np.float64)[1:], np.nan)
+        y2 = np.append(np.frombuffer(self.ys, dtype=np.float64)[1:], np.nan)
+
+        inside = np.zeros(len(x), dtype=bool)
+        in_range = np.flatnonzero((y >= self.min_y) & (y <= self.max_y))
+        if not len(in_range):
+            return inside
+
+        px = x[in_range, None]
+        py = y[in_range, None]
+        slab = np.clip(((py[:, 0] - self.min_y) / self.slab_height).astype(np.int64), 0, self.slab_count - 1)
+        candidate = edges[slab]
+
+        ey1, ey2, ex1 = y1[candidate], y2[candidate], x1[candidate]
+        spans = (ey1 > py) != (ey2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_x = (x2[candidate] - ex1) * (py - ey1) / (ey2 - ey1) + ex1
+        crossings = np.count_nonzero(spans & (px < crossing_x), axis=1)
+        inside[in_range] = crossings % 2 == 1
+        return inside
+
+    def _slab_matrix(self):
+        if self.slab_matrix is None:
+            width = max(len(edges) for edges in self.slabs)
+            sentinel = len(self.xs) - 1
+            matrix = np.full((self.slab_count, width), sentinel, dtype=np.int64)
+            for i, edges in enumerate(self.slabs):
+                matrix[i, :len(edges)] = edges
+            self.slab_matrix = matrix
+        return self.slab_matrix
+
+
+class PolygonPart:
+    """One polygon of a division: an outer ring, optional holes and a bounding box"""
+
+    __slots__ = ("division", "outer", "holes", "bbox")
+
+    def __init__(self, division, rings):
+        self.division = division
+        self.outer = Ring(rings[0])
+        self.holes = [Ring(ring) for ring in rings[1:]]
+        self.bbox = (min(self.outer.xs), self.outer.min_y, max(self.outer.xs), self.outer.max_y)
+
+    def in_bbox(self, x, y):
+        min_x, min_y, max_x, max_y = self.bbox
+        return min_x <= x <= max_x and min_y <= y <= max_y
+
+    def contains(self, x, y):
+        return self.outer.contains(x, y) and not any(hole.contains(x, y) for hole in self.holes)
+
+    def contains_brute_force(self, x, y):
+        return self.outer.contains_brute_force(x, y) and not any(h.contains_brute_force(x, y) for h in self.holes)
+
+
+class ElectoralIndex:
+    """Grid-indexed point-in-polygon lookup over all electoral divisions"""
+
+    def __init__(self, geojson):
+        self.divisions = []
+        self.parts = []
+
+        for feature in geojson["features"]:
+            properties = feature.get("properties") or {}
+            division = frappe._dict(
+                code=properties.get("NEW_ED"),
+                name=properties.get("ED_DESC") or properties.get("Name"),
+                full_name=properties.get("ED_DESC_FU") or properties.get("ED_DESC"),
+            )
+            self.divisions.append(division)
+
+            geometry = feature["geometry"]
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+            for rings in polygons:
+                self.parts.append(PolygonPart(division, rings))
+
+        self.min_x = min(p.bbox[0] for p in self.parts)
+        self.min_y = min(p.bbox[1] for p in self.parts)
+        self.max_x = max(p.bbox[2] for p in self.parts)
+        self.max_y = max(p.bbox[3] for p in self.parts)
+        self.cell_width = (self.max_x - self.min_x) / GRID_SIZE
+        self.cell_height = (self.max_y - self.min_y) / GRID_SIZE
+
+        self.grid = [[] for _ in range(GRID_SIZE * GRID_SIZE)]
+        for part in self.parts:
+            min_cx, min_cy = self._cell(part.bbox[0], part.bbox[1])
+            max_cx, max_cy = self._cell(part.bbox[2], part.bbox[3])
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    self.grid[cy * GRID_SIZE + cx].append(part)
+
+    def _cell(self, x, y):
+        cx = min(GRID_SIZE - 1, max(0, int((x - self.min_x) / self.cell_width)))
+        cy = min(GRID_SIZE - 1, max(0, int((y - self.min_y) / self.cell_height)))
+        return cx, cy
+
+    def locate(self, lat, lng):
+        """
+        Return the division containing a point
+
+        Returns:
+            frappe._dict: {code, name, full_name} or None when the point lies outside every division
+        """
+        x, y = lng, lat
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return None
+
+        cx, cy = self._cell(x, y)
+        for part in self.grid[cy * GRID_SIZE + cx]:
+            if part.in_bbox(x, y) and part.contains(x, y):
+                return part.division
+        return None
+
+    def locate_brute_force(self, lat, lng):
+        """Scan every polygon and every edge; the baseline for the benchmark"""
+        for part in self.parts:
+            if part.contains_brute_force(lng, lat):
+                return part.division
+        return None
+
+    def locate_many(self, lats, lngs):
+        """
+        Vectorized lookup for many points
+
+        Args:
+            lats, lngs: Sequences of equal length
+
+        Returns:
+            list: Division code (or None) for each point
+        """
+        x = np.asarray(lngs, dtype=np.float64)
+        y = np.asarray(lats, dtype=np.float64)
+        result = np.full(len(x), -1, dtype=np.int64)
+        division_index = {id(d): i for i, d in enumerate(self.divisions)}
+
+        for part in self.parts:
+            min_x, min_y, max_x, max_y = part.bbox
+            candidates = np.flatnonzero((result < 0) & (x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))
+            if not len(candidates):
+                continue
+
+            px, py = x[candidates], y[candidates]
+            inside = part.outer.contains_many(px, py)
+            for hole in part.holes:
+                inside &= ~hole.contains_many(px, py)
+            result[candidates[inside]] = division_index[id(part.division)]
+
+        return [self.divisions[i].code if i >= 0 else None for i in result]
+
+
+_index = None
+
+
+def load_index(path=None):
+    """Parse a boundary GeoJSON file (default: the bundled GE2025 boundaries) into an index"""
+    path = path or os.path.join(frappe.get_app_path("rdss_social_work"), "public", GEOJSON_FILE)
+    with open(path) as f:
+        return ElectoralIndex(json.load(f))
+
+
+def get_index():
+    """Return the process-wide index, parsing the GeoJSON on first use"""
+    global _index
+    if _index is None:
+        _index = load_index()
+    return _index
+
+
+def locate_geolocation(geolocation):
+    """
+    Electoral division code for a stored GeoJSON geolocation
+
+    Returns:
+        str: Division code (e.g. "JE") or None
+    """
+    lat, lng = extract_coordinates(geolocation)
+    if lat is None:
+        return None
+
+    division = get_index().locate(lat, lng)
+    return division.code if division else None
+
+
+@frappe.whitelist()
+def get_electoral_division(lat, lng):
+    """Whitelisted lookup of the electoral division for a coordinate pair"""
+    division = get_index().locate(float(lat), float(lng))
+    return dict(division) if division else None
+
+
+def tag_electoral_divisions(doctypes=None, force=False, chunk_size=5000):
+    """
+    Bulk-tag records with the electoral division of their stored geolocation
+
+    Args:
+        doctypes (list, optional): DocTypes to tag (default: Beneficiary and Beneficiary Family)
+        force (bool): Re-tag records that already have a division
+        chunk_size (int): Records located and written per chunk
+
+    Returns:
+        dict: {doctype: {"tagged": n, "outside": n}}
+    """
+    from rdss_social_work.db_utils import bulk_update_column
+
+    index = get_index()
+    doctypes = doctypes or ["Beneficiary Family", "Beneficiary"]
+    summary = {}
+
+    for doctype in doctypes:
+        filters = [["geolocation", "is", "set"]]
+        if not force:
+            filters.append(["electoral_division", "in", ["", None]])
+
+        records = frappe.get_all(doctype, filters=filters, fields=["name", "geolocation"])
+        stats = summary[doctype] = {"tagged": 0, "outside": 0}
+
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            names, lats, lngs = [], [], []
+            for record in chunk:
+                lat, lng = extract_coordinates(record.geolocation)
+                if lat is not None:
+                    names.append(record.name)
+                    lats.append(lat)
+                    lngs.append(lng)
+
+            codes = index.locate_many(lats, lngs) if names else []
+            updates = {name: code for name, code in zip(names, codes) if code}
+            stats["tagged"] += len(updates)
+            stats["outside"] += len(names) - len(updates)
+
+            bulk_update_column(doctype, "electoral_division", updates)
+            frappe.db.commit()
+
+        print(f"{doctype}: tagged {stats['tagged']}, outside any division {stats['outside']}")
+
+    return summary
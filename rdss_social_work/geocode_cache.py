@@ -0,0 +1,266 @@
+"""
+Geocode cache for RDSS Social Work Case Management System
+
+Singapore addresses collapse to roughly 120k six-digit postal codes, so
+geocoding results are cached by normalized postal code (or by a hash of the
+normalized address when no usable postal code is available).
+
+Lookups go through two tiers:
+    1. an in-process LRU, shared by every request served by the worker
+    2. the Geocode Cache DocType, shared by every worker on the site
+
+Entries older than the configured TTL are revalidated against the API. If
+revalidation fails the stale entry is still served, so a Google outage never
+removes coordinates we already know.
+
+Site config:
+    geocode_cache_ttl_days (int): Days before an OK entry is revalidated (default 180)
+    geocode_cache_negative_ttl_days (int): Days before a Not Found entry is retried (default 7)
+    geocode_cache_lru_size (int): Entries kept in the in-process LRU (default 4096)
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import frappe
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime
+
+DEFAULT_TTL_DAYS = 180
+DEFAULT_NEGATIVE_TTL_DAYS = 7
+DEFAULT_LRU_SIZE = 4096
+
+STATUS_OK = "OK"
+STATUS_NOT_FOUND = "Not Found"
+
+COUNTERS = ("lru_hits", "db_hits", "misses", "revalidations", "stale_served")
+
+
+class GeocodeLRU:
+    """Thread-safe, size-bounded LRU of {(site, cache_key): entry}"""
+
+    def __init__(self, maxsize=DEFAULT_LRU_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_lru = None
+
+
+def get_lru():
+    """Return the process-wide LRU, sized from site config on first use"""
+    global _lru
+    if _lru is None:
+        _lru = GeocodeLRU(cint(frappe.conf.get("geocode_cache_lru_size")) or DEFAULT_LRU_SIZE)
+    return _lru
+
+
+def normalize_postal_code(postal_code):
+    """
+    Normalize a Singapore postal code to six digits
+
+    Strips prefixes and separators ("S 822126", "822-126") and restores the
+    leading zero spreadsheets drop from codes such as 018956.
+
+    Returns:
+        str: Six-digit postal code or None if it cannot be normalized
+    """
+    if not postal_code:
+        return None
+
+    digits = re.sub(r"\D", "", str(postal_code))
+    if len(digits) == 5:
+        digits = digits.zfill(6)
+
+    return digits if len(digits) == 6 else None
+
+
+def normalize_address(*parts):
+    """Lower-case, strip punctuation and collapse whitespace across address parts"""
+    text = " ".join(str(p) for p in parts if p)
+    text = re.sub(r"[^\w#\-/ ]+", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(address_line_1=None, address_line_2=None, postal_code=None, country="Singapore"):
+    """
+    Build the cache key and the query address sent to the API
+
+    Returns:
+        tuple: (cache_key, key_type, query_address) or (None, None, None) if there is nothing to geocode
+    """
+    if country == "Singapore":
+        normalized_postal = normalize_postal_code(postal_code)
+        if normalized_postal:
+            return f"SG-{normalized_postal}", "Postal Code", f"{normalized_postal}, Singapore"
+
+    normalized = normalize_address(address_line_1, address_line_2, postal_code, country)
+    if not normalized:
+        return None, None, None
+
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:20]
+    query_address = ", ".join(filter(None, [address_line_1, address_line_2, postal_code, country]))
+    return f"ADDR-{digest}", "Address", query_address
+
+
+def is_fresh(entry):
+    """Whether a cache entry is within its TTL"""
+    if not entry or not entry.get("fetched_on"):
+        return False
+
+    if entry.get("status") == STATUS_OK:
+        ttl_days = cint(frappe.conf.get("geocode_cache_ttl_days")) or DEFAULT_TTL_DAYS
+    else:
+        ttl_days = cint(frappe.conf.get("geocode_cache_negative_ttl_days")) or DEFAULT_NEGATIVE_TTL_DAYS
+
+    return get_datetime(entry["fetched_on"]) > add_to_date(now_datetime(), days=-ttl_days)
+
+
+def lookup(cache_key):
+    """
+    Look up a cache entry in the LRU, then in the Geocode Cache table
+
+    Returns:
+        dict: {"status", "geolocation", "fetched_on"} or None if the key was never cached.
+              The caller decides whether a stale entry should be revalidated.
+    """
+    lru_key = (frappe.local.site, cache_key)
+    entry = get_lru().get(lru_key)
+    if entry is not None and is_fresh(entry):
+        increment_counter("lru_hits")
+        return entry
+
+    row = frappe.db.get_value(
+        "Geocode Cache", cache_key, ["status", "geolocation", "fetched_on"], as_dict=True
+    )
+    if not row:
+        increment_counter("misses")
+        return None
+
+    entry = {"status": row.status, "geolocation": row.geolocation, "fetched_on": row.fetched_on}
+    get_lru().set(lru_key, entry)
+    increment_counter("db_hits")
+    return entry
+
+
+def store(cache_key, key_type, query_address, geolocation):
+    """
+    Persist a geocoding result; a None geolocation is cached as Not Found
+
+    Returns:
+        dict: The stored entry
+    """
+    status = STATUS_OK if geolocation else STATUS_NOT_FOUND
+    fetched_on = now_datetime()
+    latitude, longitude = extract_coordinates(geolocation)
+
+    values = {
+        "key_type": key_type,
+        "query_address": query_address,
+        "status": status,
+        "geolocation": geolocation,
+        "latitude": latitude,
+        "longitude": longitude,
+        "fetched_on": fetched_on,
+    }
+
+    if frappe.db.exists("Geocode Cache", cache_key):
+        frappe.db.set_value("Geocode Cache", cache_key, values, update_modified=False)
+    else:
+        try:
+            frappe.get_doc(dict(values, doctype="Geocode Cache", cache_key=cache_key)).insert(
+                ignore_permissions=True
+            )
+        except frappe.DuplicateEntryError:
+            # Another worker cached the same key concurrently; theirs is just as good
+            pass
+
+    entry = {"status": status, "geolocation": geolocation, "fetched_on": fetched_on}
+    get_lru().set((frappe.local.site, cache_key), entry)
+    return entry
+
+
+def evict(cache_key):
+    """Drop a key from this process's LRU"""
+    get_lru().pop((frappe.local.site, cache_key))
+
+
+def extract_coordinates(geolocation):
+    """Return (latitude, longitude) from a GeoJSON FeatureCollection string, or (None, None)"""
+    if not geolocation:
+        return None, None
+
+    try:
+        data = json.loads(geolocation) if isinstance(geolocation, str) else geolocation
+        lng, lat = data["features"][0]["geometry"]["coordinates"][:2]
+        return float(lat), float(lng)
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None, None
+
+
+def _counter_key(counter):
+    return frappe.cache().make_key(f"geocode_cache:{counter}")
+
+
+def increment_counter(counter):
+    """Increment a site-wide hit/miss counter; counters are best-effort"""
+    try:
+        frappe.cache().incrby(_counter_key(counter), 1)
+    except Exception:
+        pass
+
+
+@frappe.whitelist()
+def get_cache_stats():
+    """Return hit/miss counters, hit ratio and table size for the geocode cache"""
+    frappe.only_for("System Manager")
+
+    stats = {}
+    for counter in COUNTERS:
+        try:
+            stats[counter] = cint(frappe.cache().get(_counter_key(counter)))
+        except Exception:
+            stats[counter] = 0
+
+    lookups = stats["lru_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = round((stats["lru_hits"] + stats["db_hits"]) / lookups, 4) if lookups else None
+    stats["cached_entries"] = frappe.db.count("Geocode Cache")
+    stats["lru_entries"] = len(get_lru())
+    return stats
+
+
+@frappe.whitelist()
+def reset_cache_stats():
+    """Reset the hit/miss counters"""
+    frappe.only_for("System Manager")
+
+    for counter in COUNTERS:
+        frappe.cache().delete(_counter_key(counter))
@@ -13,90 +13,44 @@ Usage:
     
     # Force geocode all families (overwrite existing)
     bench execute rdss_social_work.geocode_existing_beneficiaries.geocode_all --kwargs "{'force': True}"
+
+    # Tune concurrency and rate limit
+    bench execute rdss_social_work.geocode_existing_beneficiaries.geocode_all --kwargs "{'workers': 16, 'rate': 50}"
 """
 
 import frappe
 from rdss_social_work.geocoding_utils import geocode_beneficiary_family
-import time
 
-def geocode_all(force=False, batch_size=10, delay=1):
+def geocode_all(force=False, batch_size=500, delay=0, workers=8, rate=40, resume=True):
     """
     Geocode all existing beneficiary families
+
+    Delegates to the concurrent bulk geocoder: addresses are deduplicated and
+    served from the geocode cache where possible, remaining requests run on a
+    rate-limited thread pool, and results are written back in bulk. An
+    interrupted run resumes from its last committed chunk.
     
     Args:
         force (bool): If True, geocode even if geolocation already exists
-        batch_size (int): Number of records to process in each batch
-        delay (float): Delay in seconds between API calls to avoid rate limiting
+        batch_size (int): Number of records written and committed per chunk
+        delay (float): Legacy minimum delay in seconds between API calls; overrides rate when set
+        workers (int): Maximum concurrent API requests
+        rate (float): Maximum API requests per second
+        resume (bool): Continue after the checkpoint left by an interrupted run
     """
-    print("Starting bulk geocoding of existing beneficiary families...")
-    
-    # Build filters
-    filters = {"primary_address_line_1": ["!=", ""]}
-    if not force:
-        filters["geolocation"] = ["in", ["", None]]
-    
-    # Get families that need geocoding
-    families = frappe.get_all(
-        "Beneficiary Family",
-        filters=filters,
-        fields=["name", "family_name", "primary_address_line_1", "primary_address_line_2", "primary_postal_code", "geolocation"]
+    from rdss_social_work.bulk_geocoder import run
+
+    if delay and delay > 0:
+        rate = 1.0 / delay
+
+    return run(
+        doctype="Beneficiary Family",
+        force=force,
+        workers=workers,
+        rate=rate,
+        chunk_size=batch_size,
+        resume=resume
     )
-    
-    if not families:
-        print("No beneficiary families found that need geocoding.")
-        return
-    
-    total_count = len(families)
-    print(f"Found {total_count} beneficiary families to geocode.")
-    
-    success_count = 0
-    error_count = 0
-    
-    # Process in batches
-    for i in range(0, total_count, batch_size):
-        batch = families[i:i + batch_size]
-        print(f"\nProcessing batch {i//batch_size + 1} ({len(batch)} records)...)")
-        
-        for family_data in batch:
-            try:
-                # Get the full document
-                family_doc = frappe.get_doc("Beneficiary Family", family_data["name"])
-                
-                # Skip if already has geolocation and not forcing
-                if not force and family_doc.geolocation:
-                    print(f"  Skipping {family_doc.family_name} (already has geolocation)")
-                    continue
-                
-                # Attempt geocoding
-                success = geocode_beneficiary_family(family_doc)
-                
-                if success:
-                    # Save the document with new geolocation
-                    family_doc.save(ignore_permissions=True)
-                    success_count += 1
-                    print(f"  ✓ Geocoded: {family_doc.family_name}")
-                else:
-                    error_count += 1
-                    print(f"  ✗ Failed: {family_doc.family_name}")
-                
-                # Add delay to avoid rate limiting
-                if delay > 0:
-                    time.sleep(delay)
-                    
-            except Exception as e:
-                error_count += 1
-                print(f"  ✗ Error processing {family_data['family_name']}: {str(e)}")
-                frappe.log_error(f"Error geocoding family {family_data['name']}: {str(e)}", 
-                               "Bulk Geocoding Error")
-        
-        # Commit after each batch
-        frappe.db.commit()
-        print(f"  Batch completed. Success: {success_count}, Errors: {error_count}")
-    
-    print(f"\nBulk geocoding completed!")
-    print(f"Total families processed: {total_count}")
-    print(f"Successfully geocoded: {success_count}")
-    print(f"Errors: {error_count}")
 
 def geocode_by_pattern(pattern, force=False):
     """
@@ -0,0 +1,182 @@
+"""
+Background geocoding for Beneficiary and Beneficiary Family saves
+
+The before_save hooks no longer call Google inside the save transaction.
+Instead they:
+
+    1. answer from the geocode cache when it already knows the address
+       (no network, so the form save stays fast), or
+    2. mark the record "Pending" and enqueue a geocoding job that only
+       starts after the save has committed
+
+Jobs are deduplicated per document, and the job reads the address from the
+database when it runs, so several quick saves of the same record collapse
+into a single lookup of the latest address.
+
+Retry policy: transient failures (network, quota) are retried in the job
+with a short backoff. Records still pending afterwards are picked up by the
+hourly retry_pending_geocoding sweep. Addresses Google cannot find are
+marked "Failed" and not retried until the address changes.
+"""
+
+import time
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from rdss_social_work.electoral_boundaries import locate_geolocation
+from rdss_social_work.geocode_cache import extract_coordinates
+from rdss_social_work.geocoding_utils import (
+    ADDRESS_FIELDS,
+    GEOCODE_ERROR,
+    GEOCODE_NOT_FOUND,
+    GEOCODE_OK,
+    resolve_geolocation,
+)
+from rdss_social_work.spatial_search import TITLE_FIELDS, publish_locations
+
+STATUS_PENDING = "Pending"
+STATUS_GEOCODED = "Geocoded"
+STATUS_FAILED = "Failed"
+
+# Seconds to wait before each in-job retry of a transient failure
+RETRY_BACKOFF = (2, 8)
+
+# How many times a job follows an address that changed while it was geocoding
+MAX_ADDRESS_REFRESHES = 3
+
+
+def get_address(doc_or_row, doctype):
+    fields = ADDRESS_FIELDS[doctype]
+    return (
+        doc_or_row.get(fields["address_line_1"]),
+        doc_or_row.get(fields["address_line_2"]),
+        doc_or_row.get(fields["postal_code"]),
+    )
+
+
+def get_job_id(doctype, name):
+    return f"geocode::{doctype}::{name}"
+
+
+def queue_geocoding(doc):
+    """
+    Resolve a document's geolocation from the cache or enqueue a background job
+
+    Called from before_save; never makes a network request.
+
+    Returns:
+        str: The resulting geocoding_status
+    """
+    address = get_address(doc, doc.doctype)
+    status, geolocation = resolve_geolocation(*address, allow_network=False)
+
+    if status == GEOCODE_OK:
+        doc.geolocation = geolocation
+        doc.electoral_division = locate_geolocation(geolocation)
+        doc.geocoding_status = STATUS_GEOCODED
+    elif status == GEOCODE_NOT_FOUND:
+        doc.geocoding_status = STATUS_FAILED
+    else:
+        # The stored coordinates belong to the previous address; drop them until the job lands
+        if not doc.is_new() and doc.geolocation and address_changed(doc):
+            doc.geolocation = None
+            doc.electoral_division = None
+        doc.geocoding_status = STATUS_PENDING
+        enqueue_geocoding(doc.doctype, doc.name)
+
+    return doc.geocoding_status
+
+
+def address_changed(doc):
+    return any(doc.has_value_changed(field) for field in ADDRESS_FIELDS[doc.doctype].values())
+
+
+def enqueue_geocoding(doctype, name, after_commit=True):
+    """Enqueue a geocoding job for a document unless one is already queued"""
+    frappe.enqueue(
+        "rdss_social_work.geocoding_queue.geocode_document",
+        queue="short",
+        job_id=get_job_id(doctype, name),
+        deduplicate=True,
+        enqueue_after_commit=after_commit,
+        doctype=doctype,
+        name=name,
+    )
+
+
+def geocode_document(doctype, name):
+    """
+    Background job: geocode one document's current address and store the result
+
+    Writes only the location columns and geocoding_status, so the job never
+    conflicts with the user's next save of the form.
+    """
+    for _ in range(MAX_ADDRESS_REFRESHES):
+        address = read_address(doctype, name)
+        if address is None:
+            return
+
+        status, geolocation = resolve_with_retries(address)
+
+        # The address was edited while we were geocoding: start over with the new one
+        if read_address(doctype, name) != address:
+            continue
+
+        if status == GEOCODE_OK:
+            lat, lng = extract_coordinates(geolocation)
+            values = {
+                "geolocation": geolocation,
+                "latitude": lat,
+                "longitude": lng,
+                "electoral_division": locate_geolocation(geolocation),
+                "geocoding_status": STATUS_GEOCODED,
+            }
+        elif status == GEOCODE_NOT_FOUND:
+            values = {"geocoding_status": STATUS_FAILED}
+        else:
+            # Leave it Pending for the hourly sweep
+            return
+
+        frappe.db.set_value(doctype, name, values, update_modified=False)
+        frappe.db.commit()
+
+        if status == GEOCODE_OK:
+            title = frappe.db.get_value(doctype, name, TITLE_FIELDS[doctype])
+            publish_locations(doctype, [[name, lat, lng, title]])
+        return
+
+
+def read_address(doctype, name):
+    row = frappe.db.get_value(doctype, name, list(ADDRESS_FIELDS[doctype].values()), as_dict=True)
+    return get_address(row, doctype) if row else None
+
+
+def resolve_with_retries(address):
+    status, geolocation = resolve_geolocation(*address)
+    for delay in RETRY_BACKOFF:
+        if status != GEOCODE_ERROR:
+            break
+        time.sleep(delay)
+        status, geolocation = resolve_geolocation(*address)
+    return status, geolocation
+
+
+def retry_pending_geocoding(limit=500, min_age_minutes=15):
+    """
+    Scheduled sweep: re-enqueue records left Pending by failed or lost jobs
+
+    Only records untouched for min_age_minutes are considered, so jobs that
+    are still queued from recent saves are left alone.
+    """
+    cutoff = add_to_date(now_datetime(), minutes=-min_age_minutes)
+
+    for doctype in ADDRESS_FIELDS:
+        names = frappe.get_all(
+            doctype,
+            filters={"geocoding_status": STATUS_PENDING, "modified": ["<", cutoff]},
+            pluck="name",
+            limit=limit,
+        )
+        for name in names:
+            enqueue_geocoding(doctype, name, after_commit=False)
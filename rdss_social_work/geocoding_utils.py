@@ -10,76 +10,144 @@ import requests
 import json
 from frappe.utils import cstr
 
+from rdss_social_work import geocode_cache
+from rdss_social_work.geocode_cache import make_cache_key
+
+# Address fields of each geocoded DocType
+ADDRESS_FIELDS = {
+    "Beneficiary Family": {
+        "address_line_1": "primary_address_line_1",
+        "address_line_2": "primary_address_line_2",
+        "postal_code": "primary_postal_code",
+    },
+    "Beneficiary": {
+        "address_line_1": "address_line_1",
+        "address_line_2": "address_line_2",
+        "postal_code": "postal_code",
+    },
+}
+
 def get_google_maps_api_key():
     """Get Google Maps API key from site config"""
     return frappe.conf.get("google_map_api_key")
 
-def geocode_address(address_line_1, address_line_2=None, postal_code=None, country="Singapore"):
+def geocode_address(address_line_1, address_line_2=None, postal_code=None, country="Singapore", use_cache=True):
     """
     Geocode an address using Google Maps Geocoding API
     Prioritizes postal code for Singapore addresses for better accuracy
+
+    Results are served from the geocode cache when possible, so repeat saves
+    and imports of the same postal code never touch the network.
     
     Args:
         address_line_1 (str): Primary address line
         address_line_2 (str, optional): Secondary address line
         postal_code (str, optional): Postal code
         country (str): Country (default: Singapore)
+        use_cache (bool): Set to False to bypass the cache and force an API call
     
     Returns:
         str: GeoJSON FeatureCollection string with coordinates or None if geocoding fails
     """
+    status, geolocation = resolve_geolocation(address_line_1, address_line_2, postal_code, country, use_cache=use_cache)
+    return geolocation
+
+# Outcomes of resolve_geolocation
+GEOCODE_OK = "OK"
+GEOCODE_NOT_FOUND = "NOT_FOUND"  # Google answered; the address does not exist
+GEOCODE_ERROR = "ERROR"  # Network, quota or configuration problem; worth retrying
+GEOCODE_UNCACHED = "UNCACHED"  # allow_network=False and the cache had no fresh entry
+
+def resolve_geolocation(address_line_1, address_line_2=None, postal_code=None, country="Singapore",
+                        use_cache=True, allow_network=True):
+    """
+    Resolve an address through the geocode cache, falling back to the API
+
+    Args:
+        use_cache (bool): Set to False to bypass the cache and force an API call
+        allow_network (bool): Set to False to answer from the cache only
+
+    Returns:
+        tuple: (status, geolocation) where status is one of the GEOCODE_* constants
+    """
+    cache_key, key_type, query_address = make_cache_key(address_line_1, address_line_2, postal_code, country)
+    if not cache_key:
+        return GEOCODE_NOT_FOUND, None
+
+    cached = geocode_cache.lookup(cache_key) if use_cache else None
+    if cached and geocode_cache.is_fresh(cached):
+        return (GEOCODE_OK if cached["geolocation"] else GEOCODE_NOT_FOUND), cached["geolocation"]
+
+    if not allow_network:
+        return GEOCODE_UNCACHED, None
+
+    if cached:
+        geocode_cache.increment_counter("revalidations")
+
+    result = request_geocode(query_address)
+    if result is None:
+        # Transient failure: serve the stale entry rather than nothing
+        if cached and cached.get("geolocation"):
+            geocode_cache.increment_counter("stale_served")
+            return GEOCODE_OK, cached["geolocation"]
+        return GEOCODE_ERROR, None
+
+    geolocation = result or None
+    geocode_cache.store(cache_key, key_type, query_address, geolocation)
+    return (GEOCODE_OK if geolocation else GEOCODE_NOT_FOUND), geolocation
+
+def make_geojson(lat, lng):
+    """Create GeoJSON FeatureCollection structure as required by Frappe"""
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {},
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [lng, lat]
+                }
+            }
+        ]
+    }
+    return json.dumps(geojson)
+
+def request_geocode(full_address, session=None):
+    """
+    Call the Google Maps Geocoding API for a single address (no caching)
+
+    Args:
+        full_address (str): Address string to geocode
+        session (requests.Session, optional): Session to reuse connections across calls
+
+    Returns:
+        str: GeoJSON string when the address was found,
+             "" when Google answered but found nothing (safe to cache),
+             None on configuration, network or quota errors (do not cache)
+    """
     api_key = get_google_maps_api_key()
     if not api_key:
         frappe.log_error("Google Maps API key not found in site config", "Geocoding Error")
         return None
     
-    # For Singapore addresses, prioritize postal code for better accuracy
-    if postal_code and country == "Singapore":
-        full_address = f"{postal_code}, Singapore"
-    else:
-        # Build the full address
-        address_parts = [address_line_1]
-        if address_line_2:
-            address_parts.append(address_line_2)
-        if postal_code:
-            address_parts.append(postal_code)
-        address_parts.append(country)
-        
-        full_address = ", ".join(filter(None, address_parts))
-    
-    # Google Maps Geocoding API endpoint
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
         "address": full_address,
         "key": api_key
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = (session or requests).get(get_geocoding_api_url(), params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
         
         if data.get("status") == "OK" and data.get("results"):
-            result = data["results"][0]
-            location = result["geometry"]["location"]
-            
-            # Create GeoJSON FeatureCollection structure as required by Frappe
-            geojson = {
-                "type": "FeatureCollection",
-                "features": [
-                    {
-                        "type": "Feature",
-                        "properties": {},
-                        "geometry": {
-                            "type": "Point",
-                            "coordinates": [location["lng"], location["lat"]]
-                        }
-                    }
-                ]
-            }
-            
-            return json.dumps(geojson)
+            location = data["results"][0]["geometry"]["location"]
+            return make_geojson(location["lat"], location["lng"])
+        elif data.get("status") == "ZERO_RESULTS":
+            frappe.log_error(f"Geocoding failed for address '{full_address}': ZERO_RESULTS", "Geocoding Error")
+            return ""
         else:
             error_msg = data.get("error_message", data.get("status", "Unknown error"))
             frappe.log_error(f"Geocoding failed for address '{full_address}': {error_msg}", "Geocoding Error")
@@ -92,6 +160,10 @@ def geocode_address(address_line_1, address_line_2=None, postal_code=None, count
         frappe.log_error(f"Unexpected error during geocoding for address '{full_address}': {str(e)}", "Geocoding Error")
         return None
 
+def get_geocoding_api_url():
+    """Google Maps Geocoding API endpoint; overridable in site config for testing"""
+    return frappe.conf.get("google_geocoding_api_url") or "https://maps.googleapis.com/maps/api/geocode/json"
+
 def geocode_beneficiary_family(family_doc):
     """
     Geocode a beneficiary family's address and update the geolocation field
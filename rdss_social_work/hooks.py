@@ -165,13 +165,54 @@ has_permission = {
 
 doc_events = {
 	"Beneficiary": {
-		"before_save": "rdss_social_work.beneficiary_geocoding.beneficiary_before_save"
+		"before_save": [
+			"rdss_social_work.beneficiary_geocoding.beneficiary_before_save",
+			"rdss_social_work.spatial_search.sync_coordinates"
+		],
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": [
+			"rdss_social_work.spatial_search.remove_from_index",
+			"rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+		]
 	},
 	"Beneficiary Family": {
-		"before_save": "rdss_social_work.beneficiary_family_geocoding.beneficiary_family_before_save"
+		"before_save": [
+			"rdss_social_work.beneficiary_family_geocoding.beneficiary_family_before_save",
+			"rdss_social_work.spatial_search.sync_coordinates"
+		],
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": [
+			"rdss_social_work.spatial_search.remove_from_index",
+			"rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+		]
 	},
 	"Support Scheme Application": {
 		"validate": "rdss_social_work.rdss_social_work.doctype.support_scheme_application.support_scheme_application.validate_beneficiary_access"
+	},
+	# Records shown in the Beneficiary overview invalidate its summary cache
+	"Case": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+	},
+	"Appointment": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+	},
+	"Initial Assessment": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+	},
+	"Follow Up Assessment": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+	},
+	"Service Plan": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
+	},
+	"Document Attachment": {
+		"on_update": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc",
+		"on_trash": "rdss_social_work.beneficiary_summary_cache.invalidate_for_doc"
 	}
 }
 
@@ -179,9 +220,18 @@ doc_events = {
 # ---------------
 
 scheduler_events = {
+	"hourly": [
+		"rdss_social_work.rdss_social_work.notifications.appointment_notification.send_appointment_reminders",
+		"rdss_social_work.geocoding_queue.retry_pending_geocoding"
+	],
 	"daily": [
-		"rdss_social_work.rdss_social_work.notifications.appointment_notification.send_appointment_reminders"
-	]
+		"rdss_social_work.rdss_social_work.notifications.appointment_notification.delete_old_reminder_logs"
+	],
+	"cron": {
+		"*/10 * * * *": [
+			"rdss_social_work.rdss_social_work.google_calendar.calendar_sync.sync_calendar"
+		]
+	}
 }
 
 # Testing
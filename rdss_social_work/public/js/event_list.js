@@ -43,7 +43,9 @@ function send_mass_calendar_invites(listview) {
                     event_names: event_names
                 },
                 callback: function(r) {
-                    if (r.message && r.message.status === 'success') {
+                    if (r.message && r.message.status === 'queued') {
+                        watch_calendar_job(listview, r.message.job_id, __('Sending calendar invites'), __('Failed to send calendar invites'), 'Calendar Invite Errors');
+                    } else if (r.message && r.message.status === 'success') {
                         frappe.show_alert({
                             message: r.message.message,
                             indicator: 'green'
@@ -113,7 +115,9 @@ function update_mass_calendar_events(listview) {
                     event_names: event_names
                 },
                 callback: function(r) {
-                    if (r.message && r.message.status === 'success') {
+                    if (r.message && r.message.status === 'queued') {
+                        watch_calendar_job(listview, r.message.job_id, __('Updating calendar events'), __('Failed to update calendar events'), 'Calendar Update Errors');
+                    } else if (r.message && r.message.status === 'success') {
                         frappe.show_alert({
                             message: r.message.message,
                             indicator: 'green'
@@ -183,7 +187,9 @@ function delete_mass_calendar_events(listview) {
                     event_names: event_names
                 },
                 callback: function(r) {
-                    if (r.message && r.message.status === 'success') {
+                    if (r.message && r.message.status === 'queued') {
+                        watch_calendar_job(listview, r.message.job_id, __('Deleting calendar events'), __('Failed to delete calendar events'), 'Calendar Delete Errors');
+                    } else if (r.message && r.message.status === 'success') {
                         frappe.show_alert({
                             message: r.message.message,
                             indicator: 'green'
@@ -239,6 +245,61 @@ function delete_mass_calendar_events(listview) {
     );
 }
 
+/**
+ * Follows a background calendar batch job: shows progress as batches complete
+ * and reports the per-event outcome when the job finishes
+ * @param {Object} listview - Event list view to refresh
+ * @param {string} job_id - Job id returned by the mass calendar endpoint
+ * @param {string} progress_title - Progress bar title
+ * @param {string} failure_message - Alert shown when nothing succeeded
+ * @param {string} error_title - Title of the error details dialog
+ */
+function watch_calendar_job(listview, job_id, progress_title, failure_message, error_title) {
+    const on_progress = function(data) {
+        if (data.job_id !== job_id) return;
+        frappe.show_progress(progress_title, data.done, data.total, __('{0} of {1} events processed', [data.done, data.total]));
+    };
+
+    // The realtime event and the status poll can both deliver the result; handle it once
+    let done = false;
+
+    const on_complete = function(result) {
+        if (result.job_id !== job_id || done) return;
+        done = true;
+        frappe.realtime.off('calendar_batch_progress', on_progress);
+        frappe.realtime.off('calendar_batch_complete', on_complete);
+        frappe.hide_progress();
+
+        const indicator = {success: 'green', partial_success: 'yellow'}[result.status] || 'red';
+        frappe.show_alert({
+            message: result.status === 'error' && !result.message ? failure_message : result.message,
+            indicator: indicator
+        });
+        listview.refresh();
+
+        const failed = result.results && result.results.failed;
+        if (failed && failed.length > 0) {
+            setTimeout(() => {
+                show_calendar_errors(error_title, failed);
+            }, 1000);
+        }
+    };
+
+    frappe.realtime.on('calendar_batch_progress', on_progress);
+    frappe.realtime.on('calendar_batch_complete', on_complete);
+
+    // The job may have finished before the listeners were attached
+    frappe.call({
+        method: 'rdss_social_work.rdss_social_work.google_calendar.batch_operations.get_mass_calendar_operation_status',
+        args: { job_id: job_id },
+        callback: function(r) {
+            if (r.message && ['success', 'partial_success', 'error'].includes(r.message.status)) {
+                on_complete(r.message);
+            }
+        }
+    });
+}
+
 /**
  * Shows a dialog with detailed error information for calendar operations
  * @param {string} title - Dialog title
@@ -5,6 +5,24 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import today, getdate, get_time, add_days, get_datetime, time_diff_in_hours
 from datetime import timedelta
+from rdss_social_work.scheduling_conflicts import find_conflicts, INACTIVE_STATUSES, SCHEDULING_FIELDS
+
+# Default duration (minutes) for each appointment type
+DURATION_MAPPING = {
+	"Phone Consultation": 30,
+	"Video Call": 45,
+	"Office Visit": 60,
+	"Home Visit": 90,
+	"Initial Assessment": 120,
+	"Follow Up Assessment": 90,
+	"Family Meeting": 90,
+	"Crisis Intervention": 60
+}
+
+
+def get_default_duration(appointment_type):
+	"""Default duration in minutes for an appointment type"""
+	return DURATION_MAPPING.get(appointment_type, 60)
 
 
 @frappe.whitelist()
@@ -57,17 +75,7 @@ class Appointment(Document):
 		
 		# Set default duration if not provided
 		if not self.duration_minutes:
-			duration_mapping = {
-				"Phone Consultation": 30,
-				"Video Call": 45,
-				"Office Visit": 60,
-				"Home Visit": 90,
-				"Initial Assessment": 120,
-				"Follow Up Assessment": 90,
-				"Family Meeting": 90,
-				"Crisis Intervention": 60
-			}
-			self.duration_minutes = duration_mapping.get(self.appointment_type, 60)
+			self.duration_minutes = get_default_duration(self.appointment_type)
 		
 		# Set reminder date if reminder sent but date not set
 		if self.reminder_sent and not self.reminder_date:
@@ -198,32 +206,28 @@ class Appointment(Document):
 		self.create_reminder_task()
 	
 	def check_scheduling_conflicts(self):
-		"""Check for scheduling conflicts with other appointments"""
+		"""Warn about appointments that overlap this one or leave too little travel time"""
 		if not self.social_worker or not self.appointment_date or not self.appointment_time:
 			return
 		
-		# Calculate appointment end time
-		from frappe.utils import add_to_date
-		start_datetime = get_datetime(f"{self.appointment_date} {self.appointment_time}")
-		end_datetime = add_to_date(start_datetime, minutes=self.duration_minutes or 60)
-		
-		# Check for overlapping appointments with simpler logic
-		overlapping = frappe.db.sql("""
-			SELECT name, appointment_type, appointment_time, duration_minutes
-			FROM `tabAppointment`
-			WHERE social_worker = %s
-			AND appointment_date = %s
-			AND appointment_status NOT IN ('Cancelled', 'No Show', 'Completed')
-			AND name != %s
-		""", (self.social_worker, self.appointment_date, self.name or ""))
-		
-		if overlapping:
+		# Nothing that affects the schedule changed since the last save
+		if not self.is_new() and not any(self.has_value_changed(field) for field in SCHEDULING_FIELDS):
+			return
+		
+		if self.appointment_status in INACTIVE_STATUSES:
+			return
+		
+		conflicts = find_conflicts(self)
+		if conflicts:
 			conflict_details = []
-			for conflict in overlapping:
-				conflict_details.append(f"{conflict[1]} at {conflict[2]}")
+			for conflict in conflicts:
+				if conflict["kind"] == "overlap":
+					conflict_details.append(f"{conflict['with']} ({conflict['appointment_type']}, {conflict['start']}) overlaps by {conflict['overlap_minutes']} min")
+				else:
+					conflict_details.append(f"{conflict['with']} ({conflict['appointment_type']}, {conflict['start']}) leaves {conflict['gap_minutes']} min for {conflict['required_gap_minutes']} min of travel")
 			
 			frappe.msgprint(
-				f"Scheduling conflict detected with: {', '.join(conflict_details)}",
+				f"Scheduling conflict detected with: {'; '.join(conflict_details)}",
 				title="Scheduling Conflict",
 				indicator="red"
 			)
@@ -5,14 +5,9 @@ frappe.ui.form.on('Beneficiary', {
             frm.set_value('age', calculate_age(frm.doc.date_of_birth));
         }
         
-        // Load related data in tabs
+        // Load related data for all tabs in one request
         if (!frm.is_new()) {
-            load_cases_data(frm);
-            load_appointments_data(frm);
-            load_assessments_data(frm);
-            load_services_data(frm);
-            load_documents_data(frm);
-            load_family_data(frm);
+            load_overview(frm);
         }
         
         // Add custom buttons
@@ -43,35 +38,12 @@ frappe.ui.form.on('Beneficiary', {
         // Initialize HTML containers for tabs
         initialize_tab_containers(frm);
         
-        // Force refresh on tab change to ensure content loads correctly
+        // Re-render a tab from the loaded overview when it is shown
         $('.form-tabs .nav-link').on('shown.bs.tab', function(e) {
-            if (!frm.is_new()) {
-                const tab = $(e.target).attr('data-target');
-                if (tab === '#cases') {
-                    load_cases_data(frm);
-                } else if (tab === '#appointments') {
-                    load_appointments_data(frm);
-                } else if (tab === '#assessments') {
-                    load_assessments_data(frm);
-                } else if (tab === '#services') {
-                    load_services_data(frm);
-                } else if (tab === '#documents') {
-                    load_documents_data(frm);
-                } else if (tab === '#family-overview') {
-                    load_family_data(frm);
-                }
+            if (!frm.is_new() && frm.beneficiary_overview) {
+                render_overview(frm, frm.beneficiary_overview);
             }
         });
-        
-        // Trigger loading of the first visible tab
-        if (!frm.is_new()) {
-            const activeTab = $('.form-tabs .nav-link.active');
-            if (activeTab.length) {
-                activeTab.trigger('shown.bs.tab');
-            } else {
-                load_cases_data(frm);
-            }
-        }
     }
 });
 
@@ -108,141 +80,69 @@ function add_custom_buttons(frm) {
     }
 }
 
-function load_cases_data(frm) {
-    // Load active cases using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_cases',
-        args: {
-            beneficiary_name: frm.doc.name
-        },
-        callback: function(r) {
-            if (r.message) {
-                render_cases_table(frm, r.message, 'case_notes_html', 'Active Cases');
-            }
-        }
-    });
-    
-    // Load closed cases using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_closed_cases',
-        args: {
-            beneficiary_name: frm.doc.name
-        },
-        callback: function(r) {
-            if (r.message) {
-                render_cases_table(frm, r.message, 'case_notes_html', 'Closed Cases');
-            }
-        }
-    });
-}
-
-function load_appointments_data(frm) {
-    // Load upcoming appointments using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_appointments',
-        args: {
-            beneficiary_name: frm.doc.name,
-            upcoming: true
-        },
-        callback: function(r) {
-            if (r.message && r.message.length > 0) {
-                render_appointments_table(frm, r.message, 'upcoming_appointments_html', 'Upcoming Appointments');
-            } else {
-                render_appointments_table(frm, [], 'upcoming_appointments_html', 'Upcoming Appointments');
-            }
-        }
-    });
-    
-    // Load appointment history using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_appointments',
-        args: {
-            beneficiary_name: frm.doc.name,
-            upcoming: false
-        },
-        callback: function(r) {
-            if (r.message && r.message.length > 0) {
-                render_appointments_table(frm, r.message, 'appointment_history_html', 'Appointment History');
-            } else {
-                render_appointments_table(frm, [], 'appointment_history_html', 'Appointment History');
-            }
-        }
-    });
-}
-
-function load_assessments_data(frm) {
-    // Load assessments using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_assessments',
-        args: {
-            beneficiary_name: frm.doc.beneficiary_name
-        },
-        callback: function(r) {
-            if (r.message) {
-                if (r.message.initial && r.message.initial.length > 0) {
-                    render_assessments_table(frm, r.message.initial, 'initial_assessments_html', 'Initial Assessments');
-                }
-                if (r.message.follow_up && r.message.follow_up.length > 0) {
-                    render_assessments_table(frm, r.message.follow_up, 'follow_up_assessments_html', 'Follow-up Assessments');
-                }
-            }
-        }
-    });
-}
+// Overview panels and the HTML field each one is rendered into
+const OVERVIEW_PANEL_FIELDS = {
+    cases: 'case_notes_html',
+    upcoming_appointments: 'upcoming_appointments_html',
+    appointment_history: 'appointment_history_html',
+    initial_assessments: 'initial_assessments_html',
+    follow_up_assessments: 'follow_up_assessments_html',
+    service_plans: 'current_service_plans_html',
+    documents: 'document_attachments_html',
+    family: 'family_info_html',
+    family_members: 'family_info_html'
+};
 
-function load_services_data(frm) {
-    // Use server-side method to avoid permission issues
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_service_plans',
-        args: {
-            beneficiary_name: frm.doc.name
-        },
-        callback: function(r) {
-            if (r.message) {
-                // Filter for active/in progress services
-                const filtered_plans = r.message.filter(plan => 
-                    ['Active', 'In Progress'].includes(plan.plan_status || ''));
-                    
-                render_services_table(frm, filtered_plans, 'current_service_plans_html', 'Current Service Plans');
-            } else {
-                render_services_table(frm, [], 'current_service_plans_html', 'Current Service Plans');
-            }
-        }
-    });
-}
+function load_overview(frm) {
+    // Only request the panels this form has a field for
+    const panels = Object.keys(OVERVIEW_PANEL_FIELDS).filter(panel => frm.fields_dict[OVERVIEW_PANEL_FIELDS[panel]]);
+    if (!panels.length) {
+        return;
+    }
 
-function load_documents_data(frm) {
-    // Use server-side method to avoid permission issues
     frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_documents',
+        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_overview',
         args: {
-            beneficiary_name: frm.doc.name
+            beneficiary: frm.doc.name,
+            panels: panels
         },
         callback: function(r) {
             if (r.message) {
-                render_documents_table(frm, r.message, 'document_attachments_html', 'Document Attachments');
-            } else {
-                render_documents_table(frm, [], 'document_attachments_html', 'Document Attachments');
+                frm.beneficiary_overview = r.message;
+                render_overview(frm, r.message);
             }
         }
     });
 }
 
-function load_family_data(frm) {
-    // Load family information using server-side method
-    frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary.beneficiary_queries.get_beneficiary_family_info',
-        args: {
-            beneficiary_name: frm.doc.name
-        },
-        callback: function(r) {
-            if (r.message) {
-                render_family_info(frm, r.message, 'family_info_html', 'Family Information');
-            } else {
-                render_family_info(frm, {family: null, family_members: []}, 'family_info_html', 'Family Information');
-            }
-        }
-    });
+function render_overview(frm, overview) {
+    if (overview.cases) {
+        render_cases_table(frm, overview.cases, 'case_notes_html', 'Cases');
+    }
+    if (overview.upcoming_appointments) {
+        render_appointments_table(frm, overview.upcoming_appointments, 'upcoming_appointments_html', 'Upcoming Appointments');
+    }
+    if (overview.appointment_history) {
+        render_appointments_table(frm, overview.appointment_history, 'appointment_history_html', 'Appointment History');
+    }
+    if (overview.initial_assessments && overview.initial_assessments.length > 0) {
+        render_assessments_table(frm, overview.initial_assessments, 'initial_assessments_html', 'Initial Assessments');
+    }
+    if (overview.follow_up_assessments && overview.follow_up_assessments.length > 0) {
+        render_assessments_table(frm, overview.follow_up_assessments, 'follow_up_assessments_html', 'Follow-up Assessments');
+    }
+    if (overview.service_plans) {
+        // Filter for active/in progress services
+        const filtered_plans = overview.service_plans.filter(plan =>
+            ['Active', 'In Progress'].includes(plan.plan_status || ''));
+        render_services_table(frm, filtered_plans, 'current_service_plans_html', 'Current Service Plans');
+    }
+    if (overview.documents) {
+        render_documents_table(frm, overview.documents, 'document_attachments_html', 'Document Attachments');
+    }
+    if (overview.family_members) {
+        render_family_info(frm, {family: overview.family || null, family_members: overview.family_members}, 'family_info_html', 'Family Information');
+    }
 }
 
 function render_cases_table(frm, data, field_name, title) {
@@ -6,6 +6,8 @@ from frappe.model.document import Document
 from frappe.utils import getdate, date_diff
 from datetime import date
 
+from rdss_social_work.beneficiary_dedup import DEDUP_FIELDS, find_possible_duplicates
+
 
 class Beneficiary(Document):
 	def before_save(self):
@@ -49,6 +51,29 @@ class Beneficiary(Document):
 				title="Emergency Contact Required",
 				indicator="orange"
 			)
+		
+		self.check_possible_duplicates()
+	
+	def check_possible_duplicates(self):
+		"""Warn when this beneficiary looks like one already registered"""
+		if frappe.flags.in_import or frappe.flags.in_migrate or self.flags.ignore_duplicate_check:
+			return
+		
+		# Nothing that identifies the beneficiary changed since the last save
+		if not self.is_new() and not any(self.has_value_changed(field) for field in DEDUP_FIELDS):
+			return
+		
+		duplicates = find_possible_duplicates(self)
+		if duplicates:
+			links = ", ".join(
+				f"{frappe.utils.get_link_to_form('Beneficiary', match['name'], match['beneficiary_name'])} ({match['score']:.0%} match)"
+				for match in duplicates
+			)
+			frappe.msgprint(
+				f"This beneficiary may already be registered: {links}",
+				title="Possible Duplicate",
+				indicator="orange"
+			)
 	
 	def calculate_age(self, birth_date):
 		"""Calculate age from date of birth"""
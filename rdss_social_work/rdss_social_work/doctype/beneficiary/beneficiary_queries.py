@@ -4,14 +4,25 @@ Server-side query methods for Beneficiary DocType
 Bypasses client-side field permission issues
 """
 
+import json
+
 import frappe
+from frappe import _
+from frappe.model import default_fields
+
+from rdss_social_work.beneficiary_summary_cache import get_or_compute
 
 @frappe.whitelist()
 def get_beneficiary_cases(beneficiary_name):
     """Get cases for a beneficiary"""
+    # Cases are linked to the beneficiary's family, not to the beneficiary
+    family = frappe.db.get_value('Beneficiary', beneficiary_name, 'beneficiary_family')
+    if not family:
+        return []
+
     return frappe.get_list(
         'Case',
-        filters={'beneficiary': beneficiary_name},
+        filters={'beneficiary_family': family},
         fields=['name', 'case_title', 'case_status', 'case_priority', 'case_opened_date', 'primary_social_worker'],
         order_by='case_opened_date desc'
     )
@@ -19,10 +30,14 @@ def get_beneficiary_cases(beneficiary_name):
 @frappe.whitelist()
 def get_beneficiary_closed_cases(beneficiary_name):
     """Get closed cases for a beneficiary"""
+    family = frappe.db.get_value('Beneficiary', beneficiary_name, 'beneficiary_family')
+    if not family:
+        return []
+
     return frappe.get_list(
         'Case',
         filters={
-            'beneficiary': beneficiary_name,
+            'beneficiary_family': family,
             'case_status': ['in', ['Closed', 'Completed']]
         },
         fields=['name', 'case_title', 'case_status', 'case_opened_date', 'actual_closure_date', 'primary_social_worker'],
@@ -138,3 +153,216 @@ def get_beneficiary_family_info(beneficiary_name):
     except Exception as e:
         frappe.log_error(f"Error getting family info for {beneficiary_name}: {str(e)}", "Family Info Error")
         return {'family': None, 'family_members': []}
+
+# Panels of the Beneficiary form overview. `filters` receives the beneficiary
+# (name, beneficiary_name, beneficiary_family) and returns None when the panel
+# has nothing to link on; `order_by` is (field, descending).
+OVERVIEW_PANELS = {
+    'cases': {
+        'doctype': 'Case',
+        'fields': ['name', 'case_title', 'case_status', 'case_priority', 'case_opened_date', 'primary_social_worker'],
+        'filters': lambda b: {'beneficiary_family': b.beneficiary_family} if b.beneficiary_family else None,
+        'order_by': ('case_opened_date', True),
+    },
+    'closed_cases': {
+        'doctype': 'Case',
+        'fields': ['name', 'case_title', 'case_status', 'case_opened_date', 'actual_closure_date', 'primary_social_worker'],
+        'filters': lambda b: {
+            'beneficiary_family': b.beneficiary_family,
+            'case_status': ['in', ['Closed', 'Completed']]
+        } if b.beneficiary_family else None,
+        'order_by': ('actual_closure_date', True),
+        'limit': 10,
+    },
+    'upcoming_appointments': {
+        'doctype': 'Appointment',
+        'fields': ['name', 'appointment_date', 'appointment_time', 'appointment_type', 'appointment_status', 'social_worker', 'case'],
+        'filters': lambda b: {'beneficiary': b.name, 'appointment_date': ['>=', frappe.utils.today()]},
+        'order_by': ('appointment_date', False),
+        'limit': 20,
+    },
+    'appointment_history': {
+        'doctype': 'Appointment',
+        'fields': ['name', 'appointment_date', 'appointment_time', 'appointment_type', 'appointment_status', 'social_worker', 'case'],
+        'filters': lambda b: {'beneficiary': b.name, 'appointment_date': ['<', frappe.utils.today()]},
+        'order_by': ('appointment_date', True),
+        'limit': 20,
+    },
+    'initial_assessments': {
+        'doctype': 'Initial Assessment',
+        'fields': ['name', 'assessment_date', 'assessed_by', 'case_no'],
+        # Older assessments only carry the client's name
+        'or_filters': lambda b: [['beneficiary', '=', b.name], ['client_name', '=', b.beneficiary_name]],
+        'order_by': ('assessment_date', True),
+    },
+    'follow_up_assessments': {
+        'doctype': 'Follow Up Assessment',
+        'fields': ['name', 'assessment_date', 'assessed_by', 'assessment_type', 'case'],
+        'filters': lambda b: {'beneficiary': b.name},
+        'order_by': ('assessment_date', True),
+    },
+    'service_plans': {
+        'doctype': 'Service Plan',
+        'fields': ['name', 'plan_title', 'effective_date', 'expiry_date', 'plan_status', 'primary_social_worker'],
+        'filters': lambda b: {'beneficiary': b.name},
+        'order_by': ('effective_date', True),
+    },
+    'documents': {
+        'doctype': 'Document Attachment',
+        'fields': ['name', 'document_title', 'document_type', 'upload_date', 'uploaded_by'],
+        'filters': lambda b: {'beneficiary': b.name},
+        'order_by': ('upload_date', True),
+        'limit': 50,
+    },
+    'family': {
+        'doctype': 'Beneficiary Family',
+        'fields': [
+            'name', 'family_name', 'family_head', 'family_status', 'registration_date',
+            'primary_address_line_1', 'primary_postal_code', 'primary_mobile_number', 'primary_email_address',
+            'emergency_contact_1_name', 'emergency_contact_1_relationship', 'emergency_contact_1_phone'
+        ],
+        'filters': lambda b: {'name': b.beneficiary_family} if b.beneficiary_family else None,
+        'order_by': ('name', False),
+    },
+    'family_members': {
+        'doctype': 'Beneficiary',
+        'fields': ['name', 'beneficiary_name', 'family_relationship', 'age', 'gender', 'current_status', 'primary_diagnosis'],
+        'filters': lambda b: {'beneficiary_family': b.beneficiary_family} if b.beneficiary_family else None,
+        'order_by': ('family_relationship', False),
+    },
+}
+
+
+def get_panel_fields(panel, requested=None):
+    """
+    Fields to fetch for a panel: the requested projection or the panel's defaults
+
+    The name and the sort field are always included.
+    """
+    definition = OVERVIEW_PANELS[panel]
+    if not requested:
+        return list(definition['fields'])
+
+    meta = frappe.get_meta(definition['doctype'])
+    unknown = [field for field in requested if field not in default_fields and not meta.has_field(field)]
+    if unknown:
+        frappe.throw(_('Unknown fields for {0}: {1}').format(definition['doctype'], ', '.join(unknown)))
+
+    fields = ['name', definition['order_by'][0]]
+    return fields + [field for field in requested if field not in fields]
+
+
+def get_panel_query(panel, beneficiary, fields=None):
+    """get_list arguments of a panel, or None when it cannot have rows"""
+    definition = OVERVIEW_PANELS[panel]
+    if not frappe.has_permission(definition['doctype'], 'read'):
+        return None
+
+    query = {
+        'doctype': definition['doctype'],
+        'fields': get_panel_fields(panel, fields),
+        'order_by': '{0} {1}'.format(definition['order_by'][0], 'desc' if definition['order_by'][1] else 'asc'),
+    }
+    if 'or_filters' in definition:
+        query['or_filters'] = definition['or_filters'](beneficiary)
+    else:
+        query['filters'] = definition['filters'](beneficiary)
+        if query['filters'] is None:
+            return None
+    if definition.get('limit'):
+        query['limit'] = definition['limit']
+    return query
+
+
+def sort_panel_rows(panel, rows):
+    """Restore a panel's order after the UNION, with NULLs where the database puts them"""
+    field, descending = OVERVIEW_PANELS[panel]['order_by']
+    return sorted(rows, key=lambda row: (row.get(field) is not None, str(row.get(field) or '')), reverse=descending)
+
+
+def run_overview_queries(queries):
+    """
+    Rows of every panel query with one database round trip
+
+    Each panel's get_list query (with its permission conditions) becomes a
+    derived table whose rows are packed into JSON, and the panels are
+    combined with UNION ALL. Databases without JSON_OBJECT run the queries
+    one after another instead.
+    """
+    rows = {panel: [] for panel in queries}
+    if not queries:
+        return rows
+
+    if frappe.db.db_type != 'mariadb':
+        for panel, query in queries.items():
+            rows[panel] = frappe.get_list(query.pop('doctype'), **query)
+        return rows
+
+    selects = []
+    for panel, query in queries.items():
+        subquery = frappe.get_list(query.pop('doctype'), run=False, **query)
+        columns = ', '.join('{0}, t.`{1}`'.format(frappe.db.escape(field), field) for field in query['fields'])
+        selects.append('SELECT {0} AS panel, JSON_OBJECT({1}) AS row_json FROM ({2}) t'.format(
+            frappe.db.escape(panel), columns, subquery
+        ))
+
+    for panel, row_json in frappe.db.sql(' UNION ALL '.join(selects)):
+        rows[panel].append(frappe._dict(json.loads(row_json)))
+
+    # JSON_OBJECT renders TIME(6) / DATETIME(6) with microseconds; match what get_list returns
+    for panel, query in queries.items():
+        meta = frappe.get_meta(OVERVIEW_PANELS[panel]['doctype'])
+        timed = [field for field in query['fields'] if field in ('creation', 'modified')
+                 or (meta.get_field(field) and meta.get_field(field).fieldtype in ('Time', 'Datetime'))]
+        for row in rows[panel]:
+            for field in timed:
+                if isinstance(row.get(field), str) and row[field].endswith('.000000'):
+                    row[field] = row[field][:-7]
+
+    return {panel: sort_panel_rows(panel, panel_rows) for panel, panel_rows in rows.items()}
+
+
+@frappe.whitelist()
+def get_beneficiary_overview(beneficiary, panels=None, fields=None):
+    """
+    Everything the Beneficiary form shows about related records, in one call
+
+    Args:
+        beneficiary (str): Beneficiary name
+        panels (list, optional): Panels to return (keys of OVERVIEW_PANELS); all by default
+        fields (dict, optional): {panel: [fields]} projection; panels not listed
+            return their default fields
+
+    Returns:
+        dict: {panel: rows}; "family" is the family record or None. Panels
+            the user cannot read come back empty. Served from the summary
+            cache until a related record changes.
+    """
+    panels = frappe.parse_json(panels) if panels else list(OVERVIEW_PANELS)
+    fields = frappe.parse_json(fields) if fields else {}
+
+    unknown = [panel for panel in panels if panel not in OVERVIEW_PANELS]
+    if unknown:
+        frappe.throw(_('Unknown overview panels: {0}').format(', '.join(unknown)))
+
+    frappe.has_permission('Beneficiary', 'read', beneficiary, throw=True)
+    record = frappe.db.get_value(
+        'Beneficiary', beneficiary, ['name', 'beneficiary_name', 'beneficiary_family'], as_dict=True
+    )
+
+    return get_or_compute(record, [panels, fields], lambda: build_overview(record, panels, fields))
+
+
+def build_overview(record, panels, fields):
+    """Query every requested panel of a beneficiary's overview"""
+    queries = {}
+    for panel in panels:
+        query = get_panel_query(panel, record, fields.get(panel))
+        if query:
+            queries[panel] = query
+
+    rows = run_overview_queries(queries)
+    overview = {panel: rows.get(panel, []) for panel in panels}
+    if 'family' in overview:
+        overview['family'] = overview['family'][0] if overview['family'] else None
+    return overview
@@ -1,11 +1,8 @@
 frappe.ui.form.on('Beneficiary Family', {
     refresh: function(frm) {
-        // Load all tab data
+        // Load all tab data in one request
         if (!frm.is_new()) {
-            load_family_members(frm);
-            load_family_cases(frm);
-            load_family_appointments(frm);
-            load_family_case_notes(frm);
+            load_family_overview(frm, 0);
         }
     },
     
@@ -13,41 +10,54 @@ frappe.ui.form.on('Beneficiary Family', {
         // Initialize HTML containers for tabs
         initialize_family_tab_containers(frm);
         
-        // Force refresh on tab change to ensure content loads correctly
+        // Re-render from the loaded overview when a tab is shown
         $('.form-tabs .nav-link').on('shown.bs.tab', function(e) {
-            if (!frm.is_new()) {
-                const tab = $(e.target).attr('data-target');
-                if (tab === '#case-management') {
-                    load_family_cases(frm);
-                } else if (tab === '#appointments') {
-                    load_family_appointments(frm);
-                } else if (tab === '#case-notes') {
-                    load_family_case_notes(frm);
-                } else if (tab === '#family-members') {
-                    load_family_members(frm);
-                }
+            if (!frm.is_new() && frm.family_overview) {
+                render_family_overview(frm, frm.family_overview);
             }
         });
     }
 });
 
-function load_family_members(frm) {
+function load_family_overview(frm, start) {
     frappe.call({
-        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary_family.beneficiary_family_queries.get_family_members',
-        args: { family_name: frm.doc.name },
+        method: 'rdss_social_work.rdss_social_work.doctype.beneficiary_family.beneficiary_family_queries.get_family_overview',
+        args: { family_name: frm.doc.name, start: start },
         callback: function(r) {
-            if (r.message && r.message.length > 0) {
-                render_family_members_table(frm, r.message);
+            if (!r.message) {
+                return;
+            }
+            // Later pages only add members; keep the family and cases of the first page
+            if (start > 0 && frm.family_overview) {
+                frm.family_overview.members = frm.family_overview.members.concat(r.message.members);
+                frm.family_overview.has_more = r.message.has_more;
             } else {
-                render_family_members_table(frm, []);
+                frm.family_overview = r.message;
             }
+            render_family_overview(frm, frm.family_overview);
         }
     });
 }
 
-function render_family_members_table(frm, members) {
+function render_family_overview(frm, overview) {
+    // Records of every loaded member in one list, newest first
+    const member_records = function(section, date_field) {
+        let rows = [];
+        overview.members.forEach(function(member) {
+            rows = rows.concat(member[section] || []);
+        });
+        return rows.sort((a, b) => (b[date_field] || '').localeCompare(a[date_field] || ''));
+    };
+
+    render_family_members_table(frm, overview.members, overview.total_members, overview.has_more);
+    render_family_cases_table(frm, overview.cases || []);
+    render_family_appointments_table(frm, member_records('appointments', 'appointment_date'));
+    render_family_case_notes_table(frm, member_records('case_notes', 'visit_date'));
+}
+
+function render_family_members_table(frm, members, total_members, has_more) {
     let html = `<div class="table-responsive">
-        <h5>Family Members (${members.length})</h5>
+        <h5>Family Members (${total_members || members.length})</h5>
         <table class="table table-striped">
             <thead>
                 <tr>
@@ -80,10 +90,17 @@ function render_family_members_table(frm, members) {
     
     html += '</tbody></table></div>';
     
+    if (has_more) {
+        html += `<button class="btn btn-xs btn-default load-more-members">${__('Load More Members')}</button>`;
+    }
+    
     // Insert into family members container
     const $wrapper = frm.fields_dict.family_members_html.$wrapper;
     if ($wrapper) {
         $wrapper.html(html);
+        $wrapper.find('.load-more-members').on('click', function() {
+            load_family_overview(frm, frm.family_overview.members.length);
+        });
     }
 }
 
@@ -125,7 +142,6 @@ function render_family_cases_table(frm, cases) {
                 <tr>
                     <th>Case ID</th>
                     <th>Title</th>
-                    <th>Beneficiary</th>
                     <th>Status</th>
                     <th>Priority</th>
                     <th>Opened Date</th>
@@ -136,13 +152,12 @@ function render_family_cases_table(frm, cases) {
             <tbody>`;
     
     if (cases.length === 0) {
-        html += `<tr><td colspan="8" class="text-center text-muted">No cases found for this family</td></tr>`;
+        html += `<tr><td colspan="7" class="text-center text-muted">No cases found for this family</td></tr>`;
     } else {
         cases.forEach(function(case_doc) {
             html += `<tr>
                 <td><a href="/app/case/${case_doc.name}">${case_doc.name}</a></td>
                 <td>${case_doc.case_title || ''}</td>
-                <td><a href="/app/beneficiary/${case_doc.beneficiary}">${case_doc.beneficiary}</a></td>
                 <td><span class="indicator ${get_status_color(case_doc.case_status)}">${case_doc.case_status || ''}</span></td>
                 <td><span class="indicator ${get_priority_color(case_doc.case_priority)}">${case_doc.case_priority || ''}</span></td>
                 <td>${case_doc.case_opened_date ? frappe.datetime.str_to_user(case_doc.case_opened_date) : ''}</td>
@@ -207,36 +222,36 @@ function render_family_appointments_table(frm, appointments) {
     }
 }
 
-function render_family_case_notes_table(frm, cases) {
+function render_family_case_notes_table(frm, notes) {
     let html = `<div class="table-responsive">
-        <h5>Family Case Notes (${cases.length})</h5>
+        <h5>Family Case Notes (${notes.length})</h5>
         <table class="table table-striped">
             <thead>
                 <tr>
-                    <th>Case ID</th>
-                    <th>Title</th>
+                    <th>Note ID</th>
+                    <th>Visit Date</th>
+                    <th>Visit Type</th>
                     <th>Beneficiary</th>
-                    <th>Status</th>
-                    <th>Opened Date</th>
+                    <th>Case</th>
                     <th>Social Worker</th>
                     <th>Actions</th>
                 </tr>
             </thead>
             <tbody>`;
     
-    if (cases.length === 0) {
+    if (notes.length === 0) {
         html += `<tr><td colspan="7" class="text-center text-muted">No case notes found for this family</td></tr>`;
     } else {
-        cases.forEach(function(case_doc) {
+        notes.forEach(function(note) {
             html += `<tr>
-                <td><a href="/app/case/${case_doc.name}">${case_doc.name}</a></td>
-                <td>${case_doc.case_title || ''}</td>
-                <td><a href="/app/beneficiary/${case_doc.beneficiary}">${case_doc.beneficiary}</a></td>
-                <td><span class="indicator ${get_status_color(case_doc.case_status)}">${case_doc.case_status || ''}</span></td>
-                <td>${case_doc.case_opened_date ? frappe.datetime.str_to_user(case_doc.case_opened_date) : ''}</td>
-                <td>${case_doc.primary_social_worker || ''}</td>
+                <td><a href="/app/case-notes/${note.name}">${note.name}</a></td>
+                <td>${note.visit_date ? frappe.datetime.str_to_user(note.visit_date) : ''}</td>
+                <td>${note.visit_type || ''}</td>
+                <td><a href="/app/beneficiary/${note.beneficiary}">${note.beneficiary}</a></td>
+                <td>${note.case ? `<a href="/app/case/${note.case}">${note.case}</a>` : ''}</td>
+                <td>${note.social_worker || ''}</td>
                 <td>
-                    <button class="btn btn-xs btn-default" onclick="frappe.set_route('Form', 'Case', '${case_doc.name}')">View</button>
+                    <button class="btn btn-xs btn-default" onclick="frappe.set_route('Form', 'Case Notes', '${note.name}')">View</button>
                 </td>
             </tr>`;
         });
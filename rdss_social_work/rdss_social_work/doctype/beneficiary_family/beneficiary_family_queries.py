@@ -5,6 +5,40 @@ Bypasses client-side field permission issues
 """
 
 import frappe
+from frappe import _
+from frappe.utils import cint
+
+DEFAULT_PAGE_LENGTH = 50
+MAX_PAGE_LENGTH = 500
+
+MEMBER_FIELDS = [
+    'name', 'beneficiary_name', 'family_relationship', 'gender', 'date_of_birth', 'current_status',
+    'mobile_number', 'email_address'
+]
+CASE_FIELDS = ['name', 'case_title', 'case_status', 'case_priority', 'case_opened_date', 'primary_social_worker']
+APPOINTMENT_FIELDS = [
+    'name', 'appointment_date', 'appointment_time', 'appointment_type', 'appointment_status', 'beneficiary',
+    'social_worker'
+]
+CASE_NOTE_FIELDS = ['name', 'visit_date', 'visit_type', 'case', 'beneficiary', 'social_worker']
+
+# Per-member records of the family overview: doctype, fields and order
+MEMBER_RECORDS = {
+    'appointments': ('Appointment', APPOINTMENT_FIELDS, 'appointment_date desc, appointment_time desc'),
+    'initial_assessments': (
+        'Initial Assessment', ['name', 'assessment_date', 'assessed_by', 'case_no', 'beneficiary', 'client_name'],
+        'assessment_date desc'
+    ),
+    'follow_up_assessments': (
+        'Follow Up Assessment', ['name', 'assessment_date', 'assessed_by', 'assessment_type', 'case', 'beneficiary'],
+        'assessment_date desc'
+    ),
+    'documents': (
+        'Document Attachment', ['name', 'document_title', 'document_type', 'upload_date', 'uploaded_by', 'beneficiary'],
+        'upload_date desc'
+    ),
+    'case_notes': ('Case Notes', CASE_NOTE_FIELDS, 'visit_date desc, creation desc'),
+}
 
 @frappe.whitelist()
 def get_family_members(family_name):
@@ -12,29 +46,18 @@ def get_family_members(family_name):
     return frappe.get_list(
         'Beneficiary',
         filters={'beneficiary_family': family_name},
-        fields=['name', 'beneficiary_name', 'gender', 'date_of_birth', 'beneficiary_status', 'mobile_number', 'email_address'],
+        fields=MEMBER_FIELDS,
         order_by='beneficiary_name asc'
     )
 
 @frappe.whitelist()
 def get_family_cases(family_name):
     """Get all cases for family members"""
-    # First get all family members
-    family_members = frappe.get_list(
-        'Beneficiary',
-        filters={'beneficiary_family': family_name},
-        fields=['name'],
-        pluck='name'
-    )
-    
-    if not family_members:
-        return []
-    
-    # Get cases for all family members
+    # Cases are linked to the family itself, not to individual members
     return frappe.get_list(
         'Case',
-        filters={'beneficiary': ['in', family_members]},
-        fields=['name', 'case_title', 'case_status', 'case_priority', 'case_opened_date', 'beneficiary', 'primary_social_worker'],
+        filters={'beneficiary_family': family_name},
+        fields=CASE_FIELDS,
         order_by='case_opened_date desc'
     )
 
@@ -56,7 +79,7 @@ def get_family_appointments(family_name):
     return frappe.get_list(
         'Appointment',
         filters={'beneficiary': ['in', family_members]},
-        fields=['name', 'appointment_date', 'appointment_time', 'appointment_type', 'appointment_status', 'beneficiary', 'assigned_social_worker'],
+        fields=APPOINTMENT_FIELDS,
         order_by='appointment_date desc, appointment_time desc'
     )
 
@@ -74,21 +97,111 @@ def get_family_case_notes(family_name):
     if not family_members:
         return []
     
-    # Get cases for family members first
-    family_cases = frappe.get_list(
-        'Case',
+    # Get case notes for all family members
+    return frappe.get_list(
+        'Case Notes',
         filters={'beneficiary': ['in', family_members]},
-        fields=['name'],
-        pluck='name'
+        fields=CASE_NOTE_FIELDS,
+        order_by='visit_date desc, creation desc'
     )
-    
-    if not family_cases:
+
+def get_permitted_list(doctype, **kwargs):
+    """get_list, or an empty list when the user cannot read the doctype"""
+    if not frappe.has_permission(doctype, 'read'):
         return []
-    
-    # Get case notes for all family cases
-    return frappe.get_list(
-        'Case Note',
-        filters={'case': ['in', family_cases]},
-        fields=['name', 'note_date', 'note_type', 'note_content', 'case', 'created_by'],
-        order_by='note_date desc, creation desc'
+    return frappe.get_list(doctype, **kwargs)
+
+def get_member_records(members):
+    """
+    Records of a page of members, one IN-list query per doctype
+
+    Args:
+        members (list): Member rows with name and beneficiary_name
+
+    Returns:
+        dict: {member name: {section: rows}}
+    """
+    names = [member.name for member in members]
+    records = {name: {section: [] for section in MEMBER_RECORDS} for name in names}
+    by_display_name = {member.beneficiary_name: member.name for member in members}
+
+    for section, (doctype, fields, order_by) in MEMBER_RECORDS.items():
+        kwargs = {'fields': fields, 'order_by': order_by}
+        if doctype == 'Initial Assessment':
+            # Older assessments only carry the client's name
+            kwargs['or_filters'] = [
+                ['beneficiary', 'in', names],
+                ['client_name', 'in', [member.beneficiary_name for member in members]]
+            ]
+        else:
+            kwargs['filters'] = {'beneficiary': ['in', names]}
+
+        for row in get_permitted_list(doctype, **kwargs):
+            owner = row.beneficiary if row.beneficiary in records else by_display_name.get(row.get('client_name'))
+            if owner:
+                records[owner][section].append(row)
+
+    return records
+
+@frappe.whitelist()
+def get_family_overview(family_name, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """
+    Family tree for the Beneficiary Family form: the family, its cases and
+    a page of members, each with their own records
+
+    Members are resolved once and every member doctype is fetched with one
+    IN-list query for the whole page, so the query count does not grow with
+    the family. Large extended families are paged by member; cases belong to
+    the family and come with the first page only.
+
+    Args:
+        family_name (str): Beneficiary Family name
+        start (int): Offset of the first member of the page
+        page_length (int): Members per page (at most 500)
+
+    Returns:
+        dict: {family, cases, members: [member fields + record sections],
+            total_members, start, page_length, has_more}
+    """
+    start = max(cint(start), 0)
+    page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+
+    frappe.has_permission('Beneficiary Family', 'read', family_name, throw=True)
+    family = frappe.db.get_value(
+        'Beneficiary Family', family_name, ['name', 'family_name', 'family_head', 'family_status'], as_dict=True
+    )
+    if not family:
+        frappe.throw(_('Beneficiary Family {0} not found').format(family_name), frappe.DoesNotExistError)
+
+    total_members = frappe.db.count('Beneficiary', {'beneficiary_family': family_name})
+    members = get_permitted_list(
+        'Beneficiary',
+        filters={'beneficiary_family': family_name},
+        fields=MEMBER_FIELDS,
+        order_by='beneficiary_name asc, name asc',
+        limit_start=start,
+        limit_page_length=page_length
     )
+
+    records = get_member_records(members) if members else {}
+    for member in members:
+        member.update(records[member.name])
+
+    cases = []
+    if start == 0:
+        cases = get_permitted_list(
+            'Case',
+            filters={'beneficiary_family': family_name},
+            fields=CASE_FIELDS,
+            order_by='case_opened_date desc'
+        )
+
+    return {
+        'family': family,
+        'cases': cases,
+        'members': members,
+        'total_members': total_members,
+        'start': start,
+        'page_length': page_length,
+        'has_more': start + len(members) < total_members
+    }
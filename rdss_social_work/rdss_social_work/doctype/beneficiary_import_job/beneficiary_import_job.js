@@ -0,0 +1,32 @@
+// Copyright (c) 2026, RDSS and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on('Beneficiary Import Job', {
+    refresh: function(frm) {
+        if (!frm.is_new() && frm.doc.status !== 'Completed') {
+            // Picks up after the last committed chunk
+            frm.add_custom_button(__('Resume Import'), function() {
+                frappe.call({
+                    method: 'rdss_social_work.scripts.beneficiary_import_jobs.resume_import_job',
+                    args: { job_name: frm.doc.name },
+                    callback: function() {
+                        frappe.show_alert({ message: __('Import queued'), indicator: 'blue' });
+                    }
+                });
+            });
+        }
+
+        if (!frm.is_new()) {
+            frm.add_custom_button(__('Error Journal'), function() {
+                frappe.set_route('List', 'Beneficiary Import Log', { import_job: frm.doc.name });
+            });
+        }
+
+        frappe.realtime.off('beneficiary_import_progress');
+        frappe.realtime.on('beneficiary_import_progress', function(data) {
+            if (data.job === frm.doc.name) {
+                frm.reload_doc();
+            }
+        });
+    }
+});
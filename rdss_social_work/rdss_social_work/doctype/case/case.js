@@ -124,94 +124,27 @@ function load_case_assessments(frm) {
 }
 
 function load_case_timeline(frm) {
-    // Create a comprehensive timeline of all case activities
-    let timeline_data = [];
-    
-    // Get appointments
+    // Create a comprehensive timeline of all case activities in one call
     frappe.call({
-        method: 'frappe.client.get_list',
+        method: 'rdss_social_work.case_metrics.get_timeline',
         args: {
-            doctype: 'Appointment',
-            filters: {
-                case: frm.doc.name
-            },
-            fields: ['name', 'appointment_date', 'appointment_type', 'appointment_status', 'appointment_outcome'],
-            order_by: 'appointment_date desc'
+            case: frm.doc.name
         },
         callback: function(r) {
-            if (r.message) {
-                r.message.forEach(function(apt) {
-                    timeline_data.push({
-                        date: apt.appointment_date,
-                        type: 'Appointment',
-                        title: `${apt.appointment_type} Appointment`,
-                        status: apt.appointment_status || apt.appointment_outcome,
-                        link: `/app/appointment/${apt.name}`,
-                        id: apt.name
-                    });
-                });
-            }
-            
-            // Get assessments and render timeline
-            get_assessments_for_timeline(frm, timeline_data);
-        }
-    });
-}
-
-function get_assessments_for_timeline(frm, timeline_data) {
-    frappe.call({
-        method: 'frappe.client.get_list',
-        args: {
-            doctype: 'Initial Assessment',
-            filters: {
-                case_no: frm.doc.name
-            },
-            fields: ['name', 'assessment_date'],
-            order_by: 'assessment_date desc'
-        },
-        callback: function(r) {
-            if (r.message) {
-                r.message.forEach(function(assessment) {
-                    timeline_data.push({
-                        date: assessment.assessment_date,
-                        type: 'Assessment',
-                        title: 'Initial Assessment',
-                        status: 'Completed',
-                        link: `/app/initial-assessment/${assessment.name}`,
-                        id: assessment.name
-                    });
-                });
-            }
-            
-            frappe.call({
-                method: 'frappe.client.get_list',
-                args: {
-                    doctype: 'Follow Up Assessment',
-                    filters: {
-                        case: frm.doc.name
-                    },
-                    fields: ['name', 'assessment_date', 'assessment_type'],
-                    order_by: 'assessment_date desc'
-                },
-                callback: function(r2) {
-                    if (r2.message) {
-                        r2.message.forEach(function(assessment) {
-                            timeline_data.push({
-                                date: assessment.assessment_date,
-                                type: 'Assessment',
-                                title: `${assessment.assessment_type} Assessment`,
-                                status: 'Completed',
-                                link: `/app/follow-up-assessment/${assessment.name}`,
-                                id: assessment.name
-                            });
-                        });
-                    }
-                    
-                    // Sort timeline by date and render
-                    timeline_data.sort((a, b) => new Date(b.date) - new Date(a.date));
-                    render_case_timeline(frm, timeline_data);
-                }
+            // The server merges the activity streams oldest first; show newest first
+            let timeline_data = (r.message || []).reverse().map(function(item) {
+                return {
+                    date: item.date,
+                    type: frappe.unscrub(item.type),
+                    title: item.activity,
+                    status: item.status,
+                    link: item.reference
+                        ? frappe.utils.get_form_link(item.reference_doctype, item.reference)
+                        : frappe.utils.get_form_link('Case', frm.doc.name),
+                    id: item.reference || frm.doc.name
+                };
             });
+            render_case_timeline(frm, timeline_data);
         }
     });
 }
@@ -369,6 +302,9 @@ function render_case_timeline(frm, timeline_data) {
         }
         .timeline-marker.appointment { background-color: #007bff; }
         .timeline-marker.assessment { background-color: #28a745; }
+        .timeline-marker.case_note { background-color: #17a2b8; }
+        .timeline-marker.referral { background-color: #fd7e14; }
+        .timeline-marker.case_event { background-color: #6c757d; }
         .timeline-content { background: #f8f9fa; padding: 10px; border-radius: 4px; }
         .timeline-date { font-size: 12px; color: #6c757d; }
         .timeline-title { font-weight: bold; margin: 5px 0; }
@@ -379,7 +315,7 @@ function render_case_timeline(frm, timeline_data) {
 }
 
 function get_timeline_color(type) {
-    return type.toLowerCase();
+    return frappe.scrub(type);
 }
 
 function get_status_badge_color(status) {
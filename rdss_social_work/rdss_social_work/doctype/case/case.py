@@ -6,6 +6,9 @@ from frappe.model.document import Document
 from frappe.utils import getdate, date_diff, today
 from datetime import date
 
+from rdss_social_work.case_metrics import get_case_timeline, update_case_metrics
+from rdss_social_work.case_side_effects import queue_case_side_effects
+
 
 class Case(Document):
 	def get_indicator(self):
@@ -88,40 +91,14 @@ class Case(Document):
 	
 	def on_update(self):
 		"""Actions to perform after updating case"""
-		# Update case metrics
-		self.update_case_metrics()
-		
-		# Update beneficiary family's last activity
-		if self.beneficiary_family:
-			family_doc = frappe.get_doc("Beneficiary Family", self.beneficiary_family)
-			family_doc.add_comment('Info', f'Case updated: {self.case_title}')
-		
-		# Send notifications for status changes
-		if self.has_value_changed('case_status'):
-			self.send_status_change_notification()
-		
-		# Send notifications for priority changes
-		if self.has_value_changed('priority_level'):
-			self.send_priority_change_notification()
+		# Metrics, the family's activity comment and status / priority
+		# notifications run once per case in a job after the save commits
+		queue_case_side_effects(self)
 	
 	def update_case_metrics(self):
 		"""Update case metrics based on related records"""
-		# Count assessments for all family members
-		if self.beneficiary_family:
-			family_members = frappe.get_all('Beneficiary', 
-				filters={'beneficiary_family': self.beneficiary_family},
-				fields=['beneficiary_name']
-			)
-			total_assessments = 0
-			for member in family_members:
-				assessments = frappe.db.count('Initial Assessment', {
-					'client_name': member.beneficiary_name
-				})
-				total_assessments += assessments
-			self.db_set('total_assessments', total_assessments, update_modified=False)
-		
-		# Update last activity date
-		self.db_set('last_activity_date', today(), update_modified=False)
+		# One query for all totals, one UPDATE for all fields
+		update_case_metrics(self)
 	
 	def send_status_change_notification(self):
 		"""Send notification when case status changes"""
@@ -177,52 +154,7 @@ class Case(Document):
 	
 	def get_case_timeline(self):
 		"""Get chronological timeline of case activities"""
-		timeline = []
-		
-		# Add case creation
-		timeline.append({
-			'date': self.case_opened_date,
-			'activity': 'Case Opened',
-			'details': f'Case opened by {self.primary_social_worker}',
-			'type': 'case_event'
-		})
-		
-		# Add assessments for all family members
-		assessments = []
-		if self.beneficiary_family:
-			family_members = frappe.get_all('Beneficiary', 
-				filters={'beneficiary_family': self.beneficiary_family},
-				fields=['beneficiary_name']
-			)
-			for member in family_members:
-				member_assessments = frappe.get_all('Initial Assessment',
-					filters={'client_name': member.beneficiary_name},
-					fields=['name', 'assessment_date', 'assessed_by'],
-					order_by='assessment_date'
-				)
-				assessments.extend(member_assessments)
-		
-		for assessment in assessments:
-			timeline.append({
-				'date': assessment.assessment_date,
-				'activity': 'Assessment Completed',
-				'details': f'Initial Assessment by {assessment.assessed_by}',
-				'type': 'assessment',
-				'reference': assessment.name
-			})
-		
-		# Add closure if applicable
-		if self.case_status == "Closed" and self.actual_closure_date:
-			timeline.append({
-				'date': self.actual_closure_date,
-				'activity': 'Case Closed',
-				'details': f'Closed by {self.closed_by} - Reason: {self.closure_reason}',
-				'type': 'case_event'
-			})
-		
-		# Sort by date
-		timeline.sort(key=lambda x: x['date'])
-		return timeline
+		return get_case_timeline(self)
 	
 	def get_overdue_reviews(self):
 		"""Check if case review is overdue"""
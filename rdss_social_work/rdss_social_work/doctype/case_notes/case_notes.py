@@ -99,13 +99,12 @@ class CaseNotes(Document):
 		"""Actions to perform after updating case notes"""
 		# Update case's last contact date
 		if self.case:
-			case_doc = frappe.get_doc("Case", self.case)
-			case_doc.db_set('last_contact_date', self.visit_date, update_modified=False)
-			case_doc.db_set('last_activity_date', today(), update_modified=False)
-			
-			# Update case metrics
-			total_visits = frappe.db.count('Case Notes', {'case': self.case})
-			case_doc.db_set('total_visits', total_visits, update_modified=False)
+			frappe.db.set_value("Case", self.case, {
+				'last_contact_date': self.visit_date,
+				'last_activity_date': today(),
+				# Update case metrics
+				'total_visits': frappe.db.count('Case Notes', {'case': self.case}),
+			}, update_modified=False)
 			
 		# Update related appointment if exists
 		if self.related_appointment:
@@ -0,0 +1,21 @@
+# Copyright (c) 2025, RDSS and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+from rdss_social_work.geocode_cache import evict, extract_coordinates
+
+
+class GeocodeCache(Document):
+	def validate(self):
+		"""Keep the numeric coordinates in step with the stored GeoJSON"""
+		self.latitude, self.longitude = extract_coordinates(self.geolocation)
+
+	def on_update(self):
+		"""Drop the stale copy from this worker's in-process LRU"""
+		evict(self.name)
+
+	def on_trash(self):
+		"""Deleting an entry forces the next lookup back to the API"""
+		evict(self.name)
@@ -0,0 +1,451 @@
+"""
+Batched Google Calendar operations for mass invites, updates and deletions
+
+The mass actions on the Event list used to make one Calendar API call per
+event. They now run as a background job that:
+
+    * loads the selected events with one query and validates them up front
+    * groups the Calendar operations into batch requests of up to 50
+      operations each (the Google API batch endpoint, one HTTP round trip
+      per batch)
+    * sends at most `concurrency` batches at a time, each worker thread with
+      its own HTTP connection
+    * retries operations answered with 429, 5xx or a rate-limit 403 with
+      exponential backoff and jitter, whether the error came back for a
+      single operation or for the whole batch
+    * reports progress over realtime as batches complete, and stores a
+      per-event result map that the Event list can poll
+
+Worker threads only make HTTP requests; all database access stays on the
+job's own thread.
+
+Site config:
+    google_calendar_api_root (str): Google APIs root URL, e.g. a local fake Calendar server
+    google_calendar_batch_concurrency (int): Batches in flight at once (default 4)
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import frappe
+import httplib2
+from frappe.utils import cint
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+
+from rdss_social_work.db_utils import bulk_update_column
+from .oauth_service import GoogleOAuthService, build_event_body, get_calendar_api_root
+
+# Google accepts up to 1000 calls per batch but recommends 50 for Calendar
+BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 32.0
+HTTP_TIMEOUT_SECONDS = 60
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+OPERATIONS = ('insert', 'update', 'delete')
+RESULT_CACHE_SECONDS = 3600
+
+PROGRESS_EVENT = 'calendar_batch_progress'
+COMPLETE_EVENT = 'calendar_batch_complete'
+
+
+def get_batch_uri():
+    return get_calendar_api_root() + 'batch/calendar/v3'
+
+
+def get_http_factory(credentials):
+    """Factory for authorized HTTP connections, one per worker thread"""
+    return lambda: AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+
+
+def is_retryable(status, content=None):
+    """True for rate limiting and transient server errors"""
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403 and content:
+        text = content.decode('utf-8', 'replace') if isinstance(content, bytes) else str(content)
+        return any(reason in text for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with jitter for the given retry attempt (1-based)"""
+    delay = min(MAX_BACKOFF_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+    delay *= random.uniform(0.5, 1.0)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+class CalendarBatchRunner:
+    """
+    Execute many Calendar operations through the batch endpoint
+
+    Operations are given as {key: (method, kwargs)} for service.events(),
+    e.g. {'EV-0001': ('insert', {'calendarId': 'primary', 'body': {...}})}.
+    """
+
+    def __init__(self, service, http_factory, batch_uri, batch_size=BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                 max_attempts=MAX_ATTEMPTS, on_progress=None, sleep=time.sleep):
+        self.service = service
+        self.http_factory = http_factory
+        self.batch_uri = batch_uri
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.on_progress = on_progress
+        self.sleep = sleep
+        self.local = threading.local()
+        self.http_requests = 0
+        self.lock = threading.Lock()
+
+    def _http(self):
+        # httplib2 connections are not thread-safe: one per worker thread
+        if not hasattr(self.local, 'http'):
+            self.local.http = self.http_factory()
+        return self.local.http
+
+    def _execute_batch(self, keys, operations):
+        """
+        Send one batch request
+
+        Returns:
+            dict: {key: (status, response, error, retryable, retry_after)}
+        """
+        outcome = {}
+
+        def callback(request_id, response, exception):
+            key = keys[int(request_id)]
+            if exception is None:
+                outcome[key] = (200, response, None, False, None)
+            elif isinstance(exception, HttpError):
+                status = exception.resp.status
+                outcome[key] = (
+                    status, None, str(exception), is_retryable(status, exception.content),
+                    exception.resp.get('retry-after'),
+                )
+            else:
+                outcome[key] = (None, None, str(exception), True, None)
+
+        batch = BatchHttpRequest(callback=callback, batch_uri=self.batch_uri)
+        events = self.service.events()
+        for position, key in enumerate(keys):
+            method, kwargs = operations[key]
+            # Positions, not keys, become Content-IDs: event names need not be header-safe
+            batch.add(getattr(events, method)(**kwargs), request_id=str(position))
+
+        try:
+            with self.lock:
+                self.http_requests += 1
+            batch.execute(http=self._http())
+        except HttpError as e:
+            # The batch itself was rejected: every operation in it shares the outcome
+            status = e.resp.status
+            retryable = is_retryable(status, e.content)
+            return {key: (status, None, str(e), retryable, e.resp.get('retry-after')) for key in keys}
+        except Exception as e:
+            # Connection errors and timeouts
+            return {key: (None, None, str(e), True, None) for key in keys}
+
+        for key in keys:
+            outcome.setdefault(key, (None, None, 'No response for operation in batch', True, None))
+        return outcome
+
+    def run(self, operations):
+        """
+        Execute all operations, retrying transient failures
+
+        Args:
+            operations (dict): {key: (method, kwargs)}
+
+        Returns:
+            dict: {key: {'ok', 'status', 'response', 'error', 'attempts'}}
+        """
+        results = {}
+        pending = list(operations)
+        total = len(pending)
+        attempt = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while pending and attempt < self.max_attempts:
+                attempt += 1
+                retry = []
+                retry_after = None
+
+                chunks = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+                futures = [pool.submit(self._execute_batch, chunk, operations) for chunk in chunks]
+
+                for future in as_completed(futures):
+                    for key, (status, response, error, retryable, after) in future.result().items():
+                        if retryable and attempt < self.max_attempts:
+                            retry.append(key)
+                            retry_after = after or retry_after
+                            continue
+                        results[key] = {
+                            'ok': error is None,
+                            'status': status,
+                            'response': response,
+                            'error': error,
+                            'attempts': attempt,
+                        }
+
+                    if self.on_progress:
+                        self.on_progress(len(results), total)
+
+                pending = retry
+                if pending:
+                    self.sleep(backoff_delay(attempt, retry_after))
+
+        return results
+
+
+def get_event_rows(event_names):
+    """Selected events with the fields the Calendar operations need, in one query"""
+    fields = [
+        'name', 'subject', 'description', 'starts_on', 'ends_on', 'all_day', 'modified',
+        'custom_google_calendar_event_id', 'custom_google_calendar_attendees',
+    ]
+    if frappe.get_meta('Event').has_field('location'):
+        fields.append('location')
+
+    return {row.name: row for row in frappe.get_all('Event', filters={'name': ['in', event_names]}, fields=fields)}
+
+
+def get_attendees(row):
+    return [email.strip() for email in (row.custom_google_calendar_attendees or '').split(',') if email.strip()]
+
+
+def validate_event(operation, row):
+    """Reason an event cannot be processed, or None"""
+    if row is None:
+        return 'Event not found'
+
+    google_event_id = row.custom_google_calendar_event_id
+    if operation == 'insert' and google_event_id:
+        return 'Event already has a Google Calendar event'
+    if operation == 'update' and not google_event_id:
+        return 'No Google Calendar event found for this ERPNext event'
+    if operation == 'delete':
+        return None
+
+    if not row.subject:
+        return 'Event subject is required'
+    if not row.starts_on:
+        return 'Event start time is required'
+    # All-day events are sent as dates; their end may be missing or equal to the start
+    if not cint(row.all_day):
+        if not row.ends_on:
+            return 'Event end time is required'
+        if row.ends_on <= row.starts_on:
+            return 'Event end time must be after start time'
+    if not get_attendees(row):
+        return 'No attendees specified in Google Calendar Attendees field'
+    return None
+
+
+def build_operation(operation, row):
+    """(method, kwargs) for service.events()"""
+    if operation == 'delete':
+        return 'delete', {'calendarId': 'primary', 'eventId': row.custom_google_calendar_event_id, 'sendUpdates': 'all'}
+
+    body = build_event_body({
+        'subject': row.subject,
+        'description': row.description,
+        'starts_on': row.starts_on,
+        'ends_on': row.ends_on,
+        'all_day': row.all_day,
+        'location': row.get('location'),
+        'attendees': ','.join(get_attendees(row)),
+    })
+    if operation == 'insert':
+        return 'insert', {'calendarId': 'primary', 'body': body, 'sendUpdates': 'all'}
+    return 'update', {
+        'calendarId': 'primary', 'eventId': row.custom_google_calendar_event_id, 'body': body, 'sendUpdates': 'all',
+    }
+
+
+def get_result_key(job_id):
+    return f'calendar_batch_result::{job_id}'
+
+
+def set_result(job_id, value, owner):
+    """Cache a job's progress or result, with the user who started it"""
+    frappe.cache().set_value(get_result_key(job_id), dict(value, owner=owner), expires_in_sec=RESULT_CACHE_SECONDS)
+
+
+def enqueue_mass_calendar_operation(operation, event_names):
+    """
+    Start a mass Calendar operation as a background job
+
+    Returns:
+        dict: {'status': 'queued', 'job_id', 'message'} or an auth_required response
+    """
+    if isinstance(event_names, str):
+        event_names = frappe.parse_json(event_names)
+
+    if not event_names or not isinstance(event_names, list):
+        frappe.throw("No events selected")
+
+    oauth_service = GoogleOAuthService()
+    if not oauth_service.is_authenticated():
+        return {
+            'status': 'auth_required',
+            'message': 'Google authorization required',
+            'auth_url': oauth_service.get_authorization_url()
+        }
+
+    job_id = f'calendar_batch::{operation}::{frappe.generate_hash(length=10)}'
+    set_result(job_id, {'status': 'queued', 'done': 0, 'total': len(event_names)}, frappe.session.user)
+    frappe.enqueue(
+        'rdss_social_work.rdss_social_work.google_calendar.batch_operations.run_mass_calendar_operation',
+        queue='long',
+        job_id=job_id,
+        operation=operation,
+        event_names=event_names,
+        result_job_id=job_id,
+        user=frappe.session.user,
+    )
+
+    return {
+        'status': 'queued',
+        'job_id': job_id,
+        'message': f'Processing {len(event_names)} events in the background'
+    }
+
+
+def run_mass_calendar_operation(operation, event_names, result_job_id, user=None):
+    """
+    Background job: run one Calendar operation for many events through batch requests
+
+    Args:
+        operation (str): 'insert', 'update' or 'delete'
+        event_names (list): Event names
+        result_job_id (str): Key for progress and result reporting
+        user (str, optional): User receiving realtime progress
+    """
+    if operation not in OPERATIONS:
+        frappe.throw(f"Unknown calendar operation: {operation}")
+
+    user = user or frappe.session.user
+    events = {}
+    try:
+        rows = get_event_rows(event_names)
+        operations = {}
+        for name in event_names:
+            row = rows.get(name)
+            reason = validate_event(operation, row)
+            if reason:
+                events[name] = {'status': 'failed', 'reason': reason}
+            elif operation == 'delete' and not row.custom_google_calendar_event_id:
+                events[name] = {'status': 'skipped', 'reason': 'No Google Calendar event to delete'}
+            else:
+                operations[name] = build_operation(operation, row)
+
+        oauth_service = GoogleOAuthService()
+        if operations and not oauth_service.is_authenticated():
+            frappe.throw("Google OAuth authentication required")
+
+        def on_progress(done, total):
+            progress = {'job_id': result_job_id, 'operation': operation, 'done': done, 'total': total}
+            set_result(result_job_id, dict(progress, status='running'), user)
+            frappe.publish_realtime(PROGRESS_EVENT, progress, user=user)
+
+        if operations:
+            runner = CalendarBatchRunner(
+                oauth_service.calendar_service,
+                get_http_factory(oauth_service.credentials),
+                get_batch_uri(),
+                concurrency=frappe.conf.get('google_calendar_batch_concurrency') or DEFAULT_CONCURRENCY,
+                on_progress=on_progress,
+            )
+            outcomes = runner.run(operations)
+        else:
+            outcomes = {}
+
+        google_event_ids, synced = {}, {}
+        for name, outcome in outcomes.items():
+            row = rows[name]
+            # Deleting an event that is already gone leaves the calendar in the wanted state
+            gone = operation == 'delete' and outcome['status'] in (404, 410)
+            if outcome['ok'] or gone:
+                events[name] = {'status': 'success', 'attendees': len(get_attendees(row))}
+                # Marks the Event as in sync for calendar_sync (modified is not touched below)
+                synced[name] = row.modified
+                if operation == 'insert':
+                    google_event_ids[name] = outcome['response'].get('id')
+                    events[name]['google_event_id'] = google_event_ids[name]
+                elif operation == 'delete':
+                    google_event_ids[name] = None
+            else:
+                events[name] = {
+                    'status': 'failed',
+                    'reason': (outcome['error'] or 'Unknown error')[:80],
+                    'google_event_id': row.custom_google_calendar_event_id,
+                }
+                frappe.log_error(
+                    message=f"Mass OAuth {operation} failed for {name} after {outcome['attempts']} attempts: {outcome['error']}",
+                    title=f"Calendar Batch Error - {name}"
+                )
+
+        bulk_update_column('Event', 'custom_google_calendar_event_id', google_event_ids)
+        bulk_update_column('Event', 'custom_google_calendar_synced_on', synced)
+        frappe.db.commit()
+        result = summarize(operation, events)
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(title=f"Calendar batch {operation} failed")
+        result = {'status': 'error', 'message': f'Calendar batch failed: {str(e)[:80]}', 'results': {}, 'events': events}
+
+    result['job_id'] = result_job_id
+    set_result(result_job_id, result, user)
+    frappe.publish_realtime(COMPLETE_EVENT, result, user=user)
+    return result
+
+
+def summarize(operation, events):
+    """Response in the shape the Event list expects, plus the per-event result map"""
+    results = {'success': [], 'skipped': [], 'failed': []}
+    for name, event in events.items():
+        results[event['status']].append(dict(event, name=name))
+
+    done, failed = {
+        'insert': ('Calendar invites sent', 'Failed to send calendar invites'),
+        'update': ('Calendar events updated', 'Failed to update calendar events'),
+        'delete': ('Calendar events deleted', 'Failed to delete calendar events'),
+    }[operation]
+    success_count = len(results['success'])
+    skipped_count = len(results['skipped'])
+    total_count = len(events)
+    skipped_note = f' ({skipped_count} skipped)' if skipped_count else ''
+
+    if success_count + skipped_count == total_count:
+        status, message = 'success', f'{done} for all {success_count} events{skipped_note}'
+    elif success_count:
+        status, message = 'partial_success', f'{done} for {success_count} out of {total_count} events{skipped_note}'
+    else:
+        status, message = 'error', f'{failed} for all {total_count - skipped_count} events{skipped_note}'
+
+    return {'status': status, 'message': message, 'results': results, 'events': events}
+
+
+@frappe.whitelist()
+def get_mass_calendar_operation_status(job_id):
+    """Progress or final result of a mass Calendar operation, for the user who started it"""
+    result = frappe.cache().get_value(get_result_key(job_id))
+    if not result:
+        return {'status': 'unknown', 'job_id': job_id}
+    if result.get('owner') != frappe.session.user:
+        frappe.only_for('System Manager')
+    return result
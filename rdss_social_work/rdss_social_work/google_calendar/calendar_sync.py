@@ -0,0 +1,336 @@
+"""
+Incremental two-way sync between Event and the connected Google Calendar
+
+Every run does two passes whose cost follows the number of changes, not the
+number of events:
+
+    * pull: list the calendar with the syncToken stored by the previous run,
+      so Google returns only events changed since then, and reconcile them
+      with Event rows through custom_google_calendar_event_id (one query per
+      page of changes). Events cancelled in Google are cancelled locally.
+    * push: find linked Events modified since the push watermark (a range
+      scan on the indexed `modified` column) that differ from what was last
+      synced, and send them to Google as batch updates or deletions.
+
+custom_google_calendar_synced_on stores the Event's `modified` at the last
+successful exchange, so rows written by the pull are not pushed back, and a
+change made on both sides is settled by the newer timestamp. The push and
+pull mappings are symmetric (full text, dates for all-day events, whole
+seconds), so the echo of a push changes nothing when it is pulled.
+
+Times follow the convention of the existing push code: Event datetimes are
+sent to Google as UTC, so pulled times are stored as UTC too.
+
+A first run, or a sync token Google has expired (HTTP 410), falls back to
+one full listing starting google_calendar_sync_days_back days ago.
+
+Site config:
+    google_calendar_sync_days_back (int): Window of the initial full listing (default 30)
+    google_calendar_sync_import_new (bool): Create Events for events created in Google (default off)
+"""
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import frappe
+from frappe.utils import cint, get_datetime, get_system_timezone, now_datetime
+from googleapiclient.errors import HttpError
+
+from rdss_social_work.db_utils import bulk_update_column
+from .batch_operations import CalendarBatchRunner, build_operation, get_batch_uri, get_http_factory, validate_event
+from .oauth_service import GoogleOAuthService
+
+SYNC_TOKEN_KEY = 'google_calendar_sync_token'
+PUSH_WATERMARK_KEY = 'google_calendar_push_watermark'
+
+PAGE_SIZE = 250
+DEFAULT_DAYS_BACK = 30
+LIST_RETRIES = 3
+
+# The push pass re-reads this much before its watermark, so rows committed by
+# long transactions are not missed; rows already in sync are filtered out cheaply
+PUSH_OVERLAP = timedelta(minutes=10)
+
+EVENT_FIELDS = (
+    'name', 'subject', 'description', 'starts_on', 'ends_on', 'all_day', 'status', 'modified',
+    'custom_google_calendar_event_id', 'custom_google_calendar_attendees', 'custom_google_calendar_synced_on',
+)
+
+
+def to_utc_naive(value):
+    """RFC 3339 timestamp from Google as a naive UTC datetime"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def to_system_time(value):
+    """RFC 3339 timestamp from Google in the site's time zone, comparable with `modified`"""
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return moment.astimezone(ZoneInfo(get_system_timezone())).replace(tzinfo=None)
+
+
+def event_values(item):
+    """
+    Event field values for a Google Calendar event resource
+
+    The inverse of oauth_service.build_event_body: all-day events come back
+    as dates, with Google's exclusive end date mapped to the last second of
+    the event's final day.
+    """
+    start, end = item.get('start') or {}, item.get('end') or {}
+    all_day = 'date' in start
+    values = {
+        'subject': item.get('summary') or '(No title)',
+        'description': item.get('description') or '',
+        'all_day': 1 if all_day else 0,
+        'starts_on': get_datetime(start['date']) if all_day else to_utc_naive(start['dateTime']),
+        'ends_on': get_datetime(end['date']) - timedelta(seconds=1) if all_day else to_utc_naive(end['dateTime']),
+        'custom_google_calendar_attendees': ','.join(
+            attendee['email'] for attendee in item.get('attendees') or [] if attendee.get('email')
+        ),
+    }
+    if frappe.get_meta('Event').has_field('location'):
+        values['location'] = item.get('location') or ''
+    return values
+
+
+def get_changes(row, values):
+    """
+    The pulled values that differ from the Event row
+
+    Times are compared to the second, as Google stores them, and only by date
+    for events that are all-day on both sides, so an event pulled back
+    after its own push is unchanged.
+    """
+    all_day = cint(row.all_day) and values['all_day']
+    changes = {}
+    for field, value in values.items():
+        if field not in row:
+            continue
+        current = row.get(field)
+        if field in ('starts_on', 'ends_on') and current:
+            current = get_datetime(current)
+            if all_day:
+                current, value = current.date(), value.date()
+            else:
+                current, value = current.replace(microsecond=0), value.replace(microsecond=0)
+        elif field == 'all_day':
+            current = cint(current)
+        elif field == 'custom_google_calendar_attendees':
+            # Pushed without the blanks people type after commas
+            current = ','.join(email.strip() for email in (current or '').split(',') if email.strip())
+        else:
+            current = current or ''
+        if current != value:
+            changes[field] = values[field]
+    return changes
+
+
+def list_changes(service, sync_token):
+    """
+    Yield pages of changed events, then the token for the next run
+
+    Yields:
+        tuple: (items, next_sync_token); next_sync_token is set on the last page only
+    """
+    params = {'calendarId': 'primary', 'maxResults': PAGE_SIZE, 'showDeleted': True}
+    if sync_token:
+        params['syncToken'] = sync_token
+    else:
+        days_back = cint(frappe.conf.get('google_calendar_sync_days_back')) or DEFAULT_DAYS_BACK
+        params['timeMin'] = (datetime.now(timezone.utc) - timedelta(days=days_back)).isoformat()
+
+    page_token = None
+    while True:
+        response = service.events().list(pageToken=page_token, **params).execute(num_retries=LIST_RETRIES)
+        page_token = response.get('nextPageToken')
+        yield response.get('items', []), response.get('nextSyncToken')
+        if not page_token:
+            return
+
+
+def get_linked_events(google_event_ids):
+    """Events linked to the given Google ids: {google_event_id: row}"""
+    if not google_event_ids:
+        return {}
+    rows = frappe.get_all(
+        'Event',
+        filters={'custom_google_calendar_event_id': ['in', list(google_event_ids)]},
+        fields=list(EVENT_FIELDS),
+    )
+    return {row.custom_google_calendar_event_id: row for row in rows}
+
+
+def has_local_changes(row):
+    return not row.custom_google_calendar_synced_on or row.modified > get_datetime(row.custom_google_calendar_synced_on)
+
+
+def apply_changes(items, stats):
+    """Reconcile one page of changed Google events with Event rows"""
+    linked = get_linked_events({item['id'] for item in items})
+    import_new = cint(frappe.conf.get('google_calendar_sync_import_new'))
+
+    for item in items:
+        row = linked.get(item['id'])
+
+        if item.get('status') == 'cancelled':
+            if row and row.status != 'Cancelled':
+                frappe.db.set_value('Event', row.name, {
+                    'status': 'Cancelled',
+                    'custom_google_calendar_event_id': None,
+                    'custom_google_calendar_synced_on': row.modified,
+                }, update_modified=False)
+                stats['cancelled'] += 1
+            continue
+
+        if not row:
+            if import_new:
+                doc = frappe.get_doc(dict(event_values(item), doctype='Event', event_type='Private',
+                                          custom_google_calendar_event_id=item['id']))
+                doc.insert(ignore_permissions=True)
+                doc.db_set('custom_google_calendar_synced_on', doc.modified, update_modified=False)
+                stats['created'] += 1
+            continue
+
+        # Changed on both sides since the last sync: the newer change wins
+        if has_local_changes(row) and row.modified > to_system_time(item['updated']):
+            stats['conflicts'] += 1
+            continue
+
+        values = get_changes(row, event_values(item))
+        if not values:
+            continue
+
+        values['custom_google_calendar_synced_on'] = row.modified
+        frappe.db.set_value('Event', row.name, values, update_modified=False)
+        stats['updated'] += 1
+
+
+def pull_changes(service):
+    """
+    Pull changes since the stored sync token; the token is only advanced once
+    every page is applied and committed, so an interrupted run is repeated
+
+    Returns:
+        dict: Counts of updated, cancelled, created and conflicting events
+    """
+    stats = {'updated': 0, 'cancelled': 0, 'created': 0, 'conflicts': 0, 'full_sync': 0}
+    sync_token = frappe.db.get_global(SYNC_TOKEN_KEY)
+
+    try:
+        next_sync_token = None
+        for items, next_sync_token in list_changes(service, sync_token):
+            apply_changes(items, stats)
+    except HttpError as e:
+        if e.resp.status != 410 or not sync_token:
+            raise
+        # The sync token expired: start over with a full listing
+        frappe.db.rollback()
+        frappe.db.set_global(SYNC_TOKEN_KEY, None)
+        frappe.db.commit()
+        frappe.logger().info("Google Calendar sync token expired, running a full sync")
+        stats = pull_changes(service)
+        stats['full_sync'] = 1
+        return stats
+
+    if next_sync_token:
+        frappe.db.set_global(SYNC_TOKEN_KEY, next_sync_token)
+    frappe.db.commit()
+    stats['full_sync'] = stats['full_sync'] or int(not sync_token)
+    return stats
+
+
+def get_local_changes(since):
+    """Linked Events modified since `since` and not yet in sync with Google"""
+    return frappe.db.sql(f"""
+        SELECT {", ".join(f"`{field}`" for field in EVENT_FIELDS)}
+        FROM `tabEvent`
+        WHERE modified > %(since)s
+            AND IFNULL(custom_google_calendar_event_id, '') != ''
+            AND (custom_google_calendar_synced_on IS NULL OR modified > custom_google_calendar_synced_on)
+        ORDER BY modified
+    """, {'since': since}, as_dict=True)
+
+
+def push_changes(oauth_service, started):
+    """
+    Send locally changed Events to Google with batch requests
+
+    Returns:
+        dict: Counts of pushed, deleted and failed events
+    """
+    stats = {'pushed': 0, 'deleted': 0, 'failed': 0}
+    watermark = frappe.db.get_global(PUSH_WATERMARK_KEY)
+    since = get_datetime(watermark) - PUSH_OVERLAP if watermark else started - PUSH_OVERLAP
+
+    rows = {row.name: row for row in get_local_changes(since)}
+    operations = {}
+    for name, row in rows.items():
+        operation = 'delete' if row.status == 'Cancelled' else 'update'
+        reason = validate_event(operation, row)
+        if reason:
+            frappe.logger().info(f"Not pushing Event {name} to Google Calendar: {reason}")
+            continue
+        operations[name] = build_operation(operation, row)
+
+    if operations:
+        runner = CalendarBatchRunner(
+            oauth_service.calendar_service,
+            get_http_factory(oauth_service.credentials),
+            get_batch_uri(),
+        )
+        outcomes = runner.run(operations)
+    else:
+        outcomes = {}
+
+    synced, unlinked = {}, {}
+    # Failed pushes hold the watermark back so the next run retries them
+    next_watermark = started
+    for name, outcome in outcomes.items():
+        deleting = operations[name][0] == 'delete'
+        if outcome['ok'] or (deleting and outcome['status'] in (404, 410)):
+            synced[name] = rows[name].modified
+            if deleting:
+                unlinked[name] = None
+                stats['deleted'] += 1
+            else:
+                stats['pushed'] += 1
+        else:
+            stats['failed'] += 1
+            next_watermark = min(next_watermark, rows[name].modified)
+            frappe.log_error(
+                message=f"Pushing Event {name} to Google Calendar failed: {outcome['error']}",
+                title=f"Calendar Sync Error - {name}"
+            )
+
+    bulk_update_column('Event', 'custom_google_calendar_synced_on', synced)
+    bulk_update_column('Event', 'custom_google_calendar_event_id', unlinked)
+    frappe.db.set_global(PUSH_WATERMARK_KEY, str(next_watermark))
+    frappe.db.commit()
+    return stats
+
+
+def sync_calendar():
+    """
+    Scheduled job: pull Google changes, then push local changes
+
+    Does nothing until Google Calendar has been authorized.
+    """
+    oauth_service = GoogleOAuthService()
+    if not oauth_service.is_authenticated():
+        return
+
+    started = now_datetime()
+    pulled = pull_changes(oauth_service.calendar_service)
+    pushed = push_changes(oauth_service, started)
+    frappe.logger().info(f"Google Calendar sync: pulled {pulled}, pushed {pushed}")
+    return {'pulled': pulled, 'pushed': pushed}
+
+
+@frappe.whitelist()
+def sync_calendar_now():
+    """Run the two-way Google Calendar sync immediately"""
+    frappe.only_for(['System Manager'])
+    return sync_calendar()
@@ -1,19 +1,124 @@
 import frappe
 import json
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
+from frappe.utils import cint, getdate
+from frappe.utils.synchronization import filelock
+
+
+def get_calendar_api_root():
+    """
+    Root URL of the Google APIs, overridable (site config: google_calendar_api_root)
+    so the calendar code can be pointed at a local fake Calendar server
+    """
+    return (frappe.conf.get('google_calendar_api_root') or 'https://www.googleapis.com/').rstrip('/') + '/'
+
+
+def get_calendar_client_options():
+    """client_options for build() when the API root is overridden, else None"""
+    if not frappe.conf.get('google_calendar_api_root'):
+        return None
+    return {'api_endpoint': get_calendar_api_root() + 'calendar/v3/'}
+
+
+def format_datetime(dt):
+    """Format datetime for Google Calendar API (whole seconds, as Google stores them)"""
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
+    elif not dt.tzinfo:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return dt.replace(microsecond=0).isoformat()
+
+
+def format_event_time(value, all_day, end=False):
+    """Google start / end of an event; all-day events get a date, with Google's exclusive end date"""
+    if all_day:
+        day = getdate(value)
+        return {'date': (day + timedelta(days=1) if end else day).isoformat()}
+    return {'dateTime': format_datetime(value), 'timeZone': 'UTC'}
+
+
+def build_event_body(event_data):
+    """
+    Google Calendar event resource for an ERPNext event_data dict
+
+    Mirrors calendar_sync.event_values, so an event pulled back after a push
+    maps to the values it was pushed with. Text is sent in full.
+    """
+    all_day = cint(event_data.get('all_day'))
+    starts_on = event_data.get('starts_on')
+    return {
+        'summary': event_data.get('subject') or '',
+        'description': event_data.get('description') or '',
+        'start': format_event_time(starts_on, all_day),
+        'end': format_event_time(event_data.get('ends_on') or starts_on, all_day, end=True),
+        'attendees': [
+            {'email': email.strip()}
+            for email in (event_data.get('attendees') or '').split(',')
+            if email.strip()
+        ],
+        'location': event_data.get('location') or '',
+    }
+
+
+# Access tokens are refreshed this long before they expire, so no request starts with a token about to lapse
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+API_VERSIONS = {'calendar': 'v3', 'gmail': 'v1'}
+
+# Process-level caches shared by every GoogleOAuthService instance. Credentials are
+# keyed by site and reloaded when the token file changes on disk (another worker
+# refreshed or re-authorized). Built API clients wrap an httplib2 connection, which
+# is not thread-safe, so they are cached per thread.
+_credentials_lock = threading.RLock()
+_credentials_cache = {}
+_clients = threading.local()
+
+
+def clear_service_cache(site=None):
+    """Forget cached credentials and clients for a site (default: all sites)"""
+    with _credentials_lock:
+        if site:
+            _credentials_cache.pop(site, None)
+        else:
+            _credentials_cache.clear()
+
+    # Other threads' clients are tied to the old credentials object and get rebuilt on next use
+    services = _clients.__dict__.get('services', {})
+    for key in [key for key in services if not site or key[0] == site]:
+        del services[key]
+
+
+def needs_refresh(creds):
+    """True when the access token is missing or expires within TOKEN_REFRESH_MARGIN"""
+    if not creds.token:
+        return True
+    # google-auth keeps expiry as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return bool(creds.expiry and creds.expiry - TOKEN_REFRESH_MARGIN <= now)
+
+
+def write_token_file(path, creds):
+    """Write credentials atomically so other workers never read a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as token:
+        token.write(creds.to_json())
+    os.replace(tmp_path, path)
 
 
 class GoogleOAuthService:
     def __init__(self):
-        self.calendar_service = None
+        # Cheap to construct: credentials and API clients come from the process-level cache on first use
         self.scopes = [
             'https://www.googleapis.com/auth/calendar'
         ]
-        self._initialize_services()
     
     def _get_credentials_path(self):
         """Get path to store OAuth credentials in the site's private directory
@@ -32,51 +137,122 @@ class GoogleOAuthService:
                 "redirect_uris": [f"https://erp.rdss.org.sg/api/method/rdss_social_work.rdss_social_work.api.oauth_callback"]
             }
         }
-    
-    def _initialize_services(self):
-        """Initialize Google services using OAuth credentials"""
+
+    @property
+    def credentials(self):
+        return self._get_valid_credentials()
+
+    @property
+    def calendar_service(self):
+        return self.get_service('calendar')
+
+    @property
+    def gmail_service(self):
+        return self.get_service('gmail')
+
+    def get_service(self, api):
+        """
+        Built API client for 'calendar' or 'gmail', or None without valid credentials
+
+        Only the requested API is built, once per thread and set of credentials.
+        """
+        creds = self._get_valid_credentials()
+        if not creds:
+            return None
+
+        key = (frappe.local.site, api)
+        cache = _clients.__dict__.setdefault('services', {})
+        cached = cache.get(key)
+        if cached and cached[0] is creds:
+            return cached[1]
+
         try:
-            credentials = self._get_valid_credentials()
-            if credentials:
-                self.calendar_service = build('calendar', 'v3', credentials=credentials)
-                self.gmail_service = build('gmail', 'v1', credentials=credentials)
+            service = build(
+                api,
+                API_VERSIONS[api],
+                credentials=creds,
+                cache_discovery=False,
+                client_options=get_calendar_client_options() if api == 'calendar' else None,
+            )
+        except Exception as e:
+            frappe.logger().info(f"OAuth {api} service not initialized: {str(e)}")
+            return None
+
+        cache[key] = (creds, service)
+        return service
+
+    def _load_credentials(self, creds_path):
+        """Read the token file, removing it when it is unusable"""
+        try:
+            return Credentials.from_authorized_user_file(creds_path, self.scopes)
         except Exception as e:
-            # Avoid noisy Error Logs if creds are missing/invalid; initialization can happen after auth
+            # Token file exists but is invalid (e.g., missing refresh_token)
+            # Log as a warning (not an error) to avoid noisy Error Logs; this is expected when re-auth is needed
+            frappe.logger().warning(f"Invalid OAuth token file at {creds_path}: {str(e)}")
             try:
-                frappe.logger().info(f"OAuth services not initialized yet: {str(e)}")
+                os.remove(creds_path)
             except Exception:
                 pass
-    
+            return None
+
     def _get_valid_credentials(self):
-        """Get valid OAuth credentials, refresh if needed"""
+        """
+        Get valid OAuth credentials from the process cache, refreshing near expiry
+
+        The token file is only re-read when its modification time changes.
+        """
+        site = frappe.local.site
         creds_path = self._get_credentials_path()
-        creds = None
-        
-        # Load existing credentials
-        if os.path.exists(creds_path):
-            try:
-                creds = Credentials.from_authorized_user_file(creds_path, self.scopes)
-            except Exception as e:
-                # Token file exists but is invalid (e.g., missing refresh_token)
-                # Log as a warning (not an error) to avoid noisy Error Logs; this is expected when re-auth is needed
-                try:
-                    frappe.logger().warning(f"Invalid OAuth token file at {creds_path}: {str(e)}")
-                except Exception:
-                    pass
-                try:
-                    os.remove(creds_path)
-                except Exception:
-                    pass
-                creds = None
-        
-        # Refresh if expired
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            # Save refreshed credentials
-            with open(creds_path, 'w') as token:
-                token.write(creds.to_json())
-        
+        try:
+            mtime = os.stat(creds_path).st_mtime_ns
+        except FileNotFoundError:
+            clear_service_cache(site)
+            return None
+
+        with _credentials_lock:
+            cached = _credentials_cache.get(site)
+            if not cached or cached[0] != mtime:
+                creds = self._load_credentials(creds_path)
+                if not creds:
+                    _credentials_cache.pop(site, None)
+                    return None
+                cached = _credentials_cache[site] = (mtime, creds)
+
+            creds = cached[1]
+            if needs_refresh(creds):
+                creds = self._refresh_credentials(site, creds_path, creds)
+
         return creds if creds and creds.valid else None
+
+    def _refresh_credentials(self, site, creds_path, creds):
+        """
+        Refresh the access token once across all workers
+
+        Called with _credentials_lock held, which serializes threads in this
+        process; a file lock serializes gunicorn workers and background jobs.
+        Whoever gets the lock second finds the token file already rewritten
+        and picks up the new token instead of refreshing again.
+        """
+        if not creds.refresh_token:
+            return creds
+
+        try:
+            with filelock('google_oauth_token_refresh', timeout=30):
+                mtime = os.stat(creds_path).st_mtime_ns
+                if mtime != _credentials_cache[site][0]:
+                    reloaded = self._load_credentials(creds_path)
+                    if reloaded and not needs_refresh(reloaded):
+                        _credentials_cache[site] = (mtime, reloaded)
+                        return reloaded
+
+                creds.refresh(Request())
+                write_token_file(creds_path, creds)
+                _credentials_cache[site] = (os.stat(creds_path).st_mtime_ns, creds)
+                return creds
+        except Exception as e:
+            frappe.logger().warning(f"OAuth token refresh failed: {str(e)}")
+            _credentials_cache.pop(site, None)
+            return None
     
     def get_authorization_url(self):
         """Get OAuth authorization URL for user to visit"""
@@ -121,14 +297,9 @@ class GoogleOAuthService:
             flow.fetch_token(code=code)
             creds = flow.credentials
             
-            # Save credentials
-            creds_path = self._get_credentials_path()
-            os.makedirs(os.path.dirname(creds_path), exist_ok=True)
-            with open(creds_path, 'w') as token:
-                token.write(creds.to_json())
-            
-            # Initialize services
-            self._initialize_services()
+            # Save credentials; other workers notice the new token file by its modification time
+            write_token_file(self._get_credentials_path(), creds)
+            clear_service_cache(frappe.local.site)
             
             return True
             
@@ -146,37 +317,12 @@ class GoogleOAuthService:
             frappe.throw("Google OAuth authentication required")
         
         try:
-            # Validate and clean data
-            subject = event_data.get('subject', '')[:100]  # Limit title length
-            description = event_data.get('description', '')[:1000]  # Limit description
-            location = event_data.get('location', '')[:100]  # Limit location
-            
             # Validate start/end times
-            start_time = event_data.get('starts_on')
-            end_time = event_data.get('ends_on')
-            
-            if end_time <= start_time:
+            if not cint(event_data.get('all_day')) and event_data.get('ends_on') <= event_data.get('starts_on'):
                 frappe.throw("Event end time must be after start time")
-            
+
             # Convert ERPNext event to Google Calendar format
-            calendar_event = {
-                'summary': subject,
-                'description': description,
-                'start': {
-                    'dateTime': self._format_datetime(event_data.get('starts_on')),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': self._format_datetime(event_data.get('ends_on')),
-                    'timeZone': 'UTC',
-                },
-                'attendees': [
-                    {'email': email.strip()} 
-                    for email in event_data.get('attendees', '').split(',') 
-                    if email.strip()
-                ],
-                'location': location,
-            }
+            calendar_event = build_event_body(event_data)
             
             # Create event with sendUpdates to send invites
             event = self.calendar_service.events().insert(
@@ -196,29 +342,7 @@ class GoogleOAuthService:
             frappe.throw("Google OAuth authentication required")
 
         try:
-            # Prepare body similar to create
-            subject = event_data.get('subject', '')[:100]
-            description = event_data.get('description', '')[:1000]
-            location = event_data.get('location', '')[:100]
-
-            calendar_event = {
-                'summary': subject,
-                'description': description,
-                'start': {
-                    'dateTime': self._format_datetime(event_data.get('starts_on')),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': self._format_datetime(event_data.get('ends_on')),
-                    'timeZone': 'UTC',
-                },
-                'attendees': [
-                    {'email': email.strip()}
-                    for email in event_data.get('attendees', '').split(',')
-                    if email.strip()
-                ],
-                'location': location,
-            }
+            calendar_event = build_event_body(event_data)
 
             updated = self.calendar_service.events().update(
                 calendarId='primary',
@@ -249,14 +373,7 @@ class GoogleOAuthService:
     
     def _format_datetime(self, dt):
         """Format datetime for Google Calendar API"""
-        from datetime import datetime, timezone
-        
-        if isinstance(dt, str):
-            dt = datetime.fromisoformat(dt.replace('Z', '+00:00'))
-        elif not dt.tzinfo:
-            dt = dt.replace(tzinfo=timezone.utc)
-        
-        return dt.isoformat()
+        return format_datetime(dt)
 
 
 @frappe.whitelist(allow_guest=True)
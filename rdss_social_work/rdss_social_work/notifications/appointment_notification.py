@@ -1,86 +1,502 @@
 import frappe
 from frappe import _
-from datetime import datetime, timedelta
+from frappe.utils import cint, get_datetime, get_url, getdate, now_datetime, today
+from datetime import timedelta
 import os
 
+from rdss_social_work.db_utils import bulk_set_value, bulk_update_column
+
+# Hours before an appointment at which a reminder is sent (site config: appointment_reminder_horizons)
+DEFAULT_HORIZONS = (72, 24, 2)
+DEFAULT_HORIZON = "72h"
+REMINDER_STATUSES = ("Scheduled", "Confirmed")
+REMINDER_LOG_DOCTYPE = "Appointment Reminder Log"
+
+# Appointments without a time are treated as starting at the beginning of the working day
+DEFAULT_APPOINTMENT_TIME = "09:00:00"
+
+# How far back the very first run looks
+INITIAL_LOOKBACK = timedelta(hours=1)
+
+# Appointments handled per background job
+CHUNK_SIZE = 200
+
+# Sends of one reminder before it is given up; failures wait RETRY_DELAY, so the next hourly run retries them
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=30)
+
+# A claim still Queued this long after it was taken belongs to a job that died (longer than the long queue timeout)
+STALE_CLAIM = timedelta(hours=1)
+
+# Reminder errors that another attempt cannot fix
+NO_RECIPIENT_ERROR = "No email found for social worker"
+
+# Sent reminder logs are kept this long (site config: appointment_reminder_log_retention_days)
+DEFAULT_LOG_RETENTION_DAYS = 90
+LOG_CLEANUP_CHUNK = 5000
+
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "appointment_reminder_template.html"
+)
+
+
 def send_appointment_reminders():
     """
-    Send appointment reminder notifications 3 days before scheduled appointments.
-    This function is designed to be scheduled to run daily.
-    """
-    # Calculate the date 3 days from now
-    target_date = datetime.now().date() + timedelta(days=3)
-    
-    # Find all appointments scheduled for the target date
-    appointments = frappe.get_all(
-        "Appointment",
-        filters={
-            "appointment_date": target_date,
-            "docstatus": 1  # Only consider submitted appointments
-        },
-        fields=["name", "social_worker", "beneficiary", "appointment_date", "appointment_time"]
-    )
-    
+    Send appointment reminder notifications for every configured horizon
+    (by default 72, 24 and 2 hours before the appointment).
+    This function is designed to be scheduled to run hourly.
+
+    Each horizon keeps a watermark: the time of its last completed run. An
+    appointment becomes due for horizon H when it is less than H hours away,
+    so a run only has to look at appointments starting between
+    watermark + H and now + H (plus any booked or moved since the
+    watermark). After downtime the next run picks up exactly where the last
+    one stopped; the window never grows beyond H hours, because appointments
+    already in the past are not reminded.
+
+    Newly due appointments get a Queued reminder log row before their batch
+    is enqueued. Reminders that still need sending are found from those rows
+    by a second, separate query: Failed ones whose retry time has come, and
+    Queued ones whose job died before finishing, while under MAX_ATTEMPTS
+    and while the appointment is still due.
+
+    Times are compared in the site's time zone (now_datetime), the same one
+    appointment dates and times are entered in.
+    """
+    now = now_datetime()
+    horizons = get_horizons()
+
+    for position, hours in enumerate(horizons):
+        # A tighter horizon takes over once it applies, so late bookings get one reminder, not several
+        tighter_hours = horizons[position + 1] if position + 1 < len(horizons) else 0
+        horizon = f"{hours}h"
+        watermark_key = get_watermark_key(horizon)
+
+        watermark = frappe.db.get_global(watermark_key)
+        watermark = get_datetime(watermark) if watermark else now - INITIAL_LOOKBACK
+
+        appointments = get_newly_due_appointments(horizon, hours, tighter_hours, watermark, now)
+        record_due_reminders(appointments, horizon)
+        retries = get_retry_appointments(horizon, hours, tighter_hours, now)
+
+        due = sorted(set(appointments) | set(retries))
+        if due:
+            enqueue_reminder_batches(due, horizon, get_horizon_label(hours))
+
+        frappe.db.set_global(watermark_key, str(now))
+        frappe.db.commit()
+        frappe.logger().info(
+            f"Queued {len(appointments)} appointment reminders and {len(retries)} retries for the {horizon} horizon"
+        )
+
+
+def get_horizons():
+    """Configured reminder horizons in hours, largest first"""
+    hours = frappe.conf.get("appointment_reminder_horizons") or DEFAULT_HORIZONS
+    return sorted({cint(h) for h in hours if cint(h) > 0}, reverse=True)
+
+
+def get_horizon_label(hours):
+    if hours % 24 == 0:
+        days = hours // 24
+        return "tomorrow" if days == 1 else f"in {days} days"
+    return "in 1 hour" if hours == 1 else f"in {hours} hours"
+
+
+def get_watermark_key(horizon):
+    return f"appointment_reminder_watermark:{horizon}"
+
+
+def get_due_window(hours, tighter_hours, now):
+    """(lower, upper) start times of appointments due for a horizon"""
+    return now + timedelta(hours=tighter_hours), now + timedelta(hours=hours)
+
+
+def get_newly_due_appointments(horizon, hours, tighter_hours, watermark, now):
+    """
+    Appointments that became due for a horizon since the watermark
+
+    Due means starting within the next `hours` but not yet within the next
+    `tighter_hours`. Newly due means the start crossed the horizon after the
+    watermark, or the appointment was booked or changed after it. Those with
+    a reminder log row for the horizon are left to get_retry_appointments.
+    The appointment_date range keeps the scan on the date index.
+    """
+    lower, upper = get_due_window(hours, tighter_hours, now)
+
+    return frappe.db.sql_list("""
+        SELECT a.name
+        FROM `tabAppointment` a
+        LEFT JOIN `tabAppointment Reminder Log` l
+            ON l.name = CONCAT(a.name, '::', %(horizon)s)
+        WHERE a.appointment_date BETWEEN %(from_date)s AND %(to_date)s
+            AND TIMESTAMP(a.appointment_date, IFNULL(a.appointment_time, %(default_time)s)) > %(lower)s
+            AND TIMESTAMP(a.appointment_date, IFNULL(a.appointment_time, %(default_time)s)) <= %(upper)s
+            AND (
+                TIMESTAMP(a.appointment_date, IFNULL(a.appointment_time, %(default_time)s)) > %(newly_due_after)s
+                OR a.modified > %(watermark)s
+            )
+            AND a.appointment_status IN %(statuses)s
+            AND IFNULL(a.social_worker, '') != ''
+            AND l.name IS NULL
+        ORDER BY a.name
+    """, {
+        "horizon": horizon,
+        "from_date": lower.date(),
+        "to_date": upper.date(),
+        "lower": lower,
+        "upper": upper,
+        "newly_due_after": watermark + timedelta(hours=hours),
+        "watermark": watermark,
+        "default_time": DEFAULT_APPOINTMENT_TIME,
+        "statuses": REMINDER_STATUSES,
+    })
+
+
+def get_retry_appointments(horizon, hours, tighter_hours, now):
+    """
+    Appointments whose reminder for a horizon should be attempted again
+
+    Reads only reminder log rows that are Failed and past their retry time,
+    or Queued by a job that never finished, with attempts left; the status
+    and next_retry_on indexes keep it off Sent rows. The appointment must
+    still be due.
+    """
+    lower, upper = get_due_window(hours, tighter_hours, now)
+
+    return frappe.db.sql_list("""
+        SELECT l.appointment
+        FROM `tabAppointment Reminder Log` l
+        JOIN `tabAppointment` a ON a.name = l.appointment
+        WHERE l.horizon = %(horizon)s
+            AND (
+                (l.status = 'Failed' AND l.next_retry_on <= %(now)s)
+                OR (l.status = 'Queued' AND l.modified < %(stale_before)s)
+            )
+            AND l.attempts < %(max_attempts)s
+            AND TIMESTAMP(a.appointment_date, IFNULL(a.appointment_time, %(default_time)s)) > %(lower)s
+            AND TIMESTAMP(a.appointment_date, IFNULL(a.appointment_time, %(default_time)s)) <= %(upper)s
+            AND a.appointment_status IN %(statuses)s
+            AND IFNULL(a.social_worker, '') != ''
+        ORDER BY l.appointment
+    """, {
+        "horizon": horizon,
+        "now": now,
+        "stale_before": now - STALE_CLAIM,
+        "max_attempts": MAX_ATTEMPTS,
+        "lower": lower,
+        "upper": upper,
+        "default_time": DEFAULT_APPOINTMENT_TIME,
+        "statuses": REMINDER_STATUSES,
+    })
+
+
+def record_due_reminders(appointments, horizon):
+    """
+    Queued reminder log rows, without a claim, for newly due appointments
+
+    A batch that is enqueued but never runs leaves its rows Queued, so
+    get_retry_appointments finds them once they are stale.
+    """
     if not appointments:
-        frappe.logger().info(f"No appointments found for {target_date}")
         return
-    
-    # Get the template path
-    template_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "appointment_reminder_template.html"
+
+    now = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        REMINDER_LOG_DOCTYPE,
+        fields=["name", "reminder_key", "appointment", "horizon", "status", "attempts",
+                "creation", "modified", "owner", "modified_by", "docstatus"],
+        values=[
+            (key, key, name, horizon, "Queued", 0, now, now, user, user, 0)
+            for name in appointments
+            for key in [get_reminder_key(name, horizon)]
+        ],
+        ignore_duplicates=True,
+    )
+
+
+def enqueue_reminder_batches(appointments, horizon, horizon_label=None):
+    """Enqueue one send_reminder_batch job per chunk of appointments"""
+    for start in range(0, len(appointments), CHUNK_SIZE):
+        chunk = appointments[start:start + CHUNK_SIZE]
+        frappe.enqueue(
+            "rdss_social_work.rdss_social_work.notifications.appointment_notification.send_reminder_batch",
+            queue="long",
+            job_id=f"appointment_reminders::{horizon}::{chunk[0]}",
+            deduplicate=True,
+            appointments=chunk,
+            horizon=horizon,
+            horizon_label=horizon_label,
+        )
+
+
+def get_reminder_key(appointment, horizon):
+    return f"{appointment}::{horizon}"
+
+
+def claim_reminders(appointments, horizon):
+    """
+    Claim reminder keys for this job so no other run sends the same reminder
+
+    Claims are rows in Appointment Reminder Log keyed by appointment and
+    horizon. A row is claimed by writing this job's token into it, counting
+    an attempt, when it is unclaimed, Failed and due for a retry, or Queued
+    by a job that died; keys without a row are inserted already claimed
+    (INSERT IGNORE). Row locks make concurrent claims of a key exclusive.
+    Claims are committed before any email is queued, so a job that dies
+    while sending leaves them Queued for get_retry_appointments.
+
+    Returns:
+        list: Appointment names claimed by this call
+    """
+    if not appointments:
+        return []
+
+    token = frappe.generate_hash(length=12)
+    now = now_datetime()
+    user = frappe.session.user
+    keys = {get_reminder_key(name, horizon): name for name in appointments}
+
+    frappe.db.sql("""
+        UPDATE `tabAppointment Reminder Log`
+        SET claim_token = %(token)s, status = 'Queued', attempts = attempts + 1,
+            next_retry_on = NULL, modified = %(now)s, modified_by = %(user)s
+        WHERE name IN %(keys)s
+            AND attempts < %(max_attempts)s
+            AND (
+                (status = 'Queued' AND (IFNULL(claim_token, '') = '' OR modified < %(stale_before)s))
+                OR (status = 'Failed' AND next_retry_on <= %(now)s)
+            )
+    """, {
+        "token": token,
+        "now": now,
+        "user": user,
+        "keys": tuple(keys),
+        "max_attempts": MAX_ATTEMPTS,
+        "stale_before": now - STALE_CLAIM,
+    })
+    frappe.db.bulk_insert(
+        REMINDER_LOG_DOCTYPE,
+        fields=["name", "reminder_key", "appointment", "horizon", "status", "claim_token", "attempts",
+                "creation", "modified", "owner", "modified_by", "docstatus"],
+        values=[(key, key, name, horizon, "Queued", token, 1, now, now, user, user, 0) for key, name in keys.items()],
+        ignore_duplicates=True,
     )
-    
-    # Check if template exists
-    if not os.path.exists(template_path):
-        frappe.logger().error("Appointment reminder template not found")
+    frappe.db.commit()
+
+    # Primary-key lookups of this batch's keys; the token tells which claims are ours
+    return frappe.get_all(
+        REMINDER_LOG_DOCTYPE,
+        filters={"name": ["in", list(keys)], "claim_token": token},
+        pluck="appointment",
+    )
+
+
+def mark_failed_reminders(failed, horizon):
+    """
+    Record failed sends: Failed with a retry time, or Abandoned when the
+    error is terminal or the reminder has used up its attempts
+
+    Args:
+        failed (dict): {appointment: (error, terminal)}
+        horizon (str): Reminder horizon
+    """
+    if not failed:
         return
-    
-    # Read the template
-    with open(template_path, "r") as template_file:
-        template_content = template_file.read()
-    
-    # Send notifications for each appointment
-    for appointment in appointments:
+
+    keys = {get_reminder_key(name, horizon): name for name in failed}
+    bulk_update_column(
+        REMINDER_LOG_DOCTYPE,
+        "error",
+        {key: failed[name][0] for key, name in keys.items()},
+        static_values={"status": "Failed", "next_retry_on": now_datetime() + RETRY_DELAY},
+    )
+
+    terminal = [key for key, name in keys.items() if failed[name][1]]
+    frappe.db.sql("""
+        UPDATE `tabAppointment Reminder Log`
+        SET status = 'Abandoned', next_retry_on = NULL
+        WHERE name IN %(keys)s
+            AND (attempts >= %(max_attempts)s OR name IN %(terminal)s)
+    """, {"keys": tuple(keys), "max_attempts": MAX_ATTEMPTS, "terminal": tuple(terminal) or ("",)})
+
+
+def get_reminder_template():
+    """Compile the reminder template once per job instead of once per email"""
+    template = getattr(frappe.local, "appointment_reminder_template", None)
+    if template is None:
+        with open(TEMPLATE_PATH, "r") as template_file:
+            template = frappe.get_jenv().from_string(template_file.read())
+        frappe.local.appointment_reminder_template = template
+    return template
+
+
+def get_reminder_contexts(appointments):
+    """
+    Template context for many appointments with three queries in total
+
+    Returns:
+        dict: {appointment: {doc, beneficiary, case_notes, initial_assessment, social_worker_name, social_worker_email}}
+    """
+    rows = frappe.db.sql("""
+        SELECT
+            a.name, a.appointment_date, a.appointment_time, a.appointment_type,
+            a.appointment_location, a.location_type, a.`case`, a.beneficiary, a.social_worker,
+            u.email AS social_worker_email, u.full_name AS social_worker_name,
+            b.beneficiary_name, b.age, b.gender, b.primary_diagnosis, b.mobile_number, b.home_number,
+            b.preferred_contact_method, b.address_line_1, b.address_line_2, b.postal_code
+        FROM `tabAppointment` a
+        JOIN `tabUser` u ON u.name = a.social_worker
+        LEFT JOIN `tabBeneficiary` b ON b.name = a.beneficiary
+        WHERE a.name IN %(names)s
+    """, {"names": tuple(appointments)}, as_dict=True)
+
+    case_notes = {}
+    for note in frappe.get_all(
+        "Case Notes",
+        filters={"related_appointment": ["in", appointments]},
+        fields=["name", "case", "related_appointment", "visit_date", "visit_type"],
+    ):
+        case_notes.setdefault(note.related_appointment, []).append(note)
+
+    beneficiaries = list({row.beneficiary for row in rows if row.beneficiary})
+    assessments = {}
+    if beneficiaries:
+        for assessment in frappe.get_all(
+            "Initial Assessment",
+            filters={"beneficiary": ["in", beneficiaries]},
+            fields=["name", "beneficiary", "assessment_date"],
+            order_by="assessment_date desc",
+        ):
+            assessments.setdefault(assessment.beneficiary, [assessment])
+
+    contexts = {}
+    for row in rows:
+        beneficiary = None
+        if row.beneficiary:
+            beneficiary = frappe._dict(
+                name=row.beneficiary,
+                beneficiary_name=row.beneficiary_name,
+                age=row.age,
+                gender=row.gender,
+                primary_diagnosis=row.primary_diagnosis,
+                mobile_number=row.mobile_number,
+                home_number=row.home_number,
+                preferred_contact_method=row.preferred_contact_method,
+                address_line_1=row.address_line_1,
+                address_line_2=row.address_line_2,
+                postal_code=row.postal_code,
+            )
+
+        contexts[row.name] = frappe._dict(
+            doc=row,
+            beneficiary=beneficiary,
+            case_notes=[note for note in case_notes.get(row.name, []) if note.case == row.case],
+            initial_assessment=assessments.get(row.beneficiary, []),
+            social_worker_name=row.social_worker_name,
+            social_worker_email=row.social_worker_email,
+        )
+    return contexts
+
+
+def send_reminder_batch(appointments, horizon=DEFAULT_HORIZON, horizon_label=None):
+    """
+    Background job: render and queue reminder emails for a chunk of appointments
+
+    Claims are committed first; queued emails and the Sent / Failed marks
+    are then committed together, so a job that dies part-way leaves its
+    claims Queued and nothing half-sent, and the next run retries them.
+
+    Args:
+        appointments (list): Appointment names
+        horizon (str): Reminder horizon the claims are recorded under
+        horizon_label (str, optional): Wording used in the email, e.g. "in 3 days"
+
+    Returns:
+        dict: {"sent": n, "failed": n, "skipped": n}
+    """
+    appointments = frappe.parse_json(appointments) if isinstance(appointments, str) else appointments
+    claimed = claim_reminders(appointments, horizon)
+    if not claimed:
+        return {"sent": 0, "failed": 0, "skipped": len(appointments)}
+
+    contexts = get_reminder_contexts(claimed)
+    template = get_reminder_template()
+    site_url = get_url()
+
+    sent = {}
+    failed = {}
+    for name in claimed:
+        context = contexts.get(name)
+        if not context or not context.social_worker_email:
+            failed[name] = (NO_RECIPIENT_ERROR, True)
+            continue
+
         try:
-            # Get the full appointment document
-            doc = frappe.get_doc("Appointment", appointment.name)
-            
-            # Skip if no social worker assigned
-            if not doc.social_worker:
-                frappe.logger().info(f"No social worker assigned to appointment {doc.name}, skipping notification")
-                continue
-            
-            # Get social worker's email
-            social_worker_email = frappe.db.get_value("User", doc.social_worker, "email")
-            if not social_worker_email:
-                frappe.logger().info(f"No email found for social worker {doc.social_worker}, skipping notification")
-                continue
-            
-            # Get beneficiary name for subject line
-            beneficiary_name = frappe.db.get_value("Beneficiary", doc.beneficiary, "beneficiary_name") if doc.beneficiary else "Unknown"
-            
-            # Format the appointment date for the subject
-            appointment_date_str = frappe.utils.get_datetime(doc.appointment_date).strftime('%d %b %Y')
-            
-            # Render the template with the appointment data
-            subject = f"Reminder: Appointment with {beneficiary_name} on {appointment_date_str}"
-            
-            # Send the email notification
+            appointment_date_str = getdate(context.doc.appointment_date).strftime('%d %b %Y')
+            beneficiary_name = context.doc.beneficiary_name or "Unknown"
+            context.update(site_url=site_url, horizon_label=horizon_label)
+
             frappe.sendmail(
-                recipients=social_worker_email,
-                subject=subject,
-                message=frappe.render_template(template_content, {"doc": doc}),
+                recipients=context.social_worker_email,
+                subject=f"Reminder: Appointment with {beneficiary_name} on {appointment_date_str}",
+                message=template.render(context),
                 reference_doctype="Appointment",
-                reference_name=doc.name
+                reference_name=name
             )
-            
-            frappe.logger().info(f"Sent appointment reminder for {doc.name} to {social_worker_email}")
-            
+            sent[name] = context.social_worker_email
+        except frappe.InvalidEmailAddressError as e:
+            failed[name] = (str(e), True)
         except Exception as e:
-            frappe.logger().error(f"Error sending appointment reminder for {appointment.name}: {str(e)}")
-    
-    frappe.logger().info(f"Processed {len(appointments)} appointment reminders")
+            failed[name] = (str(e), False)
+            frappe.logger().error(f"Error sending appointment reminder for {name}: {str(e)}")
+
+    now = now_datetime()
+    bulk_update_column(
+        REMINDER_LOG_DOCTYPE,
+        "recipient",
+        {get_reminder_key(name, horizon): email for name, email in sent.items()},
+        static_values={"status": "Sent", "sent_on": now},
+    )
+    mark_failed_reminders(failed, horizon)
+    bulk_set_value("Appointment", list(sent), {"reminder_sent": 1, "reminder_date": today()})
+    frappe.db.commit()
+
+    frappe.logger().info(f"Sent {len(sent)} appointment reminders ({horizon}), {len(failed)} failed")
+    return {"sent": len(sent), "failed": len(failed), "skipped": len(appointments) - len(claimed)}
+
+
+def delete_old_reminder_logs():
+    """
+    Daily job: delete Sent reminder logs older than the retention period
+
+    A Sent row only matters while its appointment is inside a reminder
+    window, so rows sent long ago can go. Deleted in chunks on the sent_on
+    index, committing after each, so the job never holds a long lock.
+    """
+    retention_days = cint(frappe.conf.get("appointment_reminder_log_retention_days")) or DEFAULT_LOG_RETENTION_DAYS
+    cutoff = now_datetime() - timedelta(days=retention_days)
+
+    deleted = 0
+    while True:
+        names = frappe.get_all(
+            REMINDER_LOG_DOCTYPE,
+            filters={"status": "Sent", "sent_on": ["<", cutoff]},
+            pluck="name",
+            limit=LOG_CLEANUP_CHUNK,
+            order_by="sent_on",
+        )
+        if not names:
+            break
+        frappe.db.delete(REMINDER_LOG_DOCTYPE, {"name": ["in", names]})
+        frappe.db.commit()
+        deleted += len(names)
+
+    frappe.logger().info(f"Deleted {deleted} appointment reminder logs sent before {cutoff}")
+    return deleted
+
 
 def setup_appointment_reminder_scheduler():
     """
@@ -93,8 +509,7 @@ def setup_appointment_reminder_scheduler():
         job = frappe.new_doc("Scheduled Job Type")
         job.update({
             "method": "rdss_social_work.rdss_social_work.notifications.appointment_notification.send_appointment_reminders",
-            "frequency": "Daily",
-            "cron_format": "0 8 * * *",  # Run daily at 8:00 AM
+            "frequency": "Hourly",
             "docstatus": 0,
             "name": "Appointment Reminders",
             "module": "RDSS Social Work"
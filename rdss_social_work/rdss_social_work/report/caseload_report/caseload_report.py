@@ -1,6 +1,6 @@
 import frappe
 from frappe import _
-from frappe.utils import today, add_months, getdate
+from frappe.utils import today, add_days, getdate, cint
 
 def execute(filters=None):
     columns = get_columns()
@@ -55,9 +55,61 @@ def get_columns():
     ]
 
 def get_data(filters):
+    filters = frappe._dict(filters or {})
+    period = get_period(filters)
+
+    social_workers = get_social_workers()
+    if not social_workers:
+        return []
+
+    # One GROUP BY per source doctype, merged by worker in memory
+    case_metrics = get_case_metrics(period)
+    assessment_metrics = get_assessment_metrics()
+    followup_metrics = get_followup_metrics()
+    appointment_metrics = get_appointment_metrics(period)
+
     data = []
-    
-    # Get all social workers
+    for worker in social_workers:
+        if not worker.name:
+            continue
+
+        cases = case_metrics.get(worker.name, {})
+        active_cases = cint(cases.get("active_cases"))
+        new_cases = cint(cases.get("new_cases"))
+        appointments_week = cint(appointment_metrics.get(worker.name))
+
+        if active_cases > 0 or new_cases > 0 or appointments_week > 0:
+            data.append({
+                "primary_social_worker": worker.name,
+                "active_cases": active_cases,
+                "new_cases_this_month": new_cases,
+                "closed_cases_this_month": cint(cases.get("closed_cases")),
+                "pending_assessments": cint(assessment_metrics.get(worker.name)),
+                "overdue_followups": cint(followup_metrics.get(worker.name)),
+                "appointments_this_week": appointments_week
+            })
+
+    return data
+
+def get_period(filters):
+    """
+    Resolve the reporting window
+
+    Without a date range, case activity is counted from the start of the
+    month and appointments from today onwards. The optional from_date /
+    to_date filters replace both windows.
+    """
+    from_date = getdate(filters.from_date) if filters.get("from_date") else None
+    # to_date is inclusive; compare datetimes against the following midnight
+    to_date = add_days(getdate(filters.to_date), 1) if filters.get("to_date") else None
+
+    return frappe._dict(
+        case_start=from_date or getdate(today()).replace(day=1),
+        appointment_start=from_date or getdate(today()),
+        end=to_date
+    )
+
+def get_social_workers():
     social_workers = frappe.get_all("User", 
         filters={"role_profile_name": ["like", "%Social Worker%"]},
         fields=["name", "full_name"]
@@ -70,62 +122,56 @@ def get_data(filters):
             FROM `tabCase` 
             WHERE primary_social_worker IS NOT NULL
         """, as_dict=True)
-    
-    month_start = getdate(today()).replace(day=1)
-    week_start = add_months(today(), 0, as_date=True)  # This week
-    
-    for worker in social_workers:
-        if not worker.name:
-            continue
-            
-        # Active cases
-        active_cases = frappe.db.count("Case", {
-            "primary_social_worker": worker.name,
-            "case_status": "Active"
-        })
-        
-        # New cases this month
-        new_cases = frappe.db.count("Case", {
-            "primary_social_worker": worker.name,
-            "creation": [">=", month_start]
-        })
-        
-        # Closed cases this month
-        closed_cases = frappe.db.count("Case", {
-            "primary_social_worker": worker.name,
-            "case_status": "Closed",
-            "modified": [">=", month_start]
-        })
-        
-        # Pending initial assessments
-        pending_assessments = frappe.db.count("Initial Assessment", {
-            "assessed_by": worker.name,
-            "docstatus": 0
-        })
-        
-        # Overdue follow-ups
-        overdue_followups = frappe.db.count("Follow Up Assessment", {
-            "assessed_by": worker.name,
-            "assessment_date": ["<", today()],
-            "docstatus": 0
-        })
-        
-        # Appointments this week
-        appointments_week = frappe.db.count("Appointment", {
-            "primary_social_worker": worker.name,
-            "appointment_date": [">=", week_start],
-            "appointment_status": ["in", ["Scheduled", "Confirmed"]]
-        })
-        
-        if active_cases > 0 or new_cases > 0 or appointments_week > 0:
-            data.append({
-                "primary_social_worker": worker.name,
-                "active_cases": active_cases,
-                "new_cases_this_month": new_cases,
-                "closed_cases_this_month": closed_cases,
-                "pending_assessments": pending_assessments,
-                "overdue_followups": overdue_followups,
-                "appointments_this_week": appointments_week
-            })
-    
-    return data
+
+    return social_workers
+
+def get_case_metrics(period):
+    """Active, new and closed case counts per worker in a single pass over Case"""
+    end_condition = "AND {field} < %(end)s" if period.end else ""
+
+    rows = frappe.db.sql(f"""
+        SELECT
+            primary_social_worker,
+            SUM(case_status = 'Active') AS active_cases,
+            SUM(creation >= %(start)s {end_condition.format(field="creation")}) AS new_cases,
+            SUM(case_status = 'Closed' AND modified >= %(start)s {end_condition.format(field="modified")}) AS closed_cases
+        FROM `tabCase`
+        WHERE primary_social_worker IS NOT NULL
+        GROUP BY primary_social_worker
+    """, {"start": period.case_start, "end": period.end}, as_dict=True)
+
+    return {row.primary_social_worker: row for row in rows}
+
+def get_assessment_metrics():
+    """Pending (draft) Initial Assessments per assessor"""
+    rows = frappe.db.sql("""
+        SELECT assessed_by, COUNT(*)
+        FROM `tabInitial Assessment`
+        WHERE docstatus = 0 AND assessed_by IS NOT NULL
+        GROUP BY assessed_by
+    """)
+    return dict(rows)
+
+def get_followup_metrics():
+    """Draft Follow Up Assessments dated before today per assessor"""
+    rows = frappe.db.sql("""
+        SELECT assessed_by, COUNT(*)
+        FROM `tabFollow Up Assessment`
+        WHERE docstatus = 0 AND assessed_by IS NOT NULL AND assessment_date < %(today)s
+        GROUP BY assessed_by
+    """, {"today": today()})
+    return dict(rows)
+
+def get_appointment_metrics(period):
+    """Scheduled or confirmed appointments in the window per social worker"""
+    end_condition = "AND appointment_date < %(end)s" if period.end else ""
+
+    rows = frappe.db.sql(f"""
+        SELECT social_worker, COUNT(*)
+        FROM `tabAppointment`
+        WHERE social_worker IS NOT NULL
+            AND appointment_status IN ('Scheduled', 'Confirmed')
+            AND appointment_date >= %(start)s {end_condition}
+        GROUP BY social_worker
+    """, {"start": period.appointment_start, "end": period.end})
+    return dict(rows)
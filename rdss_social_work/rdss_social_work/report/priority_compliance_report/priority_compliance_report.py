@@ -2,14 +2,17 @@ import frappe
 from frappe import _
 from frappe.utils import today, getdate, add_months
 
+EXCLUDED_CASE_STATUSES = ("Closed", "Transferred")
+EXCLUDED_APPOINTMENT_STATUSES = ("Cancelled", "No Show")
+
 def execute(filters=None):
     columns = get_columns()
-    data = get_data()
+    data = get_data(filters)
     return columns, data
 
 def get_columns():
     return [
-        {"fieldname": "beneficiary", "label": _("Beneficiary"), "fieldtype": "Link", "options": "Beneficiary", "width": 180},
+        {"fieldname": "beneficiary_family", "label": _("Beneficiary Family"), "fieldtype": "Link", "options": "Beneficiary Family", "width": 180},
         {"fieldname": "case", "label": _("Case"), "fieldtype": "Link", "options": "Case", "width": 150},
         {"fieldname": "priority_code", "label": _("Priority"), "fieldtype": "Data", "width": 80},
         {"fieldname": "frequency", "label": _("Frequency (Months)"), "fieldtype": "Int", "width": 120},
@@ -20,49 +23,86 @@ def get_columns():
         {"fieldname": "status", "label": _("Compliance Status"), "fieldtype": "Data", "width": 150},
     ]
 
-def get_data():
-    today_date = getdate(today())
+def get_case_conditions(filters):
+    """Build the WHERE clause shared by the case query and the appointment semi-join"""
+    # IFNULL keeps cases without a status, as the get_all "not in" filter did
+    conditions = ["IFNULL(c.case_status, '') NOT IN %(excluded_case_statuses)s"]
+    values = {"excluded_case_statuses": EXCLUDED_CASE_STATUSES}
+
+    if filters.get("social_worker"):
+        conditions.append("c.primary_social_worker = %(social_worker)s")
+        values["social_worker"] = filters.get("social_worker")
+
+    if filters.get("priority"):
+        conditions.append("c.case_priority = %(priority)s")
+        values["priority"] = filters.get("priority")
+
+    return " AND ".join(conditions), values
 
-    # Fetch active cases with their appointment frequency
-    cases = frappe.db.get_all(
-        "Case",
-        filters={"case_status": ["not in", ["Closed", "Transferred"]]},
-        fields=["name", "beneficiary", "case_priority", "appointment_frequency"]
+def get_open_cases(conditions, values):
+    return frappe.db.sql(f"""
+        SELECT c.name, c.beneficiary_family, c.case_priority, c.appointment_frequency
+        FROM `tabCase` c
+        WHERE {conditions}
+    """, values, as_dict=True)
+
+def get_priority_map():
+    """Return {case_priority name: Case Priority row} in a single query"""
+    priorities = frappe.get_all(
+        "Case Priority",
+        fields=["name", "priority_code", "appointment_frequency_months"]
     )
+    return {p.name: p for p in priorities}
+
+def get_appointment_bounds(conditions, values, today_date):
+    """
+    Fetch the last and next appointment date of every open case in one
+    grouped pass over the Appointment table.
+
+    Returns:
+        dict: {case: (last_visit, next_visit)}
+    """
+    rows = frappe.db.sql(f"""
+        SELECT
+            a.`case`,
+            MAX(CASE WHEN a.appointment_date <= %(today)s THEN a.appointment_date END) AS last_visit,
+            MIN(CASE WHEN a.appointment_date > %(today)s THEN a.appointment_date END) AS next_visit
+        FROM `tabAppointment` a
+        WHERE IFNULL(a.appointment_status, '') NOT IN %(excluded_appointment_statuses)s
+            AND a.`case` IN (
+                SELECT c.name FROM `tabCase` c WHERE {conditions}
+            )
+        GROUP BY a.`case`
+    """, dict(values, today=today_date, excluded_appointment_statuses=EXCLUDED_APPOINTMENT_STATUSES), as_dict=True)
+
+    return {row.case: (row.last_visit, row.next_visit) for row in rows}
+
+def compute_compliance(cases, priority_map, appointment_bounds, today_date):
+    """Join cases to priorities and appointment bounds in memory and derive compliance rows"""
+    # add_months is relatively expensive; many cases share the same (date, frequency) pair
+    month_offsets = {}
+
+    def shift(date_value, months):
+        key = (date_value, months)
+        if key not in month_offsets:
+            month_offsets[key] = getdate(add_months(date_value, months))
+        return month_offsets[key]
 
     data = []
     for case in cases:
-        frequency = case.appointment_frequency or 0
-
-        last_visit = frappe.db.get_value(
-            "Appointment",
-            {
-                "beneficiary": case.beneficiary,
-                "appointment_date": ("<=", today_date),
-                "appointment_status": ["not in", ["Cancelled", "No Show"]]
-            },
-            "max(appointment_date)"
-        )
-
-        next_visit = frappe.db.get_value(
-            "Appointment",
-            {
-                "beneficiary": case.beneficiary,
-                "appointment_date": (">", today_date),
-                "appointment_status": ["not in", ["Cancelled", "No Show"]]
-            },
-            "min(appointment_date)"
-        )
+        priority = priority_map.get(case.case_priority)
+        frequency = case.appointment_frequency or (priority.appointment_frequency_months if priority else 0) or 0
+        last_visit, next_visit = appointment_bounds.get(case.name, (None, None))
 
         # Compute due date based on last_visit & frequency
         due_date = None
         days_overdue = 0
         status = "Compliant"
         if frequency and last_visit:
-            due_date = add_months(getdate(last_visit), frequency)
+            due_date = shift(getdate(last_visit), frequency)
             if today_date > due_date:
                 status = "Overdue"
-                days_overdue = (today_date - getdate(due_date)).days
+                days_overdue = (today_date - due_date).days
         elif frequency:
             # No past appointment found
             status = "Overdue"
@@ -70,14 +110,14 @@ def get_data():
 
         # If there is a future appointment within frequency window, mark compliant
         if next_visit and frequency:
-            if getdate(next_visit) <= add_months(today_date, frequency):
+            if getdate(next_visit) <= shift(today_date, frequency):
                 status = "Scheduled"
                 days_overdue = 0
 
         data.append({
-            "beneficiary": case.beneficiary,
+            "beneficiary_family": case.beneficiary_family,
             "case": case.name,
-            "priority_code": case.case_priority,
+            "priority_code": priority.priority_code if priority else case.case_priority,
             "frequency": frequency,
             "last_visit": last_visit,
             "next_visit": next_visit,
@@ -86,6 +126,24 @@ def get_data():
             "status": status,
         })
 
+    return data
+
+def get_data(filters=None):
+    filters = frappe._dict(filters or {})
+    today_date = getdate(today())
+
+    conditions, values = get_case_conditions(filters)
+
+    # Three queries regardless of caseload size: cases, priorities, appointment bounds
+    cases = get_open_cases(conditions, values)
+    if not cases:
+        return []
+
+    priority_map = get_priority_map()
+    appointment_bounds = get_appointment_bounds(conditions, values, today_date)
+
+    data = compute_compliance(cases, priority_map, appointment_bounds, today_date)
+
     # Sort: Overdue first by days_overdue desc, then Scheduled, then Compliant
     def sort_key(d):
         if d["status"] == "Overdue":
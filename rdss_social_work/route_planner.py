@@ -0,0 +1,339 @@
+"""
+Home-visit route planning for RDSS Social Work Case Management System
+
+Orders one social worker's home visits for a day so that booked appointment
+times are honoured and travel is kept short.
+
+The problem is a small travelling-salesman problem with time windows:
+
+    * each visit can start no earlier than its appointment_time and should
+      start no later than appointment_time + LATE_TOLERANCE_MINUTES
+    * each visit occupies duration_minutes before the worker can travel on
+    * travel time is estimated from a haversine distance matrix (NumPy),
+      scaled by a road-distance factor and an average travel speed
+
+A route is built with a time-aware nearest-neighbour heuristic and improved
+with 2-opt and single-visit relocation moves. Routes are compared by total
+lateness first and travel time second, so a shorter route never wins by
+making a visit late.
+
+Site config:
+    route_planner_speed_kmh (float): Average door-to-door speed (default 25)
+    route_planner_road_factor (float): Road distance / straight-line distance (default 1.3)
+"""
+
+import math
+
+import frappe
+import numpy as np
+from frappe.utils import flt, getdate, today
+
+from rdss_social_work.spatial_search import EARTH_RADIUS_KM, SEARCH_ROLES
+
+DEFAULT_SPEED_KMH = 25
+DEFAULT_ROAD_FACTOR = 1.3
+DEFAULT_DAY_START = 9 * 60
+LATE_TOLERANCE_MINUTES = 15
+DEFAULT_DURATION_MINUTES = 90
+
+ROUTABLE_STATUSES = ("Scheduled", "Confirmed")
+
+# Lateness is always worse than travel: one late minute outweighs this many travel minutes
+LATENESS_WEIGHT = 1000
+
+
+def haversine_matrix(lats, lngs):
+    """
+    Pairwise great-circle distances in kilometres
+
+    Args:
+        lats, lngs: Sequences of equal length in degrees
+
+    Returns:
+        numpy.ndarray: (n, n) distance matrix
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lng = np.radians(np.asarray(lngs, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def to_minutes(value):
+    """Minutes since midnight for a Time value (timedelta, time or "HH:MM[:SS]"), or None"""
+    if value in (None, ""):
+        return None
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds() / 60
+    if hasattr(value, "hour"):
+        return value.hour * 60 + value.minute + value.second / 60
+
+    parts = [float(p) for p in str(value).split(":")]
+    return parts[0] * 60 + (parts[1] if len(parts) > 1 else 0) + (parts[2] / 60 if len(parts) > 2 else 0)
+
+
+def format_minutes(minutes):
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class RoutePlan:
+    """
+    Time-window aware route over a set of visits
+
+    Node 0 is the starting point; nodes 1..n are the visits. Without a fixed
+    starting point node 0 is a virtual depot with zero travel to every visit.
+    """
+
+    def __init__(self, visits, start=None, speed_kmh=DEFAULT_SPEED_KMH, road_factor=DEFAULT_ROAD_FACTOR,
+                 day_start=DEFAULT_DAY_START, late_tolerance=LATE_TOLERANCE_MINUTES):
+        self.visits = visits
+        n = len(visits)
+
+        lats = [v["latitude"] for v in visits]
+        lngs = [v["longitude"] for v in visits]
+        if start:
+            lats.insert(0, start[0])
+            lngs.insert(0, start[1])
+            self.distance = haversine_matrix(lats, lngs) * road_factor
+        else:
+            self.distance = np.zeros((n + 1, n + 1))
+            self.distance[1:, 1:] = haversine_matrix(lats, lngs) * road_factor
+
+        self.travel = self.distance / speed_kmh * 60
+        self.earliest = np.array([day_start] + [
+            v["appointment_minutes"] if v.get("appointment_minutes") is not None else day_start for v in visits
+        ])
+        self.latest = np.array([math.inf] + [
+            v["appointment_minutes"] + late_tolerance if v.get("appointment_minutes") is not None else math.inf
+            for v in visits
+        ])
+        self.duration = np.array([0] + [v.get("duration_minutes") or DEFAULT_DURATION_MINUTES for v in visits])
+
+        # Plain lists are much faster than NumPy scalars inside the per-move evaluation loop
+        self._travel = self.travel.tolist()
+        self._earliest = self.earliest.tolist()
+        self._latest = self.latest.tolist()
+        self._duration = self.duration.tolist()
+
+    def evaluate(self, route):
+        """
+        Simulate a route (visit node indices, depot excluded)
+
+        The worker leaves the start just in time to reach the first visit when
+        its window opens, waits whenever they arrive early, and starts each
+        visit as soon as both they and the window allow.
+
+        Returns:
+            tuple: (lateness_minutes, travel_minutes)
+        """
+        travel, earliest, latest, duration = self._travel, self._earliest, self._latest, self._duration
+        if not route:
+            return 0.0, 0.0
+
+        first = route[0]
+        total_travel = travel[0][first]
+        time = earliest[first]
+        lateness = 0.0
+        previous = first
+
+        for node in route[1:]:
+            time += duration[previous] + travel[previous][node]
+            total_travel += travel[previous][node]
+            if time < earliest[node]:
+                time = earliest[node]
+            elif time > latest[node]:
+                lateness += time - latest[node]
+            previous = node
+
+        return lateness, total_travel
+
+    def cost(self, route):
+        lateness, total_travel = self.evaluate(route)
+        return lateness * LATENESS_WEIGHT + total_travel
+
+    def nearest_neighbour(self):
+        """
+        Build a route by repeatedly moving to the visit that can start soonest
+
+        Ties (visits whose window opens before the worker could arrive) are
+        broken by travel time, which is where the distance matrix matters.
+        """
+        travel, earliest, duration = self._travel, self._earliest, self._duration
+        unvisited = set(range(1, len(self.visits) + 1))
+        route = []
+        current, time = 0, None
+
+        while unvisited:
+            def start_time(node):
+                arrival = earliest[node] if time is None else time + duration[current] + travel[current][node]
+                return max(arrival, earliest[node]), travel[current][node]
+
+            node = min(unvisited, key=start_time)
+            time = start_time(node)[0]
+            route.append(node)
+            unvisited.remove(node)
+            current = node
+
+        return route
+
+    def two_opt(self, route, max_passes=50):
+        """
+        Improve a route with 2-opt moves until no move lowers the cost
+
+        Reversing a segment rarely helps once booked visits pin parts of the
+        day in place, so each pass also tries relocating single visits (the
+        Or-opt move), which is what usually repairs a late visit.
+        """
+        best = list(route)
+        best_cost = self.cost(best)
+
+        for _ in range(max_passes):
+            improved = False
+
+            for i in range(len(best) - 1):
+                for j in range(i + 1, len(best)):
+                    candidate = best[:i] + best[i:j + 1][::-1] + best[j + 1:]
+                    candidate_cost = self.cost(candidate)
+                    if candidate_cost < best_cost - 1e-9:
+                        best, best_cost = candidate, candidate_cost
+                        improved = True
+
+            for i in range(len(best)):
+                node = best[i]
+                rest = best[:i] + best[i + 1:]
+                for j in range(len(rest) + 1):
+                    if j == i:
+                        continue
+                    candidate = rest[:j] + [node] + rest[j:]
+                    candidate_cost = self.cost(candidate)
+                    if candidate_cost < best_cost - 1e-9:
+                        best, best_cost = candidate, candidate_cost
+                        improved = True
+                        break
+
+            if not improved:
+                break
+
+        return best
+
+    def solve(self):
+        """Return the improved route as visit node indices"""
+        return self.two_opt(self.nearest_neighbour())
+
+    def itinerary(self, route):
+        """Timed stop list for a route"""
+        stops = []
+        time, previous = None, 0
+
+        for order, node in enumerate(route, start=1):
+            visit = self.visits[node - 1]
+            travel_minutes = self._travel[previous][node]
+            arrival = self._earliest[node] if time is None else time + travel_minutes
+            start = max(arrival, self._earliest[node])
+            late = max(0.0, start - self._latest[node])
+            time = start + self._duration[node]
+
+            stops.append({
+                "order": order,
+                "appointment": visit.get("name"),
+                "beneficiary": visit.get("beneficiary"),
+                "beneficiary_name": visit.get("beneficiary_name"),
+                "latitude": visit["latitude"],
+                "longitude": visit["longitude"],
+                "appointment_time": format_minutes(visit["appointment_minutes"])
+                if visit.get("appointment_minutes") is not None else None,
+                "travel_km": round(float(self.distance[previous][node]), 2),
+                "travel_minutes": round(travel_minutes),
+                "arrival": format_minutes(arrival),
+                "start": format_minutes(start),
+                "end": format_minutes(time),
+                "wait_minutes": round(start - arrival),
+                "late_minutes": round(late),
+            })
+            previous = node
+
+        return stops
+
+
+def get_day_visits(social_worker, date):
+    """
+    Home visits for one worker and day with the coordinates to route them
+
+    Coordinates come from the beneficiary's family address, falling back to
+    the beneficiary's own address.
+    """
+    return frappe.db.sql("""
+        SELECT
+            a.name, a.beneficiary, a.appointment_time, a.duration_minutes,
+            b.beneficiary_name,
+            COALESCE(NULLIF(f.latitude, 0), NULLIF(b.latitude, 0)) AS latitude,
+            COALESCE(NULLIF(f.longitude, 0), NULLIF(b.longitude, 0)) AS longitude
+        FROM `tabAppointment` a
+        LEFT JOIN `tabBeneficiary` b ON b.name = a.beneficiary
+        LEFT JOIN `tabBeneficiary Family` f ON f.name = b.beneficiary_family
+        WHERE a.social_worker = %(social_worker)s
+            AND a.appointment_date = %(date)s
+            AND a.appointment_status IN %(statuses)s
+            AND (a.appointment_type = 'Home Visit' OR a.location_type = 'Home Visit')
+        ORDER BY a.appointment_time
+    """, {"social_worker": social_worker, "date": date, "statuses": ROUTABLE_STATUSES}, as_dict=True)
+
+
+@frappe.whitelist()
+def plan_route(social_worker=None, date=None, start_latitude=None, start_longitude=None):
+    """
+    Plan the order of a social worker's home visits for a day
+
+    Args:
+        social_worker (str, optional): User (default: current user)
+        date (str, optional): Visit date (default: today)
+        start_latitude, start_longitude (float, optional): Where the day starts, e.g. the office
+
+    Returns:
+        dict: {stops, unlocated, total_km, total_travel_minutes, total_late_minutes}
+    """
+    social_worker = social_worker or frappe.session.user
+    if social_worker != frappe.session.user:
+        frappe.only_for(SEARCH_ROLES)
+
+    date = getdate(date or today())
+    visits = get_day_visits(social_worker, date)
+
+    located = []
+    unlocated = []
+    for visit in visits:
+        if visit.latitude is None or visit.longitude is None:
+            unlocated.append(visit.name)
+            continue
+        visit.appointment_minutes = to_minutes(visit.appointment_time)
+        visit.latitude, visit.longitude = flt(visit.latitude), flt(visit.longitude)
+        located.append(visit)
+
+    start = None
+    if start_latitude not in (None, "") and start_longitude not in (None, ""):
+        start = (flt(start_latitude), flt(start_longitude))
+
+    if not located:
+        return {"stops": [], "unlocated": unlocated, "total_km": 0, "total_travel_minutes": 0, "total_late_minutes": 0}
+
+    plan = RoutePlan(
+        located,
+        start=start,
+        speed_kmh=flt(frappe.conf.get("route_planner_speed_kmh")) or DEFAULT_SPEED_KMH,
+        road_factor=flt(frappe.conf.get("route_planner_road_factor")) or DEFAULT_ROAD_FACTOR,
+    )
+    route = plan.solve()
+    stops = plan.itinerary(route)
+    lateness, total_travel = plan.evaluate(route)
+
+    return {
+        "social_worker": social_worker,
+        "date": str(date),
+        "stops": stops,
+        "unlocated": unlocated,
+        "total_km": round(sum(stop["travel_km"] for stop in stops), 2),
+        "total_travel_minutes": round(total_travel),
+        "total_late_minutes": round(lateness),
+    }
@@ -0,0 +1,324 @@
+"""
+Appointment scheduling-conflict engine for RDSS Social Work Case Management System
+
+A worker's appointments for a window are loaded with one query and placed
+in an interval tree keyed by start/end datetime (end = start +
+duration_minutes). For each appointment checked, the tree returns only the
+appointments near it in time, and each candidate is then classified:
+
+    * overlap: the two appointments share time
+    * travel:  they do not overlap, but the gap between them is shorter than
+               the travel time needed between their locations
+
+Travel time is estimated from the beneficiaries' coordinates when both visits
+are located, otherwise a default buffer applies whenever either appointment
+is away from the office. Phone and video appointments never need travel.
+
+Site config:
+    appointment_travel_buffer_minutes (int): Default travel buffer (default 30)
+"""
+
+import math
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, cint, get_datetime, getdate
+
+from rdss_social_work.route_planner import DEFAULT_ROAD_FACTOR, DEFAULT_SPEED_KMH
+from rdss_social_work.spatial_search import SEARCH_ROLES, haversine_km
+
+DEFAULT_TRAVEL_BUFFER_MINUTES = 30
+MAX_TRAVEL_MINUTES = 120
+
+# Appointments in these states no longer occupy the worker's time
+INACTIVE_STATUSES = ("Cancelled", "No Show", "Completed", "Rescheduled")
+
+OFFSITE_LOCATIONS = ("Home Visit", "Community Center", "Hospital", "School")
+REMOTE_LOCATIONS = ("Phone", "Video Call")
+REMOTE_TYPES = ("Phone Consultation", "Video Call")
+
+# Fields whose change can create or remove a conflict
+SCHEDULING_FIELDS = (
+    "social_worker", "appointment_date", "appointment_time", "duration_minutes",
+    "appointment_status", "appointment_type", "location_type", "beneficiary",
+)
+
+
+class IntervalTree:
+    """
+    Static interval tree over half-open [start, end) intervals
+
+    Intervals are sorted by start and viewed as an implicit balanced binary
+    tree (the middle element of each range is the node); every node stores
+    the largest end in its subtree, so whole subtrees that finish before the
+    query window are skipped.
+    """
+
+    def __init__(self, intervals):
+        self.items = sorted(intervals, key=lambda item: item[0])
+        self.max_end = [None] * len(self.items)
+        self._build(0, len(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self.items[mid][1]
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self.max_end[mid] = max_end
+        return max_end
+
+    def overlapping(self, start, end):
+        """Return the payloads of every interval overlapping [start, end)"""
+        found = []
+        stack = [(0, len(self.items))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                continue
+
+            stack.append((lo, mid))
+            item_start, item_end, payload = self.items[mid]
+            if item_start < end:
+                if item_end > start:
+                    found.append(payload)
+                # Everything to the right starts even later and may still overlap
+                stack.append((mid + 1, hi))
+        return found
+
+
+def get_default_buffer():
+    buffer = frappe.conf.get("appointment_travel_buffer_minutes")
+    return DEFAULT_TRAVEL_BUFFER_MINUTES if buffer is None else cint(buffer)
+
+
+def is_remote(appointment):
+    return appointment.get("location_type") in REMOTE_LOCATIONS or appointment.get("appointment_type") in REMOTE_TYPES
+
+
+def is_offsite(appointment):
+    return appointment.get("location_type") in OFFSITE_LOCATIONS or appointment.get("appointment_type") == "Home Visit"
+
+
+def required_gap(first, second, default_buffer):
+    """Minutes the worker needs between two appointments to get from one to the other"""
+    if is_remote(first) or is_remote(second):
+        return 0
+    if not (is_offsite(first) or is_offsite(second)):
+        return 0
+
+    if first.get("latitude") and second.get("latitude"):
+        distance = haversine_km(first.latitude, first.longitude, second.latitude, second.longitude)
+        return min(MAX_TRAVEL_MINUTES, math.ceil(distance * DEFAULT_ROAD_FACTOR / DEFAULT_SPEED_KMH * 60))
+
+    return default_buffer
+
+
+def prepare(appointment):
+    """Attach start/end datetimes; returns False for appointments without a time"""
+    if not appointment.get("appointment_date") or appointment.get("appointment_time") in (None, ""):
+        return False
+
+    appointment.start = get_datetime(f"{getdate(appointment.appointment_date)} {appointment.appointment_time}")
+    appointment.end = appointment.start + timedelta(minutes=cint(appointment.get("duration_minutes")) or 60)
+    return True
+
+
+class ConflictIndex:
+    """Interval tree over one worker's appointments with overlap/travel classification"""
+
+    def __init__(self, appointments, default_buffer=None):
+        self.default_buffer = get_default_buffer() if default_buffer is None else default_buffer
+        self.window = timedelta(minutes=max(self.default_buffer, MAX_TRAVEL_MINUTES))
+        self.tree = IntervalTree([(a.start, a.end, a) for a in appointments if a.get("start")])
+
+    def conflicts_for(self, appointment, ignore=None):
+        """
+        Conflicts of one appointment against the indexed appointments
+
+        Args:
+            appointment (dict): Prepared appointment (see prepare())
+            ignore (set, optional): Appointment names/ids to skip (e.g. the appointment itself)
+
+        Returns:
+            list: [{with, start, end, kind, overlap_minutes | gap_minutes, required_gap_minutes}]
+        """
+        ignore = ignore or set()
+        conflicts = []
+
+        for other in self.tree.overlapping(appointment.start - self.window, appointment.end + self.window):
+            if other is appointment or other.get("key") in ignore:
+                continue
+
+            conflict = {
+                "with": other.get("name") or other.get("key"),
+                "appointment_type": other.get("appointment_type"),
+                "start": str(other.start),
+                "end": str(other.end),
+            }
+
+            if other.start < appointment.end and other.end > appointment.start:
+                overlap = min(appointment.end, other.end) - max(appointment.start, other.start)
+                conflict.update(kind="overlap", overlap_minutes=round(overlap.total_seconds() / 60))
+            else:
+                earlier, later = (other, appointment) if other.end <= appointment.start else (appointment, other)
+                gap = round((later.start - earlier.end).total_seconds() / 60)
+                needed = required_gap(earlier, later, self.default_buffer)
+                if gap >= needed:
+                    continue
+                conflict.update(kind="travel", gap_minutes=gap, required_gap_minutes=needed)
+
+            conflicts.append(conflict)
+
+        return sorted(conflicts, key=lambda c: c["start"])
+
+
+def load_appointments(social_workers, from_date, to_date):
+    """
+    Active appointments for one or more workers in a date range, with coordinates
+
+    Returns:
+        dict: {social_worker: [appointment, ...]}
+    """
+    rows = frappe.db.sql("""
+        SELECT
+            a.name, a.social_worker, a.appointment_date, a.appointment_time, a.duration_minutes,
+            a.appointment_type, a.location_type, a.beneficiary,
+            COALESCE(NULLIF(f.latitude, 0), NULLIF(b.latitude, 0)) AS latitude,
+            COALESCE(NULLIF(f.longitude, 0), NULLIF(b.longitude, 0)) AS longitude
+        FROM `tabAppointment` a
+        LEFT JOIN `tabBeneficiary` b ON b.name = a.beneficiary
+        LEFT JOIN `tabBeneficiary Family` f ON f.name = b.beneficiary_family
+        WHERE a.social_worker IN %(social_workers)s
+            AND a.appointment_date BETWEEN %(from_date)s AND %(to_date)s
+            AND a.appointment_status NOT IN %(inactive)s
+            AND a.appointment_time IS NOT NULL
+    """, {
+        "social_workers": tuple(social_workers),
+        "from_date": from_date,
+        "to_date": to_date,
+        "inactive": INACTIVE_STATUSES,
+    }, as_dict=True)
+
+    by_worker = {}
+    for row in rows:
+        row.key = row.name
+        if prepare(row):
+            by_worker.setdefault(row.social_worker, []).append(row)
+    return by_worker
+
+
+def get_location(beneficiary):
+    """Coordinates for a beneficiary's home, preferring the family address"""
+    if not beneficiary:
+        return None, None
+
+    row = frappe.db.sql("""
+        SELECT
+            COALESCE(NULLIF(f.latitude, 0), NULLIF(b.latitude, 0)) AS latitude,
+            COALESCE(NULLIF(f.longitude, 0), NULLIF(b.longitude, 0)) AS longitude
+        FROM `tabBeneficiary` b
+        LEFT JOIN `tabBeneficiary Family` f ON f.name = b.beneficiary_family
+        WHERE b.name = %s
+    """, beneficiary, as_dict=True)
+    return (row[0].latitude, row[0].longitude) if row else (None, None)
+
+
+def find_conflicts(doc):
+    """
+    Conflicts for a single Appointment document against the worker's other appointments
+
+    Only the worker's appointments on the same day (plus neighbouring days, for
+    travel buffers around midnight) are loaded.
+    """
+    appointment = frappe._dict(doc.as_dict())
+    appointment.key = doc.name
+    if not doc.social_worker or not prepare(appointment):
+        return []
+
+    appointment.latitude, appointment.longitude = get_location(doc.beneficiary)
+    date = getdate(doc.appointment_date)
+    existing = load_appointments([doc.social_worker], add_days(date, -1), add_days(date, 1))
+
+    index = ConflictIndex(existing.get(doc.social_worker, []))
+    return index.conflicts_for(appointment, ignore={doc.name})
+
+
+@frappe.whitelist()
+def check_schedule(schedule, social_worker=None):
+    """
+    Check a batch of proposed appointments (e.g. a whole week) in one call
+
+    Proposed appointments are checked against the workers' existing
+    appointments and against each other. A proposal carrying the name of an
+    existing appointment replaces it (rescheduling).
+
+    Args:
+        schedule (list | str): Proposed appointments, each with appointment_date,
+            appointment_time and optionally id/name, social_worker, duration_minutes,
+            appointment_type, location_type and beneficiary
+        social_worker (str, optional): Worker for proposals that do not name one (default: current user)
+
+    Returns:
+        list: [{id, conflicts: [...]}] in the order given
+    """
+    schedule = frappe.parse_json(schedule) if isinstance(schedule, str) else schedule
+    social_worker = social_worker or frappe.session.user
+
+    proposals = []
+    for position, item in enumerate(schedule or []):
+        proposal = frappe._dict(item)
+        proposal.social_worker = proposal.social_worker or social_worker
+        proposal.key = proposal.get("name") or proposal.get("id") or f"proposal-{position}"
+        if not prepare(proposal):
+            frappe.throw(f"Proposed appointment {proposal.key} needs an appointment date and time")
+        proposals.append(proposal)
+
+    if not proposals:
+        return []
+
+    if any(p.social_worker != frappe.session.user for p in proposals):
+        frappe.only_for(SEARCH_ROLES)
+
+    # Coordinates of every proposed beneficiary in one query
+    beneficiaries = {p.beneficiary for p in proposals if p.get("beneficiary")}
+    if beneficiaries:
+        locations = {
+            row.name: row for row in frappe.db.sql("""
+                SELECT
+                    b.name,
+                    COALESCE(NULLIF(f.latitude, 0), NULLIF(b.latitude, 0)) AS latitude,
+                    COALESCE(NULLIF(f.longitude, 0), NULLIF(b.longitude, 0)) AS longitude
+                FROM `tabBeneficiary` b
+                LEFT JOIN `tabBeneficiary Family` f ON f.name = b.beneficiary_family
+                WHERE b.name IN %(names)s
+            """, {"names": tuple(beneficiaries)}, as_dict=True)
+        }
+        for proposal in proposals:
+            location = locations.get(proposal.get("beneficiary"))
+            if location:
+                proposal.latitude, proposal.longitude = location.latitude, location.longitude
+
+    workers = {p.social_worker for p in proposals}
+    from_date = add_days(min(p.start.date() for p in proposals), -1)
+    to_date = add_days(max(p.start.date() for p in proposals), 1)
+    existing = load_appointments(workers, from_date, to_date)
+
+    proposed_names = {p.key for p in proposals}
+    results = {}
+    for worker in workers:
+        worker_proposals = [p for p in proposals if p.social_worker == worker]
+        kept = [a for a in existing.get(worker, []) if a.key not in proposed_names]
+        index = ConflictIndex(kept + worker_proposals)
+        for proposal in worker_proposals:
+            results[proposal.key] = index.conflicts_for(proposal)
+
+    return [{"id": p.key, "conflicts": results[p.key]} for p in proposals]
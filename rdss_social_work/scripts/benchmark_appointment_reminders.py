@@ -0,0 +1,136 @@
+"""
+Benchmark the batched appointment reminder dispatcher
+
+Seeds beneficiaries and appointments two days ahead (inside the 72-hour
+horizon, as if just booked) and runs both the old one-appointment-at-a-time
+flow (get_doc plus two get_value calls and a fresh template compile per
+email) and the hourly reminder scheduler.
+Background jobs run inline, emails are counted instead of queued, and
+everything is rolled back.
+
+A second run of the scheduler checks retries: after some reminders are
+marked Failed and others are left Queued by a job that died, it must send
+exactly those again, but not reminders that are Abandoned or out of
+attempts. A third run checks idempotency: it must send nothing.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_appointment_reminders.run
+    bench execute rdss_social_work.scripts.benchmark_appointment_reminders.run --kwargs "{'appointments': 5000}"
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import now_datetime
+
+from rdss_social_work.rdss_social_work.notifications import appointment_notification
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+
+def seed(appointments):
+    start = now_datetime() + timedelta(hours=48)
+    bulk_seed(
+        "Beneficiary",
+        ["beneficiary_name", "mobile_number", "address_line_1", "postal_code"],
+        [(f"BENCH-BEN-{i:06d}", f"Bench Beneficiary {i}", "91234567", f"Blk {i} Bench Road", "520123")
+         for i in range(appointments)],
+    )
+    bulk_seed(
+        "Appointment",
+        ["beneficiary", "appointment_date", "appointment_time", "appointment_type", "appointment_status", "social_worker"],
+        [(f"BENCH-APT-{i:06d}", f"BENCH-BEN-{i:06d}", start.date(), start.strftime("%H:%M:%S"), "Home Visit", "Scheduled", "Administrator")
+         for i in range(appointments)],
+    )
+    return start
+
+
+def legacy_send(names):
+    """The per-appointment flow the dispatcher replaced"""
+    for name in names:
+        doc = frappe.get_doc("Appointment", name)
+        email = frappe.db.get_value("User", doc.social_worker, "email")
+        beneficiary_name = frappe.db.get_value("Beneficiary", doc.beneficiary, "beneficiary_name")
+        with open(appointment_notification.TEMPLATE_PATH) as f:
+            message = frappe.render_template(f.read(), {"doc": doc, "site_url": ""})
+        frappe.sendmail(recipients=email, subject=f"Reminder: Appointment with {beneficiary_name}", message=message)
+
+
+def run_inline(method, queue=None, job_id=None, deduplicate=False, **kwargs):
+    """Stand-in for frappe.enqueue that runs the job immediately"""
+    return frappe.get_attr(method)(**kwargs)
+
+
+def simulate_failures(names, horizon="72h", count=10):
+    """
+    Mark reminders Failed and due for a retry, stale Queued (a dead job's
+    claims), Abandoned, and Failed with no attempts left, `count` of each
+
+    Returns:
+        int: Reminders the next run should send again
+    """
+    keys = [appointment_notification.get_reminder_key(name, horizon) for name in names[:4 * count]]
+    past = now_datetime() - appointment_notification.STALE_CLAIM - timedelta(minutes=1)
+    doctype = appointment_notification.REMINDER_LOG_DOCTYPE
+
+    frappe.db.set_value(doctype, {"name": ["in", keys[:count]]}, {
+        "status": "Failed", "next_retry_on": past,
+    }, update_modified=False)
+    frappe.db.set_value(doctype, {"name": ["in", keys[count:2 * count]]}, {
+        "status": "Queued", "modified": past,
+    }, update_modified=False)
+    frappe.db.set_value(doctype, {"name": ["in", keys[2 * count:3 * count]]}, {
+        "status": "Abandoned", "error": appointment_notification.NO_RECIPIENT_ERROR,
+    }, update_modified=False)
+    frappe.db.set_value(doctype, {"name": ["in", keys[3 * count:]]}, {
+        "status": "Failed", "next_retry_on": past, "attempts": appointment_notification.MAX_ATTEMPTS,
+    }, update_modified=False)
+    return 2 * count
+
+
+def run(appointments=2000):
+    """Compare query counts and timings of the old and batched reminder flows"""
+    sent = []
+    results = []
+
+    try:
+        start = seed(appointments)
+        names = [f"BENCH-APT-{i:06d}" for i in range(appointments)]
+
+        with patch.object(frappe, "sendmail", side_effect=lambda **kwargs: sent.append(kwargs)), \
+                patch.object(frappe, "enqueue", side_effect=run_inline), \
+                patch.object(frappe.db, "commit"):
+
+            with count_queries() as legacy:
+                legacy_send(names)
+            results.append(("One at a time", len(sent), legacy.queries, f"{legacy.elapsed:.2f}s"))
+
+            sent.clear()
+            with count_queries() as batched:
+                appointment_notification.send_appointment_reminders()
+            results.append(("Batched", len(sent), batched.queries, f"{batched.elapsed:.2f}s"))
+
+            retried = simulate_failures(names)
+            sent.clear()
+            with count_queries() as retry:
+                appointment_notification.send_appointment_reminders()
+            results.append(("Batched, retry", len(sent), retry.queries, f"{retry.elapsed:.2f}s"))
+
+            sent.clear()
+            with count_queries() as rerun:
+                appointment_notification.send_appointment_reminders()
+            results.append(("Batched, rerun", len(sent), rerun.queries, f"{rerun.elapsed:.2f}s"))
+    finally:
+        frappe.db.rollback()
+
+    print(f"{appointments} appointments at {start:%Y-%m-%d %H:%M}")
+    print_table(["Flow", "Emails", "Queries", "Elapsed"], results)
+
+    assert results[2][1] == retried, f"retry sent {results[2][1]} reminders, expected {retried}"
+    assert not results[3][1], f"rerun sent {results[3][1]} duplicate reminders"
+    print(f"\nOK: retry resent {retried} failed or stale reminders and skipped abandoned ones, rerun sent no duplicates")
+    return results
+
+
+if __name__ == "__main__":
+    run()
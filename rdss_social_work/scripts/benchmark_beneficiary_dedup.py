@@ -0,0 +1,88 @@
+"""
+Benchmark fuzzy duplicate detection over Beneficiary
+
+Seeds synthetic beneficiaries, one in fifty of them a planted duplicate
+(a typo, reordered name tokens or a different letter case, some without
+their NRIC), then times the batch clustering of the whole registry and the
+per-save check, and reports how many planted duplicates were found.
+Everything is rolled back afterwards.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_dedup.run
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_dedup.run --kwargs "{'beneficiaries': 50000}"
+"""
+
+import random
+
+import frappe
+
+from rdss_social_work.beneficiary_dedup import DEDUP_FIELDS, find_duplicate_clusters, find_possible_duplicates
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table, timed
+
+SYLLABLES = ["an", "bo", "chi", "de", "fa", "gu", "hui", "jin", "ka", "li", "mei", "na",
+             "ong", "pi", "ra", "si", "tan", "wei", "xin", "yu", "zhi"]
+
+
+def make_beneficiaries(count, rng):
+    rows, planted = [], []
+    for i in range(count):
+        name = f"BENCH-DEDUP-{i:06d}"
+        if i % 50 == 49:
+            source = rows[rng.randrange(len(rows))]
+            tokens = source["beneficiary_name"].split()
+            variant = rng.choice([
+                " ".join(reversed(tokens)),
+                source["beneficiary_name"].upper(),
+                source["beneficiary_name"][:-1],
+            ])
+            rows.append(dict(source, name=name, beneficiary_name=variant,
+                             bc_nric_no=source["bc_nric_no"] if rng.random() < 0.5 else ""))
+            planted.append((source["name"], name))
+            continue
+
+        rows.append({
+            "name": name,
+            "beneficiary_name": " ".join(
+                "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title()
+                for _ in range(rng.randint(2, 3))
+            ),
+            "bc_nric_no": f"T{rng.randrange(10 ** 7):07d}B" if rng.random() < 0.6 else "",
+            "date_of_birth": f"{rng.randint(1940, 2020)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "postal_code": f"{rng.randint(10000, 829999):06d}" if rng.random() < 0.9 else "",
+            "mobile_number": f"9{rng.randrange(10 ** 7):07d}",
+        })
+    return rows, planted
+
+
+def run(beneficiaries=20000, checks=200):
+    """Time batch clustering and the per-save check on a seeded registry"""
+    rng = random.Random(42)
+    rows, planted = make_beneficiaries(beneficiaries, rng)
+    results = []
+
+    bulk_seed("Beneficiary", DEDUP_FIELDS, [(row["name"],) + tuple(row[field] for field in DEDUP_FIELDS) for row in rows])
+    try:
+        with timed() as batch:
+            clusters = find_duplicate_clusters()
+        cluster_of = {member: position for position, cluster in enumerate(clusters) for member in cluster["members"]}
+        found = sum(1 for a, b in planted if a in cluster_of and cluster_of[a] == cluster_of.get(b))
+        results.append(("Batch clustering", 1, f"{batch.elapsed:.2f}s", f"{found}/{len(planted)} planted found"))
+
+        sample = [frappe._dict(row, name=None) for row in rng.sample(rows, checks)]
+        with count_queries() as per_save:
+            for row in sample:
+                find_possible_duplicates(row)
+        results.append((
+            "Per-save check", f"{per_save.queries / checks:.0f}",
+            f"{per_save.elapsed / checks * 1000:.2f} ms", "per new record",
+        ))
+    finally:
+        frappe.db.rollback()
+
+    print(f"{beneficiaries} beneficiaries, {len(planted)} planted duplicates")
+    print_table(["Check", "Queries", "Elapsed", "Result"], results)
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""
+Benchmark the bulk beneficiary import engine against the original importer
+
+Writes a synthetic registry CSV, then imports it with the original
+importer in test mode (its per-row existence checks, no saves), with the
+bulk engine in dry-run mode and with the bulk engine writing to the
+database. The writing run has its per-chunk commits disabled and is rolled
+back, so the benchmark is safe to run on a development site.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_import.run
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_import.run --kwargs "{'rows': 20000}"
+"""
+
+import csv
+import os
+import tempfile
+from unittest.mock import patch
+
+import frappe
+
+from rdss_social_work.scripts import beneficiary_import_engine, import_beneficiaries
+from rdss_social_work.scripts.benchmark_utils import count_queries, print_table
+
+HEADER = [
+    "Name", "Gender", "DOB", "BC / NRIC no.", "Diagnosis", "Date of Registration", "Address",
+    "Postal Code", "Contact", "Email", "Parent's name", "Beneficiary Relationship", "Status",
+]
+
+
+def write_registry(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow([
+                f"Bench Beneficiary {i}", "MF"[i % 2], f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{2000 + i % 20}",
+                f"T{i:07d}Z", "Bench Diagnosis", "01/03/2024", f"{i} Bench Street", f"{100000 + i}",
+                f"9{i:07d}", f"bench{i}@example.org", f"Bench Parent {i}" if i % 2 else "",
+                ("Mother", "Father")[i % 2], "Active",
+            ])
+
+
+def check_imported(label, stats, rows):
+    """A timing only counts if the run imported every row"""
+    imported = stats.get("successful_imports", 0)
+    assert imported == rows, f"{label} imported {imported} of {rows} rows: {stats.get('error') or stats.get('errors')[:3]}"
+
+
+def run(rows=2000, chunk_size=500):
+    """Compare queries and elapsed time of the original and bulk imports"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench_registry.csv")
+        write_registry(path, rows)
+
+        with patch.object(frappe, "msgprint"), patch("builtins.print"):
+            with count_queries() as legacy:
+                stats = import_beneficiaries.import_beneficiaries(path, test_mode=True)
+            check_imported("Original importer", stats, rows)
+            results.append(("Original importer, test mode", legacy.queries, f"{legacy.elapsed:.2f}s"))
+
+            with count_queries() as dry_run:
+                stats = beneficiary_import_engine.import_beneficiaries_bulk(path, dry_run=True, chunk_size=chunk_size)
+            check_imported("Bulk engine dry run", stats, rows)
+            results.append(("Bulk engine, dry run", dry_run.queries, f"{dry_run.elapsed:.2f}s"))
+
+            try:
+                with patch.object(frappe.db, "commit"), count_queries() as bulk:
+                    stats = beneficiary_import_engine.import_beneficiaries_bulk(
+                        path, chunk_size=chunk_size, geocode=False
+                    )
+                check_imported("Bulk engine", stats, rows)
+                results.append((f"Bulk engine, {chunk_size} rows per chunk", bulk.queries, f"{bulk.elapsed:.2f}s"))
+            finally:
+                frappe.db.rollback()
+
+    print(f"{rows} registry rows, half with a parent/guardian")
+    print_table(["Import", "Queries", "Elapsed"], results)
+    print(f"\nOK: every run imported all {rows} rows")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,122 @@
+"""
+Benchmark the Beneficiary form's related-record loading
+
+Seeds one beneficiary with hundreds of linked cases, appointments,
+assessments, service plans and documents, then loads the form's panels the
+old way (one whitelisted call per panel, as beneficiary.js used to do) and
+with get_beneficiary_overview, both on a summary cache miss and on a hit.
+All seeded rows are rolled back.
+
+Server time is measured; the network is modelled. The browser sends the
+form's frappe.call requests in parallel over at most `connections`
+connections, so the last panel arrives after ceil(requests / connections)
+round trips of `rtt_ms` on top of the server time. That is the time to
+first paint of a fully loaded form.
+
+A cache miss rolls back to start a fresh snapshot; that rollback is
+disabled while measuring, so the seeded rows stay visible.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_overview.run
+    bench execute rdss_social_work.scripts.benchmark_beneficiary_overview.run --kwargs "{'records': 1000, 'rtt_ms': 80}"
+"""
+
+import math
+import random
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import add_days, today
+
+from rdss_social_work.beneficiary_summary_cache import bump_versions
+from rdss_social_work.rdss_social_work.doctype.beneficiary import beneficiary_queries
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+BENEFICIARY = "BENCH-OVERVIEW-BEN"
+FAMILY = "BENCH-OVERVIEW-FAM"
+
+
+def seed(records):
+    """One family and beneficiary with `records` rows of each linked doctype"""
+    dates = [add_days(today(), random.randint(-720, 180)) for _ in range(records)]
+
+    bulk_seed("Beneficiary Family", ["family_name", "family_head"], [(FAMILY, "Bench Overview Family", BENEFICIARY)])
+    bulk_seed("Beneficiary", ["beneficiary_name", "beneficiary_family", "family_relationship"], [
+        (BENEFICIARY, "Bench Overview", FAMILY, "Head of Family"),
+    ] + [(f"{BENEFICIARY}-{i:02d}", f"Bench Overview Member {i}", FAMILY, "Child") for i in range(10)])
+
+    bulk_seed("Case", ["case_title", "beneficiary_family", "case_status", "case_opened_date"], [
+        (f"BENCH-OVERVIEW-CASE-{i:05d}", f"Case {i}", FAMILY, random.choice(["Open", "Active", "Closed"]), dates[i])
+        for i in range(records)
+    ])
+    bulk_seed("Appointment", ["beneficiary", "appointment_date", "appointment_time", "appointment_status"], [
+        (f"BENCH-OVERVIEW-APT-{i:05d}", BENEFICIARY, dates[i], "10:00:00", "Scheduled") for i in range(records)
+    ])
+    bulk_seed("Initial Assessment", ["beneficiary", "client_name", "assessment_date"], [
+        (f"BENCH-OVERVIEW-IA-{i:05d}", BENEFICIARY, "Bench Overview", dates[i]) for i in range(records)
+    ])
+    bulk_seed("Follow Up Assessment", ["beneficiary", "assessment_date"], [
+        (f"BENCH-OVERVIEW-FUA-{i:05d}", BENEFICIARY, dates[i]) for i in range(records)
+    ])
+    bulk_seed("Service Plan", ["beneficiary", "plan_title", "effective_date", "plan_status"], [
+        (f"BENCH-OVERVIEW-SP-{i:05d}", BENEFICIARY, f"Plan {i}", dates[i], "Active") for i in range(records)
+    ])
+    bulk_seed("Document Attachment", ["beneficiary", "document_title", "upload_date"], [
+        (f"BENCH-OVERVIEW-DOC-{i:05d}", BENEFICIARY, f"Document {i}", dates[i]) for i in range(records)
+    ])
+
+
+def load_per_panel():
+    """The calls beneficiary.js made on every refresh before the overview endpoint"""
+    beneficiary_queries.get_beneficiary_cases(BENEFICIARY)
+    beneficiary_queries.get_beneficiary_closed_cases(BENEFICIARY)
+    beneficiary_queries.get_beneficiary_appointments(BENEFICIARY, upcoming=True)
+    beneficiary_queries.get_beneficiary_appointments(BENEFICIARY, upcoming=False)
+    beneficiary_queries.get_beneficiary_assessments("Bench Overview")
+    beneficiary_queries.get_beneficiary_service_plans(BENEFICIARY)
+    beneficiary_queries.get_beneficiary_documents(BENEFICIARY)
+    beneficiary_queries.get_beneficiary_family_info(BENEFICIARY)
+    return 8
+
+
+def load_overview():
+    # A new version token forces a cache miss, as after a write to a related record
+    bump_versions([BENEFICIARY], [FAMILY])
+    beneficiary_queries.get_beneficiary_overview(BENEFICIARY)
+    return 1
+
+
+def load_cached_overview():
+    beneficiary_queries.get_beneficiary_overview(BENEFICIARY)
+    return 1
+
+
+def run(records=300, rtt_ms=50, connections=6, repeat=5):
+    """Compare queries, server time and modelled time to first paint of both loading paths"""
+    results = []
+    seed(records)
+    try:
+        for label, load in (
+            ("One call per panel", load_per_panel),
+            ("get_beneficiary_overview", load_overview),
+            ("get_beneficiary_overview, cached", load_cached_overview),
+        ):
+            with patch.object(frappe.db, "rollback"):
+                load()  # warm the meta and permission caches
+                with count_queries() as stats:
+                    for _ in range(repeat):
+                        requests = load()
+
+            server_ms = stats.elapsed / repeat * 1000
+            first_paint_ms = server_ms + math.ceil(requests / connections) * rtt_ms
+            results.append((label, requests, stats.queries // repeat, f"{server_ms:.1f} ms", f"{first_paint_ms:.0f} ms"))
+    finally:
+        frappe.db.rollback()
+
+    print(f"{records} linked records per doctype, {rtt_ms} ms round trip, {connections} browser connections")
+    print_table(["Loading", "Requests", "Queries", "Server time", "First paint"], results)
+    return results
+
+
+if __name__ == "__main__":
+    run()
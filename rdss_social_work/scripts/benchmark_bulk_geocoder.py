@@ -0,0 +1,67 @@
+"""
+Benchmark the bulk geocoder against the local geocoding stub
+
+Seeds synthetic Beneficiary Family rows sharing a limited pool of postal
+codes, points the geocoder at an in-process stub server and reports how many
+requests were made compared with the number of records. Commits are
+suppressed and everything is rolled back, so nothing reaches the real
+geocode cache.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_bulk_geocoder.run
+    bench execute rdss_social_work.scripts.benchmark_bulk_geocoder.run --kwargs "{'families': 5000, 'postal_codes': 1500, 'latency': 0.1}"
+"""
+
+import random
+from unittest.mock import patch
+
+import frappe
+
+from rdss_social_work import bulk_geocoder
+from rdss_social_work.geocode_cache import get_lru
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, print_table
+from rdss_social_work.scripts.geocode_stub_server import start_stub_server
+
+
+def seed_families(families, postal_codes):
+    # 88xxxx codes do not exist in Singapore, so they never collide with cached real entries
+    pool = [f"88{i:04d}" for i in random.sample(range(10000), postal_codes)]
+    rows = [
+        (f"BENCH-FAM-{i:06d}", f"Bench Family {i}", f"Blk {i % 900 + 1} Bench Street", random.choice(pool))
+        for i in range(families)
+    ]
+    bulk_seed("Beneficiary Family", ["family_name", "primary_address_line_1", "primary_postal_code"], rows)
+
+
+def run(families=2000, postal_codes=600, workers=8, rate=200, latency=0.05, rate_limit_ratio=0.0):
+    """Run the bulk geocoder over seeded families and report request deduplication and throughput"""
+    server, handler, url = start_stub_server(latency=latency, rate_limit_ratio=rate_limit_ratio)
+    conf_overrides = {"google_geocoding_api_url": url, "google_map_api_key": frappe.conf.get("google_map_api_key") or "stub-key"}
+
+    try:
+        seed_families(families, postal_codes)
+        with patch.dict(frappe.local.conf, conf_overrides), patch.object(frappe.db, "commit"):
+            stats = bulk_geocoder.run(
+                doctype="Beneficiary Family",
+                workers=workers,
+                rate=rate,
+                resume=False,
+                verbose=False,
+            )
+    finally:
+        frappe.db.rollback()
+        get_lru().clear()
+        server.shutdown()
+
+    print_table(
+        ["Records", "Unique postal codes", "HTTP requests", "Geocoded", "Errors", "Elapsed"],
+        [(stats.records, postal_codes, handler.request_count, stats.geocoded, stats.errors, f"{stats.elapsed}s")],
+    )
+
+    sequential_estimate = stats.records * (latency + 1)
+    print(f"\nOne-by-one geocode_all with delay=1 would take roughly {sequential_estimate:.0f}s for the same records")
+    return stats
+
+
+if __name__ == "__main__":
+    run()
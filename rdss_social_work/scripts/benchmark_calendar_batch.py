@@ -0,0 +1,173 @@
+"""
+Benchmark batched Google Calendar operations against the local fake Calendar API
+
+Creates the same events one request per event (the old mass-invite flow) and
+through CalendarBatchRunner (50 operations per batch request, several
+batches in flight), then runs the batched flow again with injected 429s and
+503s to check that backoff still gets every operation through. Finally it
+checks the sync round trip: events pushed with build_event_body and pulled
+back through calendar_sync.event_values must come back unchanged (long text,
+all-day events, sub-second end times). No Events are written to the
+database and no Google account is needed.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_calendar_batch.run
+    bench execute rdss_social_work.scripts.benchmark_calendar_batch.run --kwargs "{'events': 1000, 'latency': 0.1}"
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import frappe
+import httplib2
+from googleapiclient.discovery import build
+
+from rdss_social_work.rdss_social_work.google_calendar import batch_operations
+from rdss_social_work.rdss_social_work.google_calendar.calendar_sync import event_values, get_changes
+from rdss_social_work.rdss_social_work.google_calendar.oauth_service import build_event_body
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+from rdss_social_work.scripts.calendar_stub_server import start_stub_server
+
+
+def make_operations(count):
+    start = datetime(2025, 1, 6, 9, 0)
+    operations = {}
+    for i in range(count):
+        body = build_event_body({
+            "subject": f"Bench Event {i}",
+            "starts_on": start + timedelta(hours=i),
+            "ends_on": start + timedelta(hours=i, minutes=45),
+            "attendees": f"worker{i % 20}@example.org",
+        })
+        operations[f"BENCH-EV-{i:05d}"] = ("insert", {"calendarId": "primary", "body": body, "sendUpdates": "all"})
+    return operations
+
+
+def get_service(root_url):
+    return build(
+        "calendar", "v3", http=httplib2.Http(), static_discovery=True,
+        client_options={"api_endpoint": root_url + "calendar/v3/"},
+    )
+
+
+def run_sequential(service, operations):
+    failed = 0
+    events = service.events()
+    for method, kwargs in operations.values():
+        try:
+            getattr(events, method)(**kwargs).execute()
+        except Exception:
+            failed += 1
+    return failed
+
+
+def run_batched(root_url, operations, concurrency):
+    runner = batch_operations.CalendarBatchRunner(
+        get_service(root_url), httplib2.Http, root_url + "batch/calendar/v3", concurrency=concurrency
+    )
+    results = runner.run(operations)
+    failed = sum(1 for result in results.values() if not result["ok"])
+    retried = sum(1 for result in results.values() if result["attempts"] > 1)
+    return failed, retried
+
+
+def make_round_trip_rows():
+    """Events whose values a lossy push / pull mapping would change"""
+    day = datetime(2025, 3, 3)
+    return [
+        frappe._dict(
+            name="BENCH-RT-LONG", subject="Long subject " * 20, description="<p>Long description</p>" * 200,
+            location="Blk 123 Bench Road " * 10, all_day=0, starts_on=day.replace(hour=9),
+            ends_on=day.replace(hour=10, minute=30), custom_google_calendar_attendees="a@example.org, b@example.org",
+        ),
+        frappe._dict(
+            name="BENCH-RT-ALL-DAY", subject="All-day event", description="", location="", all_day=1,
+            starts_on=day, ends_on=datetime.combine(day.date(), datetime.max.time()),
+            custom_google_calendar_attendees="a@example.org",
+        ),
+        frappe._dict(
+            name="BENCH-RT-MICROSECONDS", subject="Ends at the last microsecond", description="Timed", location="",
+            all_day=0, starts_on=day.replace(hour=22), ends_on=datetime.combine(day.date(), datetime.max.time()),
+            custom_google_calendar_attendees="a@example.org",
+        ),
+    ]
+
+
+def check_round_trip(root_url):
+    """
+    Push events to the fake, pull them back as the sync does and list any field that changed
+
+    Returns:
+        dict: {event name: {field: pulled value}} for events that did not survive the round trip
+    """
+    service = get_service(root_url)
+    rows = make_round_trip_rows()
+    pushed = {}
+    for row in rows:
+        body = build_event_body({
+            "subject": row.subject,
+            "description": row.description,
+            "starts_on": row.starts_on,
+            "ends_on": row.ends_on,
+            "all_day": row.all_day,
+            "location": row.location,
+            "attendees": row.custom_google_calendar_attendees,
+        })
+        pushed[service.events().insert(calendarId="primary", body=body).execute()["id"]] = row
+
+    items = service.events().list(calendarId="primary", showDeleted=True).execute()["items"]
+    return {
+        pushed[item["id"]].name: changes
+        for item in items
+        if (changes := get_changes(pushed[item["id"]], event_values(item)))
+    }
+
+
+def run(events=500, latency=0.05, concurrency=4, rate_limit_ratio=0.05, batch_error_ratio=0.1):
+    """Compare HTTP requests and elapsed time of per-event and batched Calendar calls"""
+    operations = make_operations(events)
+    results = []
+
+    server, handler, url = start_stub_server(latency=latency)
+    try:
+        with timed() as sequential:
+            failed = run_sequential(get_service(url), operations)
+        results.append(("One request per event", handler.request_count, failed, 0, f"{sequential.elapsed:.2f}s"))
+
+        handler.request_count = 0
+        with timed() as batched:
+            failed, retried = run_batched(url, operations, concurrency)
+        results.append((f"Batched x{concurrency}", handler.request_count, failed, retried, f"{batched.elapsed:.2f}s"))
+    finally:
+        server.shutdown()
+
+    server, handler, url = start_stub_server(
+        latency=latency, rate_limit_ratio=rate_limit_ratio, batch_error_ratio=batch_error_ratio
+    )
+    try:
+        # Shorter backoff keeps the benchmark quick; the retry schedule is the same
+        with patch.object(batch_operations, "BACKOFF_BASE_SECONDS", 0.05), timed() as flaky:
+            failed, retried = run_batched(url, operations, concurrency)
+        results.append((
+            f"Batched x{concurrency}, {rate_limit_ratio:.0%} 429 / {batch_error_ratio:.0%} 503",
+            handler.request_count, failed, retried, f"{flaky.elapsed:.2f}s",
+        ))
+    finally:
+        server.shutdown()
+
+    server, handler, url = start_stub_server()
+    try:
+        lost = check_round_trip(url)
+    finally:
+        server.shutdown()
+
+    print(f"{events} calendar inserts, {latency * 1000:.0f} ms simulated latency per request")
+    print_table(["Flow", "HTTP requests", "Failed", "Retried", "Elapsed"], results)
+
+    assert not lost, f"Push / pull round trip changed events: {lost}"
+    print("\nOK: pushed events pulled back unchanged")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,110 @@
+"""
+Query-count regression check for Case metrics and the case timeline
+
+Seeds cases whose families grow in size, each member with a few Initial
+Assessments and the case with case notes, referrals and appointments, then
+compares the per-member loops Case.update_case_metrics and
+Case.get_case_timeline used to run with the case_metrics service. The
+service's query counts must not depend on the family size. All seeded rows
+are rolled back.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_case_metrics.run
+"""
+
+import frappe
+from frappe.utils import add_days, today
+
+from rdss_social_work import case_metrics
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+
+def seed_case(case, family, member_count, records_per_member=3):
+    members = [f"{family}-BEN-{i:04d}" for i in range(member_count)]
+
+    bulk_seed("Beneficiary Family", ["family_name"], [(family, family)])
+    bulk_seed("Beneficiary", ["beneficiary_name", "beneficiary_family"], [
+        (member, f"Bench Member {member}", family) for member in members
+    ])
+    bulk_seed("Case", ["case_title", "beneficiary_family", "case_opened_date"], [
+        (case, f"Bench Case {case}", family, add_days(today(), -365)),
+    ])
+
+    rows = {"Initial Assessment": [], "Case Notes": [], "Referral": [], "Appointment": []}
+    for member in members:
+        for i in range(records_per_member):
+            day = add_days(today(), -i * 7)
+            rows["Initial Assessment"].append((f"{member}-IA-{i}", f"Bench Member {member}", day))
+            rows["Case Notes"].append((f"{member}-CN-{i}", case, member, day))
+            rows["Referral"].append((f"{member}-REF-{i}", case, member, day))
+            rows["Appointment"].append((f"{member}-APT-{i}", case, member, day))
+
+    bulk_seed("Initial Assessment", ["client_name", "assessment_date"], rows["Initial Assessment"])
+    bulk_seed("Case Notes", ["case", "beneficiary", "visit_date"], rows["Case Notes"])
+    bulk_seed("Referral", ["case", "beneficiary", "referral_date"], rows["Referral"])
+    bulk_seed("Appointment", ["case", "beneficiary", "appointment_date"], rows["Appointment"])
+
+
+def per_member_metrics(doc):
+    """What Case.update_case_metrics ran on every save before the service"""
+    total_assessments = 0
+    for member in frappe.get_all("Beneficiary", filters={"beneficiary_family": doc.beneficiary_family}, fields=["beneficiary_name"]):
+        total_assessments += frappe.db.count("Initial Assessment", {"client_name": member.beneficiary_name})
+    doc.db_set("total_assessments", total_assessments, update_modified=False)
+    doc.db_set("last_activity_date", today(), update_modified=False)
+
+
+def per_member_timeline(doc):
+    """The assessment lookups of the old Case.get_case_timeline"""
+    assessments = []
+    for member in frappe.get_all("Beneficiary", filters={"beneficiary_family": doc.beneficiary_family}, fields=["beneficiary_name"]):
+        assessments.extend(frappe.get_all(
+            "Initial Assessment",
+            filters={"client_name": member.beneficiary_name},
+            fields=["name", "assessment_date", "assessed_by"],
+            order_by="assessment_date",
+        ))
+    return sorted(assessments, key=lambda row: row.assessment_date)
+
+
+def run(sizes=(5, 50, 500)):
+    """Compare queries and elapsed time of the per-member loops and the service as the family grows"""
+    results = []
+    try:
+        for size in sizes:
+            case, family = f"BENCH-CASE-{size}", f"BENCH-CASE-FAM-{size}"
+            seed_case(case, family, size)
+            doc = frappe.get_doc("Case", case)
+
+            with count_queries() as old_metrics:
+                per_member_metrics(doc)
+            with count_queries() as new_metrics:
+                case_metrics.update_case_metrics(doc)
+            with count_queries() as old_timeline:
+                per_member_timeline(doc)
+            with count_queries() as new_timeline:
+                timeline = case_metrics.get_case_timeline(doc)
+
+            results.append((
+                size,
+                old_metrics.queries, new_metrics.queries, f"{new_metrics.elapsed * 1000:.1f} ms",
+                old_timeline.queries, new_timeline.queries, f"{new_timeline.elapsed * 1000:.1f} ms",
+                len(timeline),
+            ))
+    finally:
+        frappe.db.rollback()
+
+    print_table([
+        "Members", "Metrics queries (old)", "Metrics queries", "Metrics time",
+        "Timeline queries (old)", "Timeline queries", "Timeline time", "Entries",
+    ], results)
+
+    for column, label in ((2, "Case metrics"), (5, "Case timeline")):
+        counts = {row[column] for row in results}
+        assert len(counts) == 1, f"{label} query count grows with family size: {sorted(counts)}"
+        print(f"OK: constant {counts.pop()} {label.lower()} queries for families of {', '.join(map(str, sizes))}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,82 @@
+"""
+Benchmark batch Case saves with deferred side effects
+
+Seeds one family with many members and cases, saves every case a few times
+in one transaction (as a bulk edit or import does) and measures the saves,
+then runs the coalesced side-effect job the commit would enqueue. The
+legacy column reproduces what Case.on_update did inline on every save: the
+per-member metric counts, loading the family to comment on it, and the
+notification checks. All rows are rolled back and nothing is enqueued.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_case_save.run
+"""
+
+import frappe
+from frappe.utils import today
+
+from rdss_social_work import case_side_effects
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+FAMILY = "BENCH-SAVE-FAM"
+
+
+def seed(members, cases):
+    bulk_seed("Beneficiary Family", ["family_name"], [(FAMILY, "Bench Save Family")])
+    bulk_seed("Beneficiary", ["beneficiary_name", "beneficiary_family"], [
+        (f"{FAMILY}-BEN-{i:04d}", f"Bench Save Member {i}", FAMILY) for i in range(members)
+    ])
+    bulk_seed("Case", ["case_title", "beneficiary_family", "case_status", "case_opened_date"], [
+        (f"{FAMILY}-CASE-{i:04d}", f"Bench Save Case {i}", FAMILY, "Open", today()) for i in range(cases)
+    ])
+    return [f"{FAMILY}-CASE-{i:04d}" for i in range(cases)]
+
+
+def legacy_side_effects(doc):
+    """The work the old Case.on_update did inside every save"""
+    total_assessments = 0
+    for member in frappe.get_all("Beneficiary", filters={"beneficiary_family": doc.beneficiary_family}, fields=["beneficiary_name"]):
+        total_assessments += frappe.db.count("Initial Assessment", {"client_name": member.beneficiary_name})
+    doc.db_set("total_assessments", total_assessments, update_modified=False)
+    doc.db_set("last_activity_date", today(), update_modified=False)
+    frappe.get_doc("Beneficiary Family", doc.beneficiary_family).add_comment("Info", f"Case updated: {doc.case_title}")
+    frappe.db.get_value("Email Account", {"default_outgoing": 1})
+
+
+def save_cases(names, saves_per_case):
+    for _ in range(saves_per_case):
+        for name in names:
+            doc = frappe.get_doc("Case", name)
+            doc.current_situation = frappe.generate_hash(length=12)
+            doc.save(ignore_permissions=True)
+
+
+def run(members=200, cases=50, saves_per_case=3):
+    """Compare queries and time of inline and deferred side effects for a batch of saves"""
+    names = seed(members, cases)
+    try:
+        with count_queries() as saves:
+            save_cases(names, saves_per_case)
+        pending = case_side_effects.get_pending()
+        with count_queries() as job:
+            case_side_effects.process_case_side_effects(pending)
+
+        with count_queries() as legacy:
+            for _ in range(saves_per_case):
+                for name in names:
+                    legacy_side_effects(frappe.get_doc("Case", name))
+    finally:
+        case_side_effects.discard()
+        frappe.db.rollback()
+
+    total = cases * saves_per_case
+    print(f"{total} saves of {cases} cases in a family of {members}")
+    print_table(["Work", "Queries", "Time"], [
+        ("Saves, side effects deferred", saves.queries, f"{saves.elapsed * 1000:.1f} ms"),
+        (f"Side-effect job ({len(pending)} cases)", job.queries, f"{job.elapsed * 1000:.1f} ms"),
+        ("Legacy inline side effects alone", legacy.queries, f"{legacy.elapsed * 1000:.1f} ms"),
+    ])
+
+
+if __name__ == "__main__":
+    run()
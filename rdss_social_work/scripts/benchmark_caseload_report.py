@@ -0,0 +1,72 @@
+"""
+Query-count regression check for the Caseload Report
+
+Seeds cases, assessments and appointments for a growing number of synthetic
+social workers and verifies that the report issues the same number of
+queries whatever the worker count. All seeded rows are rolled back.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_caseload_report.run
+"""
+
+import random
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import add_days, today
+
+from rdss_social_work.rdss_social_work.report.caseload_report import caseload_report
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+
+def seed_workers(worker_count, cases_per_worker=20):
+    workers = [f"bench-worker-{i:04d}@example.com" for i in range(worker_count)]
+
+    cases, assessments, followups, appointments = [], [], [], []
+    for w, worker in enumerate(workers):
+        for i in range(cases_per_worker):
+            key = f"{w:04d}-{i:03d}"
+            cases.append((f"BENCH-CASE-{key}", random.choice(["Open", "Active", "Closed"]), worker))
+            assessments.append((f"BENCH-IA-{key}", worker, today()))
+            followups.append((f"BENCH-FUA-{key}", worker, add_days(today(), random.randint(-30, 30))))
+            appointments.append((f"BENCH-APT-{key}", worker, add_days(today(), random.randint(-7, 14)), "Scheduled"))
+
+    bulk_seed("Case", ["case_status", "primary_social_worker"], cases)
+    bulk_seed("Initial Assessment", ["assessed_by", "assessment_date"], assessments)
+    bulk_seed("Follow Up Assessment", ["assessed_by", "assessment_date"], followups)
+    bulk_seed("Appointment", ["social_worker", "appointment_date", "appointment_status"], appointments)
+
+    return [frappe._dict(name=worker, full_name=worker) for worker in workers]
+
+
+def run(worker_counts=None):
+    """Fail loudly if the report's query count depends on the number of workers"""
+    worker_counts = worker_counts or [5, 50, 500]
+    results = []
+
+    try:
+        for worker_count in worker_counts:
+            workers = seed_workers(worker_count)
+
+            with patch.object(caseload_report, "get_social_workers", return_value=workers):
+                with count_queries() as stats:
+                    data = caseload_report.get_data({})
+                with count_queries() as ranged:
+                    caseload_report.get_data({"from_date": add_days(today(), -30), "to_date": today()})
+
+            results.append((worker_count, len(data), stats.queries, ranged.queries, f"{stats.elapsed * 1000:.1f} ms"))
+            frappe.db.rollback()
+    finally:
+        frappe.db.rollback()
+
+    print_table(["Workers", "Rows", "Queries", "Queries (date range)", "Elapsed"], results)
+
+    query_counts = {r[2] for r in results} | {r[3] for r in results}
+    assert len(query_counts) == 1, f"Caseload Report query count grows with workers: {sorted(query_counts)}"
+    print(f"\nOK: constant {query_counts.pop()} queries for {worker_counts} workers")
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,71 @@
+"""
+Benchmark electoral division lookups
+
+Generates random points over Singapore and compares the grid/slab index with
+a brute-force scan of every polygon edge, checks that both agree, and times
+the vectorized bulk mode used by tag_electoral_divisions. Nothing is written
+to the database.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_electoral_lookup.run
+    bench execute rdss_social_work.scripts.benchmark_electoral_lookup.run --kwargs "{'points': 5000, 'bulk_points': 200000}"
+"""
+
+import random
+
+from rdss_social_work.electoral_boundaries import load_index
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+
+
+def random_points(index, count, seed=2025):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(index.min_y, index.max_y), rng.uniform(index.min_x, index.max_x))
+        for _ in range(count)
+    ]
+
+
+def run(points=2000, bulk_points=100000):
+    """Report per-lookup time of the index against a brute-force scan, plus bulk throughput"""
+    with timed() as load:
+        index = load_index()
+    print(f"Parsed {len(index.divisions)} divisions / {len(index.parts)} polygons in {load.elapsed * 1000:.0f} ms")
+
+    sample = random_points(index, points)
+
+    with timed() as indexed:
+        indexed_codes = [getattr(index.locate(lat, lng), "code", None) for lat, lng in sample]
+    with timed() as brute:
+        brute_codes = [getattr(index.locate_brute_force(lat, lng), "code", None) for lat, lng in sample]
+
+    bulk_sample = random_points(index, bulk_points, seed=2026)
+    lats, lngs = zip(*bulk_sample)
+    with timed() as bulk:
+        bulk_codes = index.locate_many(lats, lngs)
+
+    mismatches = sum(a != b for a, b in zip(indexed_codes, brute_codes))
+    bulk_mismatches = sum(
+        getattr(index.locate(lat, lng), "code", None) != code
+        for (lat, lng), code in zip(bulk_sample[:points], bulk_codes)
+    )
+
+    print_table(
+        ["Mode", "Points", "Total", "Per lookup"],
+        [
+            ("Brute force", points, f"{brute.elapsed * 1000:.1f} ms", f"{brute.elapsed / points * 1e6:.1f} µs"),
+            ("Grid + slab index", points, f"{indexed.elapsed * 1000:.1f} ms", f"{indexed.elapsed / points * 1e6:.1f} µs"),
+            ("Vectorized bulk", bulk_points, f"{bulk.elapsed * 1000:.1f} ms", f"{bulk.elapsed / bulk_points * 1e6:.2f} µs"),
+        ],
+    )
+
+    inside = sum(1 for code in indexed_codes if code)
+    print(f"\n{inside}/{points} sample points fall inside a division")
+    print(f"Speed-up over brute force: {brute.elapsed / indexed.elapsed:.0f}x")
+    if mismatches or bulk_mismatches:
+        print(f"FAIL: {mismatches} indexed and {bulk_mismatches} bulk results disagree with the brute-force scan")
+    else:
+        print("OK: indexed and bulk results match the brute-force scan")
+
+
+if __name__ == "__main__":
+    run()
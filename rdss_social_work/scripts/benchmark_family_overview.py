@@ -0,0 +1,84 @@
+"""
+Query-count regression check for the Beneficiary Family overview
+
+Seeds families of growing size, each member with a few appointments,
+assessments, documents and case notes, and verifies that
+get_family_overview issues the same number of queries whatever the family
+size, next to the separate per-tab calls the form used to make. All seeded
+rows are rolled back.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_family_overview.run
+"""
+
+import frappe
+from frappe.utils import add_days, today
+
+from rdss_social_work.rdss_social_work.doctype.beneficiary_family import beneficiary_family_queries
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+
+def seed_family(family, member_count, records_per_member=3):
+    members = [f"{family}-BEN-{i:04d}" for i in range(member_count)]
+
+    bulk_seed("Beneficiary Family", ["family_name"], [(family, family)])
+    bulk_seed("Beneficiary", ["beneficiary_name", "beneficiary_family"], [
+        (member, f"Bench Member {member}", family) for member in members
+    ])
+    bulk_seed("Case", ["case_title", "beneficiary_family", "case_opened_date"], [
+        (f"{family}-CASE-{i:03d}", f"Case {i}", family, today()) for i in range(5)
+    ])
+
+    rows = {"Appointment": [], "Follow Up Assessment": [], "Document Attachment": [], "Case Notes": []}
+    for member in members:
+        for i in range(records_per_member):
+            day = add_days(today(), -i)
+            rows["Appointment"].append((f"{member}-APT-{i}", member, day))
+            rows["Follow Up Assessment"].append((f"{member}-FUA-{i}", member, day))
+            rows["Document Attachment"].append((f"{member}-DOC-{i}", member, day))
+            rows["Case Notes"].append((f"{member}-CN-{i}", member, day))
+
+    bulk_seed("Appointment", ["beneficiary", "appointment_date"], rows["Appointment"])
+    bulk_seed("Follow Up Assessment", ["beneficiary", "assessment_date"], rows["Follow Up Assessment"])
+    bulk_seed("Document Attachment", ["beneficiary", "upload_date"], rows["Document Attachment"])
+    bulk_seed("Case Notes", ["beneficiary", "visit_date"], rows["Case Notes"])
+
+
+def load_per_tab(family):
+    """The calls beneficiary_family.js made on every refresh before the overview endpoint"""
+    beneficiary_family_queries.get_family_members(family)
+    beneficiary_family_queries.get_family_cases(family)
+    beneficiary_family_queries.get_family_appointments(family)
+    beneficiary_family_queries.get_family_case_notes(family)
+
+
+def run(sizes=(5, 50, 500)):
+    """Compare queries and elapsed time of both loading paths as the family grows"""
+    results = []
+    try:
+        for size in sizes:
+            family = f"BENCH-FAM-{size}"
+            seed_family(family, size)
+
+            with count_queries() as per_tab:
+                load_per_tab(family)
+            with count_queries() as overview:
+                page = beneficiary_family_queries.get_family_overview(family)
+
+            results.append((
+                size, per_tab.queries, f"{per_tab.elapsed * 1000:.1f} ms",
+                overview.queries, f"{overview.elapsed * 1000:.1f} ms", len(page["members"]),
+            ))
+    finally:
+        frappe.db.rollback()
+
+    print_table(["Members", "Per-tab queries", "Per-tab time", "Overview queries", "Overview time", "First page"], results)
+
+    overview_counts = {row[3] for row in results}
+    assert len(overview_counts) == 1, f"Family overview query count grows with family size: {sorted(overview_counts)}"
+    print(f"\nOK: constant {overview_counts.pop()} overview queries for families of {', '.join(map(str, sizes))}")
+    return results
+
+
+if __name__ == "__main__":
+    run()
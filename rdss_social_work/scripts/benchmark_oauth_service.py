@@ -0,0 +1,81 @@
+"""
+Benchmark the cached Google OAuth service
+
+Compares what every button click used to cost (read the token file, build
+the Calendar and Gmail clients from their discovery documents) with the
+process-level cache, cold and warm. A throwaway token file with a long-lived
+fake access token is used, so no Google account or network access is needed
+and the site's real tokens are never touched.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_oauth_service.run
+    bench execute rdss_social_work.scripts.benchmark_oauth_service.run --kwargs "{'calls': 200}"
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from rdss_social_work.rdss_social_work.google_calendar import oauth_service
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+
+
+def write_fake_token(path):
+    expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+    with open(path, "w") as f:
+        json.dump({
+            "token": "bench-access-token",
+            "refresh_token": "bench-refresh-token",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "client_id": "bench-client",
+            "client_secret": "bench-secret",
+            "scopes": ["https://www.googleapis.com/auth/calendar"],
+            "expiry": expiry.isoformat() + "Z",
+        }, f)
+
+
+def legacy_service(path, scopes):
+    """The per-instance initialization the cache replaced"""
+    creds = Credentials.from_authorized_user_file(path, scopes)
+    calendar = build("calendar", "v3", credentials=creds)
+    build("gmail", "v1", credentials=creds)
+    return calendar
+
+
+def run(calls=50):
+    """Time calls to get a ready Calendar client, before and after caching"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "google_oauth_tokens.json")
+        write_fake_token(path)
+        scopes = ["https://www.googleapis.com/auth/calendar"]
+
+        with patch.object(oauth_service.GoogleOAuthService, "_get_credentials_path", return_value=path):
+            with timed() as legacy:
+                for _ in range(calls):
+                    legacy_service(path, scopes)
+            results.append(("Token file + both clients per call", f"{legacy.elapsed / calls * 1000:.2f} ms"))
+
+            oauth_service.clear_service_cache()
+            with timed() as cold:
+                oauth_service.GoogleOAuthService().calendar_service
+            results.append(("Cached service, first call", f"{cold.elapsed * 1000:.2f} ms"))
+
+            with timed() as warm:
+                for _ in range(calls):
+                    oauth_service.GoogleOAuthService().calendar_service
+            results.append(("Cached service, later calls", f"{warm.elapsed / calls * 1000:.3f} ms"))
+
+            oauth_service.clear_service_cache()
+
+    print_table(["Flow", "Per call"], results)
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,83 @@
+"""
+Benchmark for the Priority Compliance Report
+
+Seeds synthetic open cases and appointments, runs the report at increasing
+caseload sizes and checks that the number of queries stays constant.
+All seeded rows are rolled back at the end.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_priority_compliance.run
+    bench execute rdss_social_work.scripts.benchmark_priority_compliance.run --kwargs "{'sizes': [100, 1000, 10000]}"
+"""
+
+import random
+
+import frappe
+from frappe.utils import add_days, today
+
+from rdss_social_work.rdss_social_work.report.priority_compliance_report.priority_compliance_report import get_data
+from rdss_social_work.scripts.benchmark_utils import bulk_seed, count_queries, print_table
+
+
+def seed_caseload(size, appointments_per_case=3):
+    """Seed `size` open cases, each with a handful of past and future appointments"""
+    priorities = frappe.get_all("Case Priority", pluck="name") or [None]
+    statuses = ["Open", "Active", "In Progress"]
+
+    cases = []
+    appointments = []
+    for i in range(size):
+        case = f"BENCH-CASE-{i:06d}"
+        cases.append((
+            case,
+            f"BENCH-FAM-{i:06d}",
+            random.choice(priorities),
+            random.choice([0, 1, 2, 3, 6]),
+            random.choice(statuses),
+            "Administrator",
+        ))
+        for j in range(appointments_per_case):
+            appointments.append((
+                f"BENCH-APT-{i:06d}-{j}",
+                case,
+                add_days(today(), random.randint(-365, 120)),
+                random.choice(["Scheduled", "Completed", "Cancelled"]),
+                "Administrator",
+            ))
+
+    bulk_seed("Case", ["beneficiary_family", "case_priority", "appointment_frequency", "case_status", "primary_social_worker"], cases)
+    bulk_seed("Appointment", ["case", "appointment_date", "appointment_status", "social_worker"], appointments)
+
+
+def run(sizes=None):
+    """Run the report at each caseload size and report query counts and timings"""
+    sizes = sizes or [100, 1000, 10000]
+    results = []
+
+    try:
+        seeded = 0
+        for size in sorted(sizes):
+            # Start each size from a clean slate
+            frappe.db.delete("Case", {"name": ["like", "BENCH-CASE-%"]})
+            frappe.db.delete("Appointment", {"name": ["like", "BENCH-APT-%"]})
+            seed_caseload(size)
+            seeded = size
+
+            with count_queries() as stats:
+                data = get_data({})
+
+            results.append((size, len(data), stats.queries, f"{stats.elapsed * 1000:.1f} ms"))
+    finally:
+        frappe.db.rollback()
+
+    print_table(["Cases seeded", "Rows", "Queries", "Elapsed"], results)
+
+    query_counts = {r[2] for r in results}
+    assert len(query_counts) == 1, f"Priority Compliance query count grows with caseload: {sorted(query_counts)}"
+    print(f"\nOK: constant {query_counts.pop()} queries up to {seeded} cases")
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
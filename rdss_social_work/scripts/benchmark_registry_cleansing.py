@@ -0,0 +1,86 @@
+"""
+Benchmark vectorized registry cleansing against per-row cleaning
+
+Writes a synthetic registry CSV and cleans it twice: row by row with the
+import engine's transform_row (parse_date, map_gender, clean_bc_nric,
+parse_and_validate_email per row), and column-wise with
+registry_cleansing.cleanse_registry, which also writes the Parquet staging
+and rejects files. Nothing touches the database; the files go to a
+temporary directory.
+
+A few rows with dates outside the nanosecond datetime range (EDGE_DATES)
+are appended, and the staging file must keep them as parse_date does.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_registry_cleansing.run
+    bench execute rdss_social_work.scripts.benchmark_registry_cleansing.run --kwargs "{'rows': 200000}"
+"""
+
+import csv
+import datetime
+import os
+import tempfile
+
+import pandas as pd
+
+from rdss_social_work.scripts.benchmark_beneficiary_import import HEADER, write_registry
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+from rdss_social_work.scripts.beneficiary_import_engine import read_registry, transform_row
+from rdss_social_work.scripts.registry_cleansing import cleanse_registry
+
+# Registry values and the date each must be cleaned to
+EDGE_DATES = [
+    ("0001-01-01", datetime.date(1, 1, 1)),
+    ("1/1/1600", datetime.date(1600, 1, 1)),
+    ("31/12/9999", datetime.date(9999, 12, 31)),
+]
+
+
+def append_edge_rows(path):
+    """Rows dated outside datetime64[ns], as old or placeholder registry entries are"""
+    with open(path, "a", newline="") as f:
+        writer = csv.writer(f)
+        for i, (value, _) in enumerate(EDGE_DATES):
+            writer.writerow([
+                f"Bench Edge Date {i}", "F", value, f"S{i:07d}A", "Bench Diagnosis", value,
+                f"{i} Edge Street", "100000", f"8{i:07d}", "", "", "Mother", "Active",
+            ])
+
+
+def check_edge_dates(staging_file):
+    staging = pd.read_parquet(staging_file).set_index("beneficiary_name")
+    for i, (value, expected) in enumerate(EDGE_DATES):
+        row = staging.loc[f"Bench Edge Date {i}"]
+        for column in ("date_of_birth", "registration_date"):
+            assert row[column] == expected, f"{value} was cleaned to {row[column]!r} in {column}, expected {expected}"
+
+
+def run(rows=50000):
+    """Compare per-row and column-wise cleaning of the same registry"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench_registry.csv")
+        write_registry(path, rows)
+        append_edge_rows(path)
+
+        with timed() as per_row:
+            for row_num, row in read_registry(path):
+                transform_row(row_num, row)
+        results.append(("Per row (transform_row)", f"{per_row.elapsed:.2f}s"))
+
+        with timed() as vectorized:
+            summary = cleanse_registry(path, output_dir=directory)
+        results.append(("Column-wise, incl. Parquet and rejects files", f"{vectorized.elapsed:.2f}s"))
+
+        total = rows + len(EDGE_DATES)
+        assert summary["clean_rows"] == total, f"{summary['clean_rows']} of {total} rows cleaned"
+        check_edge_dates(summary["staging_file"])
+
+    print(f"{rows} registry rows")
+    print_table(["Cleaning", "Elapsed"], results)
+    print(f"\nOK: all {total} rows cleaned, dates from {EDGE_DATES[0][1]} to {EDGE_DATES[-1][1]} kept")
+    return results
+
+
+if __name__ == "__main__":
+    run()
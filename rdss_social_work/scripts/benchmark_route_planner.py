@@ -0,0 +1,84 @@
+"""
+Benchmark the home-visit route planner
+
+Generates synthetic days of 5 to 40 home visits across Singapore, some with
+booked appointment times and some flexible, and reports the solve time and
+route quality of nearest-neighbour alone against nearest-neighbour + 2-opt.
+On days with booked visits 2-opt may add travel to remove lateness.
+Nothing is read from or written to the database.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_route_planner.run
+    bench execute rdss_social_work.scripts.benchmark_route_planner.run --kwargs "{'sizes': [5, 10, 20, 40], 'days': 10}"
+"""
+
+import random
+
+from rdss_social_work.route_planner import RoutePlan
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+
+SG_BOUNDS = (1.28, 103.68, 1.44, 103.98)
+OFFICE = (1.3521, 103.8198)
+
+
+def random_day(rng, size, booked_ratio=0.5):
+    # Keep visit time to about half of a 9-hour day so a feasible route exists
+    max_duration = max(15, min(90, 270 // size))
+    visits = []
+    for i in range(size):
+        booked = rng.random() < booked_ratio
+        visits.append({
+            "name": f"APT-{i:03d}",
+            "latitude": rng.uniform(SG_BOUNDS[0], SG_BOUNDS[2]),
+            "longitude": rng.uniform(SG_BOUNDS[1], SG_BOUNDS[3]),
+            "appointment_minutes": rng.randrange(9 * 60, 17 * 60, 30) if booked else None,
+            "duration_minutes": rng.randint(max_duration // 2, max_duration),
+        })
+    return visits
+
+
+def run(sizes=None, days=5, booked_ratio=0.3):
+    """Report solve time, travel and lateness per day size"""
+    sizes = sizes or [5, 10, 20, 30, 40]
+    rng = random.Random(2025)
+    results = []
+
+    for size in sizes:
+        nn_travel = opt_travel = nn_late = opt_late = 0.0
+        nn_elapsed = opt_elapsed = 0.0
+
+        for _ in range(days):
+            plan = RoutePlan(random_day(rng, size, booked_ratio), start=OFFICE)
+
+            with timed() as nn:
+                route = plan.nearest_neighbour()
+            with timed() as opt:
+                improved = plan.two_opt(route)
+
+            lateness, travel = plan.evaluate(route)
+            nn_late += lateness
+            nn_travel += travel
+            lateness, travel = plan.evaluate(improved)
+            opt_late += lateness
+            opt_travel += travel
+            nn_elapsed += nn.elapsed
+            opt_elapsed += nn.elapsed + opt.elapsed
+
+        results.append((
+            size,
+            f"{nn_elapsed / days * 1000:.1f} ms",
+            f"{opt_elapsed / days * 1000:.1f} ms",
+            f"{nn_travel / days:.0f} / {nn_late / days:.0f}",
+            f"{opt_travel / days:.0f} / {opt_late / days:.0f}",
+            f"{(1 - opt_travel / nn_travel) * 100:.1f}%" if nn_travel else "-",
+        ))
+
+    print_table(
+        ["Visits", "NN time", "NN + 2-opt time", "NN travel / late (min)", "2-opt travel / late (min)", "Travel saved"],
+        results,
+    )
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,94 @@
+"""
+Benchmark nearest-neighbour and radius search
+
+Builds a grid index over random points across Singapore and compares it with
+what a search had to do before: parse every row's GeoJSON geolocation and
+compute each distance in Python. Results of both are checked for agreement.
+Nothing is read from or written to the database.
+
+Usage:
+    bench execute rdss_social_work.scripts.benchmark_spatial_search.run
+    bench execute rdss_social_work.scripts.benchmark_spatial_search.run --kwargs "{'points': 50000, 'queries': 500}"
+"""
+
+import random
+
+from rdss_social_work.geocode_cache import extract_coordinates
+from rdss_social_work.geocoding_utils import make_geojson
+from rdss_social_work.scripts.benchmark_utils import print_table, timed
+from rdss_social_work.spatial_search import SpatialGrid, haversine_km
+
+# Rough bounding box of mainland Singapore
+SG_BOUNDS = (1.24, 103.62, 1.47, 104.0)
+
+
+def random_point(rng):
+    return rng.uniform(SG_BOUNDS[0], SG_BOUNDS[2]), rng.uniform(SG_BOUNDS[1], SG_BOUNDS[3])
+
+
+def scan_nearest(rows, lat, lng, k):
+    distances = []
+    for name, geolocation in rows:
+        p_lat, p_lng = extract_coordinates(geolocation)
+        distances.append((haversine_km(lat, lng, p_lat, p_lng), name))
+    return sorted(distances)[:k]
+
+
+def scan_within(rows, lat, lng, radius_km):
+    matches = []
+    for name, geolocation in rows:
+        p_lat, p_lng = extract_coordinates(geolocation)
+        distance = haversine_km(lat, lng, p_lat, p_lng)
+        if distance <= radius_km:
+            matches.append((distance, name))
+    return sorted(matches)
+
+
+def run(points=20000, queries=200, k=10, radius_km=2, scan_queries=20):
+    """Report per-query time of the grid index against a full GeoJSON scan"""
+    rng = random.Random(2025)
+    rows = [(f"BEN-{i:06d}", make_geojson(*random_point(rng))) for i in range(points)]
+
+    with timed() as build:
+        grid = SpatialGrid()
+        for name, geolocation in rows:
+            grid.upsert(name, *extract_coordinates(geolocation))
+
+    origins = [random_point(rng) for _ in range(queries)]
+    with timed() as nearest:
+        nearest_results = [grid.nearest(lat, lng, k=k) for lat, lng in origins]
+    with timed() as within:
+        within_results = [grid.within(lat, lng, radius_km) for lat, lng in origins]
+
+    scan_origins = origins[:scan_queries]
+    with timed() as scan_knn:
+        scan_knn_results = [scan_nearest(rows, lat, lng, k) for lat, lng in scan_origins]
+    with timed() as scan_radius:
+        scan_radius_results = [scan_within(rows, lat, lng, radius_km) for lat, lng in scan_origins]
+
+    def per_query(stats, count):
+        return f"{stats.elapsed / count * 1000:.3f} ms"
+
+    print(f"Indexed {len(grid)} points in {build.elapsed * 1000:.0f} ms")
+    print_table(
+        ["Search", "GeoJSON scan", "Grid index", "Speed-up"],
+        [
+            (f"{k} nearest", per_query(scan_knn, len(scan_origins)), per_query(nearest, queries),
+             f"{(scan_knn.elapsed / len(scan_origins)) / (nearest.elapsed / queries):.0f}x"),
+            (f"within {radius_km} km", per_query(scan_radius, len(scan_origins)), per_query(within, queries),
+             f"{(scan_radius.elapsed / len(scan_origins)) / (within.elapsed / queries):.0f}x"),
+        ],
+    )
+
+    mismatches = sum(
+        [name for _, name in a] != [name for _, name in b]
+        for a, b in zip(nearest_results, scan_knn_results)
+    ) + sum(
+        [name for _, name in a] != [name for _, name in b]
+        for a, b in zip(within_results, scan_radius_results)
+    )
+    print("\nOK: grid results match the full scan" if not mismatches else f"\nFAIL: {mismatches} queries disagree with the full scan")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,80 @@
+"""
+Shared helpers for the bench-executable benchmarks in this folder
+
+The benchmarks seed synthetic rows with frappe.db.bulk_insert, measure the
+code under test and roll everything back, so they are safe to run on a
+development site.
+"""
+
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import now_datetime
+
+STANDARD_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "docstatus"]
+
+
+@contextmanager
+def count_queries():
+    """
+    Count every frappe.db.sql call made inside the block
+
+    Usage:
+        with count_queries() as stats:
+            get_data(filters)
+        print(stats.queries, stats.elapsed)
+    """
+    stats = frappe._dict(queries=0, elapsed=0.0)
+    original_sql = frappe.db.sql
+
+    def counting_sql(*args, **kwargs):
+        stats.queries += 1
+        return original_sql(*args, **kwargs)
+
+    frappe.db.sql = counting_sql
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.elapsed = time.perf_counter() - start
+        # Drop the instance attribute so the class method is visible again
+        del frappe.db.sql
+
+
+@contextmanager
+def timed():
+    """Measure wall-clock time of the block in seconds"""
+    stats = frappe._dict(elapsed=0.0)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.elapsed = time.perf_counter() - start
+
+
+def bulk_seed(doctype, fields, rows, chunk_size=1000):
+    """
+    Insert synthetic rows for a benchmark without running document hooks
+
+    Args:
+        doctype (str): Target DocType
+        fields (list): Column names in addition to the standard fields
+        rows (list): Tuples of (name, *values) matching fields
+        chunk_size (int): Rows per INSERT statement
+    """
+    timestamp = now_datetime()
+    values = [
+        (row[0], timestamp, timestamp, "Administrator", "Administrator", 0) + tuple(row[1:])
+        for row in rows
+    ]
+    frappe.db.bulk_insert(doctype, STANDARD_FIELDS + list(fields), values, chunk_size=chunk_size)
+
+
+def print_table(headers, rows):
+    """Print benchmark results as an aligned plain-text table"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
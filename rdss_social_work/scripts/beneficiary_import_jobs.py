@@ -0,0 +1,263 @@
+"""
+Resumable, parallel beneficiary imports tracked as Beneficiary Import Job
+
+A job imports one registry CSV with the bulk import engine, in chunks:
+
+    * validation and mapping (transform_row: map_csv_to_beneficiary,
+      parse_date, clean_bc_nric, parse_and_validate_email, ...) run in a
+      pool of worker processes, which never touch the database
+    * the job process is the single writer: it resolves names against
+      what already exists, bulk inserts the chunk, writes the chunk's
+      errors and warnings to the Beneficiary Import Log journal and
+      advances the job's checkpoint, all in one transaction
+
+A crash therefore loses at most the chunk in flight. Running the job again
+(Resume Import on the form, or start_import_job with the same file) skips
+every row up to last_committed_row and carries on with the counts already
+stored on the job. A job only resumes on the file it was created for,
+checked by size and SHA-1.
+
+Usage:
+    bench --site [site-name] execute rdss_social_work.scripts.beneficiary_import_jobs.start_import_job \
+        --kwargs '{"file_path": "/path/to/registry.csv", "workers": 4}'
+    bench --site [site-name] execute rdss_social_work.scripts.beneficiary_import_jobs.run_import_job \
+        --kwargs '{"job_name": "BIJ-00001"}'
+"""
+
+import datetime
+import hashlib
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import frappe
+from frappe.utils import cint, now_datetime
+from frappe.utils.synchronization import filelock
+
+from rdss_social_work.scripts.beneficiary_import_engine import (
+    DEFAULT_CHUNK_SIZE,
+    STANDARD_COLUMNS,
+    discount_chunk,
+    enqueue_geocoding_jobs,
+    get_default_file_path,
+    iter_chunks,
+    new_stats,
+    prefetch_existing_names,
+    read_registry,
+    resolve_row,
+    transform_chunk,
+    write_chunk,
+)
+
+DEFAULT_WORKERS = 4
+PROGRESS_EVENT = "beneficiary_import_progress"
+
+# Stats keys of the import engine and the job fields accumulating them
+COUNT_FIELDS = {
+    "total_rows": "total_rows",
+    "successful_imports": "successful_imports",
+    "successful_family_imports": "successful_family_imports",
+    "successful_parent_imports": "successful_parent_imports",
+    "skipped_rows": "skipped_rows",
+    "errors": "error_count",
+    "warnings": "warning_count",
+}
+
+LOG_COLUMNS = ["import_job", "row_num", "level", "message"]
+ROW_NUM = re.compile(r"^Row (\d+):")
+
+
+def get_file_signature(file_path):
+    """Size and SHA-1 of a file, so a job never resumes on a different file"""
+    sha1 = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(block)
+    return f"{os.path.getsize(file_path)}:{sha1.hexdigest()}"
+
+
+@frappe.whitelist()
+def start_import_job(file_path=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Import a registry CSV in the background, resuming an unfinished job for the same file
+
+    Returns:
+        dict: {"status": "queued", "job": job name}
+    """
+    frappe.only_for("System Manager")
+
+    file_path = file_path or get_default_file_path()
+    if not os.path.exists(file_path):
+        frappe.throw(f"File not found: {file_path}")
+
+    signature = get_file_signature(file_path)
+    job_name = frappe.db.get_value(
+        "Beneficiary Import Job",
+        {"file_signature": signature, "status": ["!=", "Completed"]},
+        "name",
+        order_by="creation desc",
+    )
+    if not job_name:
+        job_name = frappe.get_doc({
+            "doctype": "Beneficiary Import Job",
+            "file_path": file_path,
+            "file_signature": signature,
+            "chunk_size": cint(chunk_size) or DEFAULT_CHUNK_SIZE,
+            "workers": cint(workers) or DEFAULT_WORKERS,
+        }).insert(ignore_permissions=True).name
+        frappe.db.commit()
+
+    enqueue_import_job(job_name)
+    return {"status": "queued", "job": job_name}
+
+
+@frappe.whitelist()
+def resume_import_job(job_name):
+    """Queue an unfinished import job again; it continues after its last committed chunk"""
+    frappe.only_for("System Manager")
+
+    if frappe.db.get_value("Beneficiary Import Job", job_name, "status") == "Completed":
+        frappe.throw(f"Import job {job_name} has already completed")
+
+    enqueue_import_job(job_name)
+    return {"status": "queued", "job": job_name}
+
+
+def enqueue_import_job(job_name):
+    frappe.enqueue(
+        "rdss_social_work.scripts.beneficiary_import_jobs.run_import_job",
+        queue="long",
+        timeout=6 * 60 * 60,
+        job_id=f"beneficiary_import::{job_name}",
+        deduplicate=True,
+        job_name=job_name,
+    )
+
+
+def transform_in_pool(chunks, workers):
+    """
+    Transform chunks in worker processes, yielding (chunk, transformed) in file order
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    however large the file is. Workers are spawned rather than forked, so
+    they never share the writer's database connection.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, transform_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(transform_chunk, chunk)))
+            if len(pending) >= 2 * workers:
+                done, future = pending.popleft()
+                yield done, future.result()
+
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def write_journal(job_name, stats):
+    """Bulk insert a chunk's errors and warnings into Beneficiary Import Log"""
+    timestamp, user = now_datetime(), frappe.session.user
+    values = []
+    for level, messages in (("Error", stats["errors"]), ("Warning", stats["warnings"])):
+        for message in messages:
+            match = ROW_NUM.match(message)
+            values.append(
+                (frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, 0)
+                + (job_name, int(match.group(1)) if match else 0, level, message)
+            )
+
+    if values:
+        frappe.db.bulk_insert("Beneficiary Import Log", STANDARD_COLUMNS + LOG_COLUMNS, values)
+
+
+def commit_chunk(job, chunk, transformed, existing, today):
+    """
+    Write one chunk, its journal and the new checkpoint in a single transaction
+
+    A chunk that fails to write is rolled back, as in import_beneficiaries_bulk:
+    its rows are journaled as Error entries and the checkpoint still moves past
+    it, so one bad chunk does not stop the job.
+    """
+    stats = new_stats()
+    stats["total_rows"] = len(chunk)
+    units = [unit for row in transformed if (unit := resolve_row(row, existing, stats, today))]
+
+    if units:
+        try:
+            write_chunk(units, cint(job.chunk_size) or DEFAULT_CHUNK_SIZE)
+        except Exception as e:
+            frappe.db.rollback()
+            discount_chunk(units, stats, str(e)[:100])
+            frappe.log_error(f"Rows {chunk[0][0]}-{chunk[-1][0]}: {str(e)[:100]}", f"Beneficiary Import Job {job.name}")
+    write_journal(job.name, stats)
+
+    values = {
+        field: cint(job.get(field)) + (len(stats[key]) if isinstance(stats[key], list) else stats[key])
+        for key, field in COUNT_FIELDS.items()
+    }
+    values["last_committed_row"] = chunk[-1][0]
+    values["chunks_committed"] = cint(job.chunks_committed) + 1
+    job.db_set(values, update_modified=False)
+    frappe.db.commit()
+
+    frappe.publish_realtime(PROGRESS_EVENT, dict(values, job=job.name), user=job.owner)
+
+
+def process_job(job):
+    existing = prefetch_existing_names()
+    today = datetime.date.today()
+    resume_after = cint(job.last_committed_row)
+
+    rows = ((row_num, row) for row_num, row in read_registry(job.file_path) if row_num > resume_after)
+    chunks = iter_chunks(rows, cint(job.chunk_size) or DEFAULT_CHUNK_SIZE)
+
+    for chunk, transformed in transform_in_pool(chunks, cint(job.workers)):
+        commit_chunk(job, chunk, transformed, existing, today)
+
+
+def run_import_job(job_name):
+    """
+    Run an import job from its last checkpoint until the end of the file
+
+    Rows of a chunk that fails to write are journaled as errors and skipped.
+    Other failures (an unreadable file, a crashed worker) leave the job
+    "Failed" with the reason on the job and every chunk before the failing
+    one committed; running it again resumes there.
+    """
+    with filelock(f"beneficiary_import_job_{job_name}", timeout=5):
+        job = frappe.get_doc("Beneficiary Import Job", job_name)
+        if job.status == "Completed":
+            return
+
+        if not os.path.exists(job.file_path) or get_file_signature(job.file_path) != job.file_signature:
+            job.db_set({"status": "Failed", "error": f"{job.file_path} is missing or changed since the job was created"})
+            frappe.db.commit()
+            return
+
+        job.db_set({"status": "Running", "started_on": job.started_on or now_datetime(), "error": None})
+        frappe.db.commit()
+
+        try:
+            process_job(job)
+        except Exception:
+            frappe.db.rollback()
+            job.reload()
+            job.db_set({"status": "Failed", "error": frappe.get_traceback()})
+            frappe.log_error(title=f"Beneficiary Import Job {job_name} failed")
+            frappe.db.commit()
+            return
+
+        job.db_set({"status": "Completed", "finished_on": now_datetime()})
+        frappe.db.commit()
+
+    frappe.publish_realtime(PROGRESS_EVENT, {"job": job_name, "status": "Completed"}, user=job.owner)
+    if job.successful_imports:
+        enqueue_geocoding_jobs()
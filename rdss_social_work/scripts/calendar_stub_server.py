@@ -0,0 +1,229 @@
+"""
+Local fake of the Google Calendar API
+
+Keeps events in memory and answers both single Calendar requests
+(/calendar/v3/calendars/<calendar>/events[/<event_id>]) and batch requests
+(POST /batch/calendar/v3, multipart/mixed), so calendar code can be
+exercised without Google credentials or network access. Listing supports
+pageToken and syncToken: every change gets a sequence number, the sync token
+is the last number seen, and deleted events stay behind as cancelled
+tombstones. Configurable fractions of operations can be answered with HTTP
+429, and of whole batch requests with HTTP 503, to exercise retries and
+backoff.
+
+Point the app at the fake through site config:
+    "google_calendar_api_root": "http://127.0.0.1:8766/"
+
+Usage:
+    python calendar_stub_server.py --port 8766 --latency 0.05 --rate-limit-ratio 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EVENTS_PATH = re.compile(r"^/calendar/v3/calendars/([^/]+)/events(?:/([^/?]+))?$")
+
+
+class CalendarStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_ratio = 0.0
+    batch_error_ratio = 0.0
+    request_count = 0
+    operation_count = 0
+    events = {}
+    sequence = 0
+    lock = threading.Lock()
+
+    def stamp(self, event):
+        """Record a change: bump the sequence and the event's `updated` time"""
+        type(self).sequence += 1
+        event["sequence_number"] = self.sequence
+        event["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return event
+
+    def list_events(self, query):
+        """One page of events, changed-since-token when a syncToken is given"""
+        if "syncToken" in query and not query["syncToken"][0].isdigit():
+            return 410, error_payload(410, "fullSyncRequired", "Sync token is no longer valid")
+
+        since = int(query["syncToken"][0]) if "syncToken" in query else 0
+        offset = int(query.get("pageToken", ["0"])[0])
+        page_size = int(query.get("maxResults", ["250"])[0])
+        show_deleted = "syncToken" in query or query.get("showDeleted", ["false"])[0] == "true"
+
+        matching = sorted(
+            (event for event in self.events.values()
+             if event["sequence_number"] > since and (show_deleted or event["status"] != "cancelled")),
+            key=lambda event: event["sequence_number"],
+        )
+        page = matching[offset:offset + page_size]
+        body = {"kind": "calendar#events", "items": [public(event) for event in page]}
+        if offset + page_size < len(matching):
+            body["nextPageToken"] = str(offset + page_size)
+        else:
+            body["nextSyncToken"] = str(self.sequence)
+        return 200, body
+
+    def handle_operation(self, method, path, body):
+        """
+        Apply one Calendar operation to the in-memory store
+
+        Returns:
+            tuple: (status, payload or None)
+        """
+        with self.lock:
+            type(self).operation_count += 1
+
+        if self.rate_limit_ratio and random.random() < self.rate_limit_ratio:
+            return 429, error_payload(429, "rateLimitExceeded", "Rate Limit Exceeded")
+
+        match = EVENTS_PATH.match(urlparse(path).path)
+        if not match:
+            return 404, error_payload(404, "notFound", "Not Found")
+
+        event_id = match.group(2)
+        with self.lock:
+            if method == "GET" and not event_id:
+                return self.list_events(parse_qs(urlparse(path).query))
+            if method == "POST" and not event_id:
+                event = self.stamp(dict(json.loads(body or "{}"), id=uuid.uuid4().hex, status="confirmed"))
+                self.events[event["id"]] = event
+                return 200, public(event)
+            if event_id not in self.events or self.events[event_id]["status"] == "cancelled":
+                return 404, error_payload(404, "notFound", "Not Found")
+            if method == "GET":
+                return 200, public(self.events[event_id])
+            if method in ("PUT", "PATCH"):
+                event = dict(self.events[event_id]) if method == "PATCH" else {}
+                event.update(json.loads(body or "{}"), id=event_id, status="confirmed")
+                self.events[event_id] = self.stamp(event)
+                return 200, public(event)
+            if method == "DELETE":
+                self.stamp(self.events[event_id]).update(status="cancelled")
+                return 204, None
+
+        return 405, error_payload(405, "methodNotAllowed", "Method Not Allowed")
+
+    def handle_batch(self, content_type, body):
+        """Split a multipart/mixed batch, apply each part and answer multipart/mixed"""
+        if self.batch_error_ratio and random.random() < self.batch_error_ratio:
+            self.send_json(503, error_payload(503, "backendError", "Backend Error"))
+            return
+
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+
+        for part in message.get_payload():
+            content_id = (part.get("Content-ID") or "").strip("<>")
+            raw = part.get_payload(decode=True) or part.get_payload().encode()
+            head, _, inner_body = raw.replace(b"\r\n", b"\n").partition(b"\n\n")
+            method, path = head.split(b"\n", 1)[0].decode().split(" ")[:2]
+
+            status, payload = self.handle_operation(method, path, inner_body.decode())
+            text = "" if payload is None else json.dumps(payload)
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(text.encode())}\r\n\r\n"
+                f"{text}\r\n"
+            )
+
+        payload = ("".join(parts) + f"--{boundary}--\r\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def handle_request(self):
+        with self.lock:
+            type(self).request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if urlparse(self.path).path.startswith("/batch/"):
+            self.handle_batch(self.headers.get("Content-Type"), body)
+            return
+
+        status, payload = self.handle_operation(self.command, self.path, body.decode())
+        self.send_json(status, payload)
+
+    def send_json(self, status, payload):
+        text = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+def public(event):
+    return {key: value for key, value in event.items() if key != "sequence_number"}
+
+
+def error_payload(code, reason, message):
+    return {"error": {"code": code, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+
+def start_stub_server(port=0, latency=0.0, rate_limit_ratio=0.0, batch_error_ratio=0.0):
+    """
+    Start the fake Calendar API on a background thread
+
+    Returns:
+        tuple: (server, handler_class, root_url); call server.shutdown() when done
+    """
+    handler = type("ConfiguredCalendarStubHandler", (CalendarStubHandler,), {
+        "latency": latency,
+        "rate_limit_ratio": rate_limit_ratio,
+        "batch_error_ratio": batch_error_ratio,
+        "request_count": 0,
+        "operation_count": 0,
+        "events": {},
+        "sequence": 0,
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    return server, handler, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fraction of operations answered with 429")
+    parser.add_argument("--batch-error-ratio", type=float, default=0.0, help="Fraction of batches answered with 503")
+    args = parser.parse_args()
+
+    server, handler, url = start_stub_server(args.port, args.latency, args.rate_limit_ratio, args.batch_error_ratio)
+    print(f"Calendar stub listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,24 +1,43 @@
 import frappe
+from frappe.utils import now_datetime
+
+from rdss_social_work.db_utils import bulk_set_value
+from rdss_social_work.scripts.sync_rdss_events import delete_events
 
 def clear_events():
-    """Delete all existing events from the system"""
+    """
+    Delete all existing events from the system
+
+    Events linked to Google Calendar are cancelled instead, as sync_rdss_events
+    does, so the calendar sync deletes them in Google and unlinks them; a bulk
+    DELETE would leave them behind in Google with the link lost.
+    """
     
     # Get all events
-    events = frappe.get_all('Event', fields=['name'])
+    events = frappe.get_all('Event', fields=['name', 'status', 'custom_google_calendar_event_id'])
     
     # Count before deletion
     total_before = len(events)
     
-    # Delete each event
+    unlinked = [event.name for event in events if not event.custom_google_calendar_event_id]
+    linked = [
+        event.name for event in events
+        if event.custom_google_calendar_event_id and event.status != 'Cancelled'
+    ]
+    
+    # Delete unlinked events with one DELETE per chunk instead of one delete_doc per event
     deleted_count = 0
+    cancelled_count = 0
     errors = []
     
-    for event in events:
-        try:
-            frappe.delete_doc('Event', event.name, force=True)
-            deleted_count += 1
-        except Exception as e:
-            errors.append(f"Error deleting {event.name}: {str(e)}")
+    try:
+        delete_events(unlinked)
+        bulk_set_value('Event', linked, {'status': 'Cancelled', 'modified': now_datetime()})
+        deleted_count = len(unlinked)
+        cancelled_count = len(linked)
+    except Exception as e:
+        frappe.db.rollback()
+        errors.append(f"Error deleting events: {str(e)}")
     
     # Commit the changes
     frappe.db.commit()
@@ -28,6 +47,7 @@ def clear_events():
     
     result = f"Events before deletion: {total_before}\n"
     result += f"Events deleted: {deleted_count}\n"
+    result += f"Google Calendar events cancelled: {cancelled_count}\n"
     result += f"Events remaining: {remaining}\n"
     
     if errors:
@@ -0,0 +1,114 @@
+"""
+Local stub of the Google Maps Geocoding API
+
+Answers /maps/api/geocode/json with deterministic coordinates derived from
+the six-digit postal code in the address, so geocoding code can be exercised
+without an API key or network access. Postal codes starting with "99" return
+ZERO_RESULTS, and a configurable fraction of requests can be answered with
+HTTP 429 to exercise rate-limit handling.
+
+Point the app at the stub through site config:
+    "google_geocoding_api_url": "http://127.0.0.1:8765/maps/api/geocode/json"
+
+Usage:
+    python geocode_stub_server.py --port 8765 --latency 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def coordinates_for(postal_code):
+    """Spread postal codes deterministically over Singapore's bounding box"""
+    value = int(postal_code)
+    lat = 1.22 + (value % 1000) / 1000 * 0.24
+    lng = 103.6 + (value // 1000) / 1000 * 0.42
+    return round(lat, 6), round(lng, 6)
+
+
+class GeocodeStubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    rate_limit_ratio = 0.0
+    request_count = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            type(self).request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.rate_limit_ratio and random.random() < self.rate_limit_ratio:
+            self.send_response(429)
+            self.end_headers()
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        address = (query.get("address") or [""])[0]
+        match = re.search(r"\b(\d{6})\b", address)
+
+        if not match or match.group(1).startswith("99"):
+            body = {"status": "ZERO_RESULTS", "results": []}
+        else:
+            lat, lng = coordinates_for(match.group(1))
+            body = {
+                "status": "OK",
+                "results": [{
+                    "formatted_address": f"{address} (stub)",
+                    "geometry": {"location": {"lat": lat, "lng": lng}},
+                }],
+            }
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, rate_limit_ratio=0.0):
+    """
+    Start the stub on a background thread
+
+    Returns:
+        tuple: (server, handler_class, url); call server.shutdown() when done
+    """
+    handler = type("ConfiguredGeocodeStubHandler", (GeocodeStubHandler,), {
+        "latency": latency,
+        "rate_limit_ratio": rate_limit_ratio,
+        "request_count": 0,
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/maps/api/geocode/json"
+    return server, handler, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    server, handler, url = start_stub_server(args.port, args.latency, args.rate_limit_ratio)
+    print(f"Geocoding stub listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
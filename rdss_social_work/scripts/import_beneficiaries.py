@@ -31,6 +31,40 @@ Optional parameters can be added to the function call:
         --kwargs '{"file_path": "/custom/path/to/file.csv", "test_mode": True}'
 """
 
+# Common date formats to try, in order
+DATE_FORMATS = [
+    '%d %b %Y',      # 16 Oct 2002
+    '%d/%m/%Y',      # 16/10/2002
+    '%d-%m-%Y',      # 16-10-2002
+    '%Y-%m-%d',      # 2002-10-16
+    '%d %B %Y',      # 16 October 2002
+    '%d.%m.%Y',      # 16.10.2002
+    '%m/%d/%Y',      # 10/16/2002
+    '%d/%m/%y',      # 16/10/02
+    '%d-%m-%y',      # 16-10-02
+]
+
+# A date embedded in other text, like "16/03/2022: Updated email add"
+EMBEDDED_DATE = r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})'
+
+# Delimiters a registry export can use; anything else the sniffer suggests is a letter of the data
+REGISTRY_DELIMITERS = ',;\t|'
+
+def detect_delimiter(sample):
+    """
+    Delimiter of a registry CSV from a sample of its first lines
+
+    Args:
+        sample (str): Start of the file
+
+    Returns:
+        str: One of REGISTRY_DELIMITERS, ',' when the sample is ambiguous
+    """
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=REGISTRY_DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
 def import_beneficiaries(file_path=None, test_mode=False, cleanup_first=False):
     """
     Import beneficiaries from CSV file into Frappe DocType and create Beneficiary Family records
@@ -89,11 +123,9 @@ def import_beneficiaries(file_path=None, test_mode=False, cleanup_first=False):
     
     try:
         with open(file_path, 'r', encoding=encoding) as csvfile:
-            # Use csv.Sniffer to detect delimiter
             sample = csvfile.read(1024)
             csvfile.seek(0)
-            sniffer = csv.Sniffer()
-            delimiter = sniffer.sniff(sample).delimiter
+            delimiter = detect_delimiter(sample)
             
             reader = csv.DictReader(csvfile, delimiter=delimiter)
             
@@ -257,7 +289,7 @@ def map_csv_to_beneficiary(row, row_num, stats):
         # Map and parse date of birth
         dob_raw = clean_text(row.get('DOB', ''))
         if dob_raw:
-            beneficiary_data["date_of_birth"] = parse_date(dob_raw)
+            beneficiary_data["date_of_birth"] = parse_row_date(dob_raw, "date of birth", row_num, stats)
         
         # Map BC/NRIC number - handle various formats
         bc_nric = clean_text(row.get('BC / NRIC no.', ''))
@@ -274,7 +306,7 @@ def map_csv_to_beneficiary(row, row_num, stats):
         beneficiary_data["primary_diagnosis"] = diagnosis
         
         # Set diagnosis_date (required field) - use registration date or current date as fallback
-        diagnosis_date = parse_date(row.get('Date of Registration')) or datetime.date.today()
+        diagnosis_date = parse_date(row.get('Date of Registration'), log_failures=False) or datetime.date.today()
         beneficiary_data["diagnosis_date"] = diagnosis_date
         
         # Map address information with length validation
@@ -322,7 +354,7 @@ def map_csv_to_beneficiary(row, row_num, stats):
         # Map registration date
         reg_date_raw = clean_text(row.get('Date of Registration', ''))
         if reg_date_raw:
-            beneficiary_data["registration_date"] = parse_date(reg_date_raw)
+            beneficiary_data["registration_date"] = parse_row_date(reg_date_raw, "registration date", row_num, stats)
         else:
             # Use current date as default registration date
             beneficiary_data["registration_date"] = datetime.date.today().strftime('%Y-%m-%d')
@@ -424,12 +456,13 @@ def map_gender(gender_raw):
     if not gender_raw:
         return ''
     
+    # Keys are upper case, as the lookup is
     gender_mapping = {
         'M': 'Male',
         'F': 'Female',
-        'Male': 'Male',
-        'Female': 'Female',
-        'Other': 'Other'
+        'MALE': 'Male',
+        'FEMALE': 'Female',
+        'OTHER': 'Other'
     }
     
     return gender_mapping.get(gender_raw.strip().upper(), '')
@@ -449,12 +482,13 @@ def map_status(status_raw):
     
     return status_mapping.get(status_raw.strip(), 'Active')
 
-def parse_date(date_string):
+def parse_date(date_string, log_failures=True):
     """
     Parse date from various formats commonly found in CSV
     
     Args:
         date_string (str): Date string to parse
+        log_failures (bool, optional): Write an Error Log entry for unparseable dates
     
     Returns:
         str: Date in YYYY-MM-DD format or None if parsing fails
@@ -464,20 +498,7 @@ def parse_date(date_string):
     
     date_string = date_string.strip()
     
-    # Common date formats to try
-    date_formats = [
-        '%d %b %Y',      # 16 Oct 2002
-        '%d/%m/%Y',      # 16/10/2002
-        '%d-%m-%Y',      # 16-10-2002
-        '%Y-%m-%d',      # 2002-10-16
-        '%d %B %Y',      # 16 October 2002
-        '%d.%m.%Y',      # 16.10.2002
-        '%m/%d/%Y',      # 10/16/2002
-        '%d/%m/%y',      # 16/10/02
-        '%d-%m-%y',      # 16-10-02
-    ]
-    
-    for date_format in date_formats:
+    for date_format in DATE_FORMATS:
         try:
             parsed_date = datetime.datetime.strptime(date_string, date_format)
             return parsed_date.strftime('%Y-%m-%d')
@@ -485,15 +506,24 @@ def parse_date(date_string):
             continue
     
     # Try to handle dates with additional text like "16/03/2022: Updated email add"
-    date_match = re.search(r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})', date_string)
-    if date_match:
+    date_match = re.search(EMBEDDED_DATE, date_string)
+    # An embedded date that is itself invalid (e.g. 31/02/2020) would recurse forever
+    if date_match and date_match.group(1) != date_string:
         clean_date = date_match.group(1)
-        return parse_date(clean_date)
+        return parse_date(clean_date, log_failures)
     
     # Log warning for unparseable dates
-    frappe.log_error(f"Could not parse date: {date_string}", "Date Parse Warning")
+    if log_failures:
+        frappe.log_error(f"Could not parse date: {date_string}", "Date Parse Warning")
     return None
 
+def parse_row_date(date_string, label, row_num, stats):
+    """Parse a date from a CSV row, recording unparseable values as import warnings"""
+    parsed = parse_date(date_string, log_failures=False)
+    if not parsed:
+        stats["warnings"].append(f"Row {row_num}: Could not parse {label}: {date_string}")
+    return parsed
+
 def display_import_summary(stats, test_mode):
     """Display import summary statistics"""
     mode_text = "TEST MODE - " if test_mode else ""
@@ -587,25 +617,9 @@ def create_or_get_beneficiary_family(row, beneficiary_doc, created_families, tes
         if not beneficiary_name:
             return None
             
-        # Create unique family name using full beneficiary name + parent info to ensure uniqueness
-        # This ensures each CSV row creates its own family
         parent_name = row.get("Parent's name", '').strip()
         contact_info = row.get('Contact', '').strip()
-        
-        # Use beneficiary name + parent name + contact to create truly unique family identifier
-        if parent_name:
-            family_name = f"{beneficiary_name} & {parent_name} Family"
-        else:
-            # If no parent, use beneficiary name + contact info for uniqueness
-            family_name = f"{beneficiary_name} Family"
-            if contact_info:
-                # Add last 4 digits of contact for uniqueness
-                contact_suffix = contact_info[-4:] if len(contact_info) >= 4 else contact_info
-                family_name = f"{beneficiary_name} Family ({contact_suffix})"
-            
-        # Ensure family name doesn't exceed field limits (140 chars for Frappe)
-        if len(family_name) > 140:
-            family_name = family_name[:137] + "..."
+        family_name = get_base_family_name(row)
             
         # Create unique identifier using row data hash to prevent any duplicates
         # This ensures each CSV row gets its own family regardless of name similarities
@@ -619,8 +633,14 @@ def create_or_get_beneficiary_family(row, beneficiary_doc, created_families, tes
             
         # Ensure final family name is unique in database
         original_family_name = family_name
+        # Every taken variant of the name in one query, instead of one exists() per counter value
+        taken_names = set(frappe.get_all(
+            "Beneficiary Family",
+            filters={"family_name": ["like", f"{original_family_name[:130]}%"]},
+            pluck="family_name"
+        ))
         counter = 1
-        while frappe.db.exists("Beneficiary Family", {"family_name": family_name}):
+        while family_name in taken_names:
             family_name = f"{original_family_name} ({counter})"
             if len(family_name) > 140:
                 # Truncate original name to make room for counter
@@ -639,22 +659,8 @@ def create_or_get_beneficiary_family(row, beneficiary_doc, created_families, tes
             return family_doc
         
         # Create new family record
-        family_data = {
-            "doctype": "Beneficiary Family",
-            "naming_series": "FAM-.YYYY.-",
-            "family_name": family_name,
-            "family_head": beneficiary_doc.name if beneficiary_doc and not test_mode else None,
-            "registration_date": parse_date(row.get('Date of Registration')) or datetime.date.today(),
-            "family_status": map_status(row.get('Status', '').strip()) or "Active",
-            "primary_address_line_1": row.get('Address', '').strip(),
-            "primary_postal_code": row.get('Postal Code', '').strip(),
-            "primary_mobile_number": row.get('Contact', '').strip(),
-            "primary_email_address": parse_and_validate_email(row.get('Email', '')),
-            "emergency_contact_1_name": row.get("Parent's name", '').strip(),
-            "emergency_contact_1_relationship": row.get('Beneficiary Relationship', '').strip(),
-            "emergency_contact_1_phone": row.get('Contact', '').strip(),
-            "primary_social_worker": "Administrator"  # Default, can be updated later
-        }
+        family_data = map_csv_to_family(row, family_name)
+        family_data["family_head"] = beneficiary_doc.name if beneficiary_doc and not test_mode else None
         
         family_doc = frappe.get_doc(family_data)
         
@@ -692,6 +698,100 @@ def create_or_get_beneficiary_family(row, beneficiary_doc, created_families, tes
         print(f"DEBUG: Family creation failed - {error_details}")
         return None
 
+def get_base_family_name(row):
+    """
+    Family name for a CSV row before it is made unique
+    
+    Each CSV row represents one family unit, so the name combines the
+    beneficiary with the parent's name, or with the last 4 digits of the contact.
+    """
+    beneficiary_name = row.get('Name', '').strip()
+    parent_name = row.get("Parent's name", '').strip()
+    contact_info = row.get('Contact', '').strip()
+    
+    if parent_name:
+        family_name = f"{beneficiary_name} & {parent_name} Family"
+    else:
+        family_name = f"{beneficiary_name} Family"
+        if contact_info:
+            # Add last 4 digits of contact for uniqueness
+            contact_suffix = contact_info[-4:] if len(contact_info) >= 4 else contact_info
+            family_name = f"{beneficiary_name} Family ({contact_suffix})"
+    
+    # Ensure family name doesn't exceed field limits (140 chars for Frappe)
+    if len(family_name) > 140:
+        family_name = family_name[:137] + "..."
+    
+    return family_name
+
+def map_csv_to_family(row, family_name):
+    """
+    Map CSV row data to Beneficiary Family DocType fields
+    
+    Args:
+        row (dict): CSV row data
+        family_name (str): Unique family name
+    
+    Returns:
+        dict: Mapped family data
+    """
+    return {
+        "doctype": "Beneficiary Family",
+        "naming_series": "FAM-.YYYY.-",
+        "family_name": family_name,
+        "registration_date": parse_date(row.get('Date of Registration'), log_failures=False) or datetime.date.today(),
+        "family_status": map_status(row.get('Status', '').strip()) or "Active",
+        "primary_address_line_1": row.get('Address', '').strip(),
+        "primary_postal_code": row.get('Postal Code', '').strip(),
+        "primary_mobile_number": row.get('Contact', '').strip(),
+        "primary_email_address": parse_and_validate_email(row.get('Email', '')),
+        "emergency_contact_1_name": row.get("Parent's name", '').strip(),
+        "emergency_contact_1_relationship": row.get('Beneficiary Relationship', '').strip(),
+        "emergency_contact_1_phone": row.get('Contact', '').strip(),
+        "primary_social_worker": "Administrator"  # Default, can be updated later
+    }
+
+def map_csv_to_parent(row):
+    """
+    Map the parent/guardian columns of a CSV row to Beneficiary DocType fields
+    
+    Args:
+        row (dict): CSV row data
+    
+    Returns:
+        dict: Mapped parent data or None if the row has no parent
+    """
+    parent_name = row.get("Parent's name", '').strip()
+    if not parent_name:
+        return None
+    
+    # Determine parent gender from relationship
+    relationship = row.get('Beneficiary Relationship', '').strip().lower()
+    parent_gender = "Female" if relationship == "mother" else "Male" if relationship == "father" else ""
+    
+    # Validate and clean parent data
+    parent_name = parent_name[:140] if len(parent_name) > 140 else parent_name
+    parent_address = row.get('Address', '').strip()[:140] if row.get('Address', '').strip() else ""
+    parent_postal = row.get('Postal Code', '').strip()[:20] if row.get('Postal Code', '').strip() else ""
+    parent_mobile = row.get('Contact', '').strip()[:20] if row.get('Contact', '').strip() else ""
+    parent_email = parse_and_validate_email(row.get('Email', ''))
+    
+    return {
+        "doctype": "Beneficiary",
+        "naming_series": "BEN-.YYYY.-",
+        "beneficiary_name": parent_name,
+        "gender": parent_gender,
+        "beneficiary_status": "Active",
+        "address_line_1": parent_address,
+        "postal_code": parent_postal,
+        "mobile_number": parent_mobile,
+        "email_address": parent_email,
+        "relationship_to_family": "Parent/Guardian",
+        "registration_date": parse_date(row.get('Date of Registration'), log_failures=False) or datetime.date.today(),
+        "diagnosis_date": datetime.date.today(),  # Required field for parents
+        "primary_diagnosis": "Family Member"  # Required field for parents
+    }
+
 def create_parent_beneficiary(row, family_doc, test_mode):
     """
     Create parent/guardian as additional beneficiary if data exists
@@ -714,34 +814,9 @@ def create_parent_beneficiary(row, family_doc, test_mode):
         if existing_parent:
             return frappe.get_doc("Beneficiary", existing_parent)
         
-        # Determine parent gender from relationship
-        relationship = row.get('Beneficiary Relationship', '').strip().lower()
-        parent_gender = "Female" if relationship == "mother" else "Male" if relationship == "father" else ""
-        
-        # Validate and clean parent data
-        parent_name = parent_name[:140] if len(parent_name) > 140 else parent_name
-        parent_address = row.get('Address', '').strip()[:140] if row.get('Address', '').strip() else ""
-        parent_postal = row.get('Postal Code', '').strip()[:20] if row.get('Postal Code', '').strip() else ""
-        parent_mobile = row.get('Contact', '').strip()[:20] if row.get('Contact', '').strip() else ""
-        parent_email = parse_and_validate_email(row.get('Email', ''))
-        
         # Create parent beneficiary data
-        parent_data = {
-            "doctype": "Beneficiary",
-            "naming_series": "BEN-.YYYY.-",
-            "beneficiary_name": parent_name,
-            "gender": parent_gender,
-            "beneficiary_status": "Active",
-            "address_line_1": parent_address,
-            "postal_code": parent_postal,
-            "mobile_number": parent_mobile,
-            "email_address": parent_email,
-            "beneficiary_family": family_doc.name if family_doc and not test_mode else None,
-            "relationship_to_family": "Parent/Guardian",
-            "registration_date": parse_date(row.get('Date of Registration')) or datetime.date.today(),
-            "diagnosis_date": datetime.date.today(),  # Required field for parents
-            "primary_diagnosis": "Family Member"  # Required field for parents
-        }
+        parent_data = map_csv_to_parent(row)
+        parent_data["beneficiary_family"] = family_doc.name if family_doc and not test_mode else None
         
         parent_doc = frappe.get_doc(parent_data)
         
@@ -865,8 +940,7 @@ def test_specific_rows():
     with open(file_path, 'r', encoding=encoding) as csvfile:
         sample = csvfile.read(1024)
         csvfile.seek(0)
-        sniffer = csv.Sniffer()
-        delimiter = sniffer.sniff(sample).delimiter
+        delimiter = detect_delimiter(sample)
         
         reader = csv.DictReader(csvfile, delimiter=delimiter)
         fieldnames = [field.strip() for field in reader.fieldnames]
@@ -0,0 +1,244 @@
+"""
+Vectorized cleansing of the beneficiary registry CSV
+
+The importers clean the registry one row at a time (parse_date, map_gender,
+map_status, clean_bc_nric, parse_and_validate_email per row). This stage
+loads the whole CSV into a pandas DataFrame and applies the same rules
+column-wise, so a large registry refresh is cleaned in seconds:
+
+    * dates: each of the importer's DATE_FORMATS is tried in order on the
+      values still unparsed, then the embedded-date fallback
+    * gender and status: mapped with lookup tables
+    * BC/NRIC numbers and emails: normalized with vectorized string operations
+
+Rows the importer would not import (empty rows, missing name or diagnosis,
+an invalid contact number, a name repeated earlier in the file) go to a
+rejects CSV with the original values and the reason. The remaining rows are
+written to a Parquet staging file whose columns use the Beneficiary field
+names; non-fatal problems (invalid email, unparseable dates, truncated
+name) are listed in its `issues` column.
+
+Nothing is read from or written to the database, so whether a name
+already exists is left to the importer.
+
+Usage:
+    bench --site [site-name] execute rdss_social_work.scripts.registry_cleansing.cleanse_registry \
+        --kwargs '{"file_path": "/path/to/registry.csv"}'
+"""
+
+import os
+import time
+from codecs import BOM_UTF8
+
+import frappe
+import pandas as pd
+
+from rdss_social_work.scripts.import_beneficiaries import DATE_FORMATS, EMBEDDED_DATE, detect_delimiter
+
+NULL_VALUES = ["NULL", "null", "None"]
+BC_NRIC_NULL_VALUES = ["N.A", "NA", "NULL", "NONE"]
+
+GENDERS = {"M": "Male", "F": "Female", "MALE": "Male", "FEMALE": "Female", "OTHER": "Other"}
+STATUSES = {"active": "Active", "inactive": "Inactive"}
+
+EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
+PHONE_PATTERN = r"\d{8,15}"
+
+STAGING_COLUMNS = [
+    "row_num", "beneficiary_name", "gender", "date_of_birth", "bc_nric_no", "primary_diagnosis",
+    "registration_date", "current_status", "address_line_1", "postal_code", "contact", "mobile_number",
+    "email_address", "parent_name", "parent_relationship", "issues",
+]
+
+
+def get_output_dir():
+    return frappe.get_site_path("private", "files", "registry_staging")
+
+
+def load_registry(file_path):
+    """
+    Read the registry CSV as strings, with the delimiter detected like the importers do
+
+    Returns:
+        DataFrame: One column per CSV header, indexed by row_num (the header is row 1)
+    """
+    with open(file_path, "rb") as f:
+        encoding = "utf-8-sig" if f.read(len(BOM_UTF8)) == BOM_UTF8 else "utf-8"
+    with open(file_path, "r", encoding=encoding) as f:
+        delimiter = detect_delimiter(f.read(1024))
+
+    frame = pd.read_csv(file_path, sep=delimiter, dtype=str, keep_default_na=False, encoding=encoding)
+    frame.columns = [column.strip() for column in frame.columns]
+    frame.index = pd.RangeIndex(2, len(frame) + 2, name="row_num")
+    return frame
+
+
+def clean_column(frame, column):
+    """clean_text for a whole column; a missing column reads as empty strings"""
+    if column not in frame:
+        return pd.Series("", index=frame.index, dtype=object)
+    values = frame[column].fillna("").astype(str)
+    return values.mask(values.isin(NULL_VALUES), "").str.strip()
+
+
+def parse_dates(values):
+    """
+    parse_date for a whole column
+
+    The result is built as datetime.date objects, not a datetime64 column,
+    so dates outside the nanosecond range (0001-01-01, 31/12/9999) are kept
+    as parse_date keeps them. A pandas that cannot parse such a date reads
+    it as NaT, which the caller reports as an unparseable date.
+
+    Returns:
+        Series: datetime.date values, None where no format matches
+    """
+    parsed = pd.Series(None, index=values.index, dtype=object)
+    for candidates in (values, values.str.extract(EMBEDDED_DATE, expand=False)):
+        for date_format in DATE_FORMATS:
+            todo = parsed.isna() & candidates.notna() & (candidates != "")
+            if not todo.any():
+                break
+            converted = pd.to_datetime(candidates[todo], format=date_format, errors="coerce")
+            parsed[todo] = converted.dt.date.astype(object).where(converted.notna(), None)
+
+    return parsed.where(parsed.notna(), None)
+
+
+def clean_bc_nric_column(values):
+    """clean_bc_nric for a whole column"""
+    # Object dtype keeps Python's Unicode-aware \W, as str.isalnum in clean_bc_nric
+    values = values.astype(object).str.strip()
+    cleaned = (
+        values.str.replace("S(", "S", regex=False)
+        .str.replace(")", "", regex=False)
+        .str.replace(r"[\W_]", "", regex=True)
+    )
+    return cleaned.mask(values.str.upper().isin(BC_NRIC_NULL_VALUES) | (cleaned.str.len() < 2), "")
+
+
+def first_valid_email(values):
+    """parse_and_validate_email for a whole column: the first valid address of a ; or , separated list"""
+    candidates = values.str.split(r"[;,]", regex=True).explode().str.strip()
+    valid = candidates[candidates.str.fullmatch(EMAIL_PATTERN).fillna(False).astype(bool)]
+    return valid.groupby(level=0).first().reindex(values.index, fill_value="")
+
+
+def first_reason(checks, index):
+    """The first failing check per row, in priority order; "" for rows that pass every check"""
+    reason = pd.Series("", index=index, dtype=object)
+    for mask, message in checks:
+        reason = reason.mask((reason == "") & mask, message)
+    return reason
+
+
+def join_issues(checks, index):
+    """Semicolon-separated list of every non-fatal issue per row"""
+    issues = pd.Series("", index=index, dtype=object)
+    for mask, message in checks:
+        issues = issues + mask.map({True: f"{message}; ", False: ""})
+    return issues.str.rstrip("; ")
+
+
+def cleanse_frame(frame):
+    """
+    Clean a loaded registry column-wise
+
+    Returns:
+        tuple: (staging DataFrame, rejects DataFrame)
+    """
+    name = clean_column(frame, "Name")
+    contact = clean_column(frame, "Contact")
+    email_raw = clean_column(frame, "Email")
+    dob_raw = clean_column(frame, "DOB")
+    registration_raw = clean_column(frame, "Date of Registration")
+
+    digits = contact.str.replace(r"[ \-+]", "", regex=True)
+    raw_name = frame["Name"].fillna("").astype(str).str.strip() if "Name" in frame else name
+    empty_row = (frame.fillna("").astype(str) == "").all(axis=1) | (raw_name == "")
+
+    invalid = first_reason([
+        (empty_row, "Skipped empty row"),
+        (name == "", "Missing beneficiary name"),
+        (clean_column(frame, "Diagnosis") == "", "Primary diagnosis is required"),
+        ((contact != "") & ~digits.str.fullmatch(PHONE_PATTERN).fillna(False).astype(bool),
+         "Invalid contact number: use 8-15 digits"),
+    ], frame.index)
+
+    # As in the importer, a name is taken only by an earlier row that is itself imported
+    valid = (invalid == "").astype(int)
+    repeated = (valid.groupby(name.str[:140]).cumsum() - valid) > 0
+    rejected = first_reason([
+        (empty_row, "Skipped empty row"),
+        (name == "", "Missing beneficiary name"),
+        (repeated, "Name repeated earlier in the file"),
+        (invalid != "", invalid),
+    ], frame.index)
+
+    staging = pd.DataFrame({
+        "row_num": frame.index,
+        "beneficiary_name": name.str[:140],
+        "gender": clean_column(frame, "Gender").str.upper().map(GENDERS).fillna(""),
+        "date_of_birth": parse_dates(dob_raw),
+        "bc_nric_no": clean_bc_nric_column(clean_column(frame, "BC / NRIC no.")),
+        "primary_diagnosis": clean_column(frame, "Diagnosis"),
+        "registration_date": parse_dates(registration_raw),
+        "current_status": clean_column(frame, "Status").str.lower().map(STATUSES).fillna("Active"),
+        "address_line_1": clean_column(frame, "Address").str[:140],
+        "postal_code": clean_column(frame, "Postal Code").str[:20],
+        "contact": contact,
+        "mobile_number": contact.where(contact.str[:1].isin(["8", "9"]), ""),
+        "email_address": first_valid_email(email_raw).str[:140],
+        "parent_name": clean_column(frame, "Parent's name"),
+        "parent_relationship": clean_column(frame, "Beneficiary Relationship"),
+    }, index=frame.index)
+
+    staging["issues"] = join_issues([
+        (name.str.len() > 140, "name truncated to 140 characters"),
+        ((email_raw != "") & (staging["email_address"] == ""), "invalid email"),
+        ((dob_raw != "") & staging["date_of_birth"].isna(), "unparseable date of birth"),
+        ((registration_raw != "") & staging["registration_date"].isna(), "unparseable registration date"),
+    ], frame.index)
+
+    keep = rejected == ""
+    rejects = frame[~keep].assign(reason=rejected[~keep]).reset_index()
+    return staging[keep][STAGING_COLUMNS].reset_index(drop=True), rejects
+
+
+def cleanse_registry(file_path, output_dir=None):
+    """
+    Clean a registry CSV into a Parquet staging file and a rejects CSV
+
+    Args:
+        file_path (str): Registry CSV
+        output_dir (str, optional): Where to write both files; defaults to the
+            site's private/files/registry_staging
+
+    Returns:
+        dict: Row counts, output paths and elapsed seconds
+    """
+    start = time.perf_counter()
+    output_dir = output_dir or get_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+
+    frame = load_registry(file_path)
+    staging, rejects = cleanse_frame(frame)
+
+    staging_file = os.path.join(output_dir, f"{stem}.clean.parquet")
+    rejects_file = os.path.join(output_dir, f"{stem}.rejects.csv")
+    staging.to_parquet(staging_file, index=False)
+    rejects.to_csv(rejects_file, index=False)
+
+    summary = {
+        "total_rows": len(frame),
+        "clean_rows": len(staging),
+        "rejected_rows": len(rejects),
+        "rows_with_issues": int((staging["issues"] != "").sum()),
+        "staging_file": staging_file,
+        "rejects_file": rejects_file,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+    print(f"Cleansed {summary['total_rows']} rows in {summary['elapsed']}s: "
+          f"{summary['clean_rows']} clean, {summary['rejected_rows']} rejected")
+    return summary
@@ -0,0 +1,238 @@
+"""
+Sync Events with rdss-events.csv
+
+import_rdss_events inserts every CSV row as a new Event, and
+import_rdss_events_with_clear first deletes every Event one document at a
+time. This sync diffs the CSV against the existing Events instead, keyed by
+custom_rdss_event_id (the CSV's Event_ID), and only writes what changed:
+
+    * new rows are bulk inserted in chunks, named from the Event series
+    * changed rows are updated, bumping `modified` so the Google Calendar
+      push picks them up
+    * Events whose Event_ID is no longer in the CSV are deleted with one
+      DELETE per chunk; Events linked to Google Calendar are cancelled
+      instead, so the calendar sync removes them from Google too
+
+Events imported before custom_rdss_event_id existed are matched once by the
+Event ID in their description, and extra copies of the same event (from
+running the importer twice) are removed.
+
+Usage:
+    bench --site [site-name] execute rdss_social_work.scripts.sync_rdss_events.sync_rdss_events
+    bench --site [site-name] execute rdss_social_work.scripts.sync_rdss_events.sync_rdss_events \
+        --kwargs '{"dry_run": true}'
+"""
+
+import re
+from datetime import timedelta
+
+import frappe
+from frappe.utils import cint, get_datetime, now_datetime
+
+from rdss_social_work.db_utils import bulk_set_value, bulk_update_column, reserve_series_names
+from rdss_social_work.scripts.import_rdss_events import get_events_file_path, map_csv_to_event, read_events_csv
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Event autonames from "EV.#####"
+EVENT_SERIES = "EV."
+
+STANDARD_COLUMNS = ["name", "creation", "modified", "owner", "modified_by", "docstatus", "idx"]
+
+SYNC_FIELDS = ["subject", "event_category", "event_type", "status", "all_day", "starts_on", "ends_on", "description"]
+DATETIME_FIELDS = ("starts_on", "ends_on")
+
+EVENT_ID_IN_DESCRIPTION = re.compile(r"<strong>Event ID:</strong>\s*([^<]*?)\s*</p>")
+
+
+def load_csv_events(file_path):
+    """
+    Mapped Event values of every CSV row, by Event_ID
+
+    Returns:
+        tuple: ({event_id: values}, [error messages])
+    """
+    events, errors = {}, []
+    for row in read_events_csv(file_path):
+        event_id = row.get("Event_ID", "").strip()
+        # Skip empty rows
+        if not event_id:
+            continue
+        if event_id in events:
+            errors.append(f"Event_ID {event_id} appears more than once; the first row is used")
+            continue
+        events[event_id] = map_csv_to_event(row)
+    return events, errors
+
+
+def get_existing_events():
+    """
+    Events created from the CSV, keyed or not yet keyed
+
+    Returns:
+        tuple: ({event_id: row}, {name: event_id} to adopt, [names of extra copies])
+    """
+    rows = frappe.get_all(
+        "Event",
+        fields=["name", "custom_rdss_event_id", "custom_google_calendar_event_id"] + SYNC_FIELDS,
+        or_filters=[
+            ["custom_rdss_event_id", "is", "set"],
+            ["description", "like", "%<strong>Event ID:</strong>%"],
+        ],
+        order_by="creation asc",
+    )
+
+    existing, adopt, copies = {}, {}, []
+    # Keyed Events first, so a legacy copy never displaces one already matched
+    for row in sorted(rows, key=lambda row: not row.custom_rdss_event_id):
+        event_id = row.custom_rdss_event_id
+        if not event_id:
+            match = EVENT_ID_IN_DESCRIPTION.search(row.description or "")
+            if not match or not match.group(1):
+                continue
+            event_id = match.group(1)
+
+        if event_id in existing:
+            copies.append(row)
+            continue
+        if not row.custom_rdss_event_id:
+            adopt[row.name] = event_id
+        existing[event_id] = row
+
+    return existing, adopt, copies
+
+
+def get_changes(row, values):
+    """The fields of `values` that differ from the existing Event row"""
+    changes = {}
+    for field in SYNC_FIELDS:
+        value = values[field]
+        if field in DATETIME_FIELDS:
+            # Undated rows keep whatever date the Event already has
+            if value is None or get_datetime(row[field]) == value:
+                continue
+        elif field == "all_day":
+            if cint(row[field]) == value:
+                continue
+        elif (row[field] or "") == (value or ""):
+            continue
+        changes[field] = value
+    return changes
+
+
+def plan_sync(csv_events, existing, copies):
+    """
+    What the sync has to write
+
+    Returns:
+        frappe._dict: inserts [values], updates {name: changes},
+            deletes [names], cancels [names]
+    """
+    plan = frappe._dict(inserts=[], updates={}, deletes=[], cancels=[])
+
+    for event_id, values in csv_events.items():
+        row = existing.get(event_id)
+        if not row:
+            plan.inserts.append(values)
+        elif changes := get_changes(row, values):
+            plan.updates[row.name] = changes
+
+    removed = [row for event_id, row in existing.items() if event_id not in csv_events] + copies
+    for row in removed:
+        if not row.custom_google_calendar_event_id:
+            plan.deletes.append(row.name)
+        elif row.status != "Cancelled":
+            plan.cancels.append(row.name)
+
+    return plan
+
+
+def insert_events(inserts, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bulk insert new Events; Event hooks are skipped, as nothing in them applies to imported events"""
+    names = reserve_series_names(EVENT_SERIES, len(inserts))
+    timestamp, user = now_datetime(), frappe.session.user
+
+    values = []
+    for name, event in zip(names, inserts):
+        starts_on = event["starts_on"] or timestamp
+        ends_on = event["ends_on"] or starts_on + timedelta(hours=1)
+        values.append(
+            (name, timestamp, timestamp, user, user, 0, 0)
+            + tuple(event[field] for field in SYNC_FIELDS if field not in DATETIME_FIELDS)
+            + (starts_on, ends_on, event["custom_rdss_event_id"])
+        )
+
+    columns = (
+        STANDARD_COLUMNS
+        + [field for field in SYNC_FIELDS if field not in DATETIME_FIELDS]
+        + list(DATETIME_FIELDS)
+        + ["custom_rdss_event_id"]
+    )
+    frappe.db.bulk_insert("Event", columns, values, chunk_size=chunk_size)
+
+
+def delete_events(names, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Delete Events and their participant rows with one DELETE per chunk each, without document hooks"""
+    names = list(names)
+    for start in range(0, len(names), chunk_size):
+        chunk = names[start:start + chunk_size]
+        frappe.db.delete("Event Participants", {"parenttype": "Event", "parent": ["in", chunk]})
+        frappe.db.delete("Event", {"name": ["in", chunk]})
+
+
+def sync_rdss_events(file_path=None, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Insert, update and delete Events so they match the events CSV
+
+    Args:
+        file_path (str, optional): Events CSV; defaults to public/rdss-events.csv
+        dry_run (bool): Only report what would change
+        chunk_size (int): Rows per INSERT / DELETE statement
+
+    Returns:
+        dict: Counts of inserted, updated, deleted, cancelled and unchanged
+            Events, and any errors
+    """
+    file_path = file_path or get_events_file_path()
+    chunk_size = cint(chunk_size) or DEFAULT_CHUNK_SIZE
+
+    csv_events, errors = load_csv_events(file_path)
+    existing, adopt, copies = get_existing_events()
+    plan = plan_sync(csv_events, existing, copies)
+
+    summary = {
+        "inserted": len(plan.inserts),
+        "updated": len(plan.updates),
+        "deleted": len(plan.deletes),
+        "cancelled": len(plan.cancels),
+        "unchanged": len(csv_events) - len(plan.inserts) - len(plan.updates),
+        "errors": errors,
+        "dry_run": bool(dry_run),
+    }
+
+    if not dry_run:
+        try:
+            bulk_update_column("Event", "custom_rdss_event_id", adopt, chunk_size=chunk_size)
+            if plan.inserts:
+                insert_events(plan.inserts, chunk_size)
+            for name, changes in plan.updates.items():
+                frappe.db.set_value("Event", name, changes)
+            delete_events(plan.deletes, chunk_size)
+            bulk_set_value("Event", plan.cancels, {"status": "Cancelled", "modified": now_datetime()}, chunk_size)
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(title="RDSS Event Sync Error")
+            raise
+
+    print(
+        f"{'Dry run: ' if dry_run else ''}{summary['inserted']} inserted, {summary['updated']} updated, "
+        f"{summary['deleted']} deleted, {summary['cancelled']} cancelled, {summary['unchanged']} unchanged"
+    )
+    for error in errors:
+        print(f"- {error}")
+    return summary
+
+
+if __name__ == "__main__":
+    sync_rdss_events()
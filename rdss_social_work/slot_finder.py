@@ -0,0 +1,197 @@
+"""
+Free-slot search for appointment booking
+
+Answers "when is this worker (or this group of workers) next free for a
+90-minute home visit?" from the Appointment doctype:
+
+    1. the workers' active appointments in the date range are loaded with one
+       query and turned into busy intervals (optionally padded for travel)
+    2. busy intervals are sorted and merged; for a joint search the intervals
+       of every worker go into the same merge, so a gap in the result is a
+       time when all of them are free
+    3. the merged intervals are swept against the working-hours windows of
+       each day, and gaps long enough for the appointment become slots
+
+Sorting dominates, so a search is O(n log n) in the number of appointments.
+
+Site config:
+    appointment_working_hours (list): Start and end of the working day (default ["09:00", "18:00"])
+    appointment_working_days (list): Working weekdays, Monday = 0 (default [0, 1, 2, 3, 4])
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.utils import add_days, cint, get_time, getdate, now_datetime, today
+
+from rdss_social_work.rdss_social_work.doctype.appointment.appointment import get_default_duration
+from rdss_social_work.scheduling_conflicts import is_offsite, load_appointments
+from rdss_social_work.spatial_search import SEARCH_ROLES
+
+DEFAULT_WORKING_HOURS = ("09:00", "18:00")
+DEFAULT_WORKING_DAYS = (0, 1, 2, 3, 4)
+DEFAULT_SEARCH_DAYS = 14
+DEFAULT_STEP_MINUTES = 15
+
+
+def merge_intervals(intervals):
+    """
+    Merge overlapping or touching (start, end) intervals
+
+    Returns:
+        list: Sorted, disjoint intervals
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def get_working_windows(from_date, to_date, not_before=None):
+    """Working-hours (start, end) windows for every working day in the range"""
+    hours = frappe.conf.get("appointment_working_hours") or DEFAULT_WORKING_HOURS
+    days = frappe.conf.get("appointment_working_days") or DEFAULT_WORKING_DAYS
+    day_start, day_end = get_time(hours[0]), get_time(hours[1])
+
+    windows = []
+    date = getdate(from_date)
+    while date <= getdate(to_date):
+        if date.weekday() in days:
+            start = datetime.combine(date, day_start)
+            end = datetime.combine(date, day_end)
+            if not_before and start < not_before:
+                start = not_before
+            if start < end:
+                windows.append((start, end))
+        date = add_days(date, 1)
+    return windows
+
+
+def free_gaps(busy, windows):
+    """
+    Subtract merged busy intervals from working windows
+
+    Both lists are sorted, so a single forward sweep suffices.
+    """
+    gaps = []
+    i = 0
+    for window_start, window_end in windows:
+        while i < len(busy) and busy[i][1] <= window_start:
+            i += 1
+
+        cursor = window_start
+        j = i
+        while j < len(busy) and busy[j][0] < window_end:
+            if busy[j][0] > cursor:
+                gaps.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+
+        if cursor < window_end:
+            gaps.append((cursor, window_end))
+    return gaps
+
+
+def round_up(moment, step_minutes):
+    """Round a datetime up to the next multiple of step_minutes past midnight"""
+    midnight = datetime.combine(moment.date(), datetime.min.time())
+    minutes = (moment - midnight).total_seconds() / 60
+    return midnight + timedelta(minutes=math.ceil(minutes / step_minutes - 1e-9) * step_minutes)
+
+
+def find_slots(busy_intervals, windows, duration_minutes, limit=5, step_minutes=DEFAULT_STEP_MINUTES, per_gap=1):
+    """
+    First free slots that fit a duration
+
+    Args:
+        busy_intervals (list): (start, end) datetimes, in any order, from any number of workers
+        windows (list): Sorted working (start, end) windows
+        duration_minutes (int): Length of the appointment
+        limit (int): Number of slots to return
+        step_minutes (int): Slot starts are aligned to this grid
+        per_gap (int): Maximum slots offered from one continuous free period
+
+    Returns:
+        list: [(slot_start, slot_end, free_until)]
+    """
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=step_minutes)
+    slots = []
+
+    for gap_start, gap_end in free_gaps(merge_intervals(busy_intervals), windows):
+        start = round_up(gap_start, step_minutes)
+        offered = 0
+        while start + duration <= gap_end and offered < per_gap:
+            slots.append((start, start + duration, gap_end))
+            offered += 1
+            if len(slots) >= limit:
+                return slots
+            start += max(duration, step)
+
+    return slots
+
+
+def get_busy_intervals(social_workers, from_date, to_date, travel_buffer_minutes=0):
+    """Busy (start, end) intervals of the given workers, padded around off-site appointments"""
+    buffer = timedelta(minutes=travel_buffer_minutes)
+    intervals = []
+    for appointments in load_appointments(social_workers, from_date, to_date).values():
+        for appointment in appointments:
+            pad = buffer if is_offsite(appointment) else timedelta(0)
+            intervals.append((appointment.start - pad, appointment.end + pad))
+    return intervals
+
+
+@frappe.whitelist()
+def find_free_slots(social_workers=None, appointment_type=None, duration_minutes=None, from_date=None,
+                    to_date=None, limit=5, per_gap=1, step_minutes=DEFAULT_STEP_MINUTES, travel_buffer_minutes=0):
+    """
+    Find the next free slots for one worker, or joint slots for several workers
+
+    Args:
+        social_workers (str | list, optional): User or list of users (default: current user);
+            with several users only times when all of them are free are returned
+        appointment_type (str, optional): Used for the default duration (see Appointment.before_save)
+        duration_minutes (int, optional): Overrides the appointment type's duration
+        from_date (str, optional): First day searched (default: today, from now on)
+        to_date (str, optional): Last day searched (default: two weeks after from_date)
+        limit (int): Number of slots to return
+        per_gap (int): Maximum slots offered from one continuous free period
+        step_minutes (int): Slot starts are aligned to this grid
+        travel_buffer_minutes (int): Padding kept free around existing off-site appointments
+
+    Returns:
+        list: [{start, end, free_until}] earliest first
+    """
+    if isinstance(social_workers, str):
+        social_workers = frappe.parse_json(social_workers) if social_workers.startswith("[") else [social_workers]
+    social_workers = list(social_workers or [frappe.session.user])
+    if any(worker != frappe.session.user for worker in social_workers):
+        frappe.only_for(SEARCH_ROLES)
+
+    duration = cint(duration_minutes) or get_default_duration(appointment_type)
+    from_date = getdate(from_date or today())
+    to_date = getdate(to_date) if to_date else add_days(from_date, DEFAULT_SEARCH_DAYS)
+    if to_date < from_date:
+        frappe.throw("To Date cannot be before From Date")
+
+    busy = get_busy_intervals(social_workers, from_date, to_date, cint(travel_buffer_minutes))
+    windows = get_working_windows(from_date, to_date, not_before=now_datetime())
+    slots = find_slots(
+        busy,
+        windows,
+        duration,
+        limit=cint(limit) or 5,
+        step_minutes=cint(step_minutes) or DEFAULT_STEP_MINUTES,
+        per_gap=cint(per_gap) or 1,
+    )
+
+    return [
+        {"start": str(start), "end": str(end), "free_until": str(free_until), "duration_minutes": duration}
+        for start, end, free_until in slots
+    ]
@@ -0,0 +1,371 @@
+"""
+Nearest-beneficiary and radius search for RDSS Social Work Case Management System
+
+Geolocations are stored as GeoJSON text, which is too slow to parse per
+query. Instead:
+
+    * every geolocation write also stores numeric latitude/longitude columns
+    * each worker process keeps an in-memory grid index (about 1 km cells)
+      built once from those columns
+    * writes publish their changes to a per-DocType change log in Redis after
+      the transaction commits; before answering a query, a process applies
+      only the log entries it has not seen yet
+
+A query therefore touches a handful of grid cells plus two small Redis reads,
+and the index never needs a full rebuild unless the log is compacted.
+
+Usage:
+    # Backfill latitude/longitude from existing geolocations
+    bench execute rdss_social_work.spatial_search.rebuild_coordinates
+"""
+
+import heapq
+import json
+import math
+from functools import partial
+
+import frappe
+
+from rdss_social_work.geocode_cache import extract_coordinates
+
+# Title shown in search results for each indexed DocType
+TITLE_FIELDS = {
+    "Beneficiary Family": "family_name",
+    "Beneficiary": "beneficiary_name",
+}
+
+SEARCH_ROLES = ["System Manager", "Social Worker", "Head of Admin", "RDSS Director"]
+
+CELL_DEGREES = 0.01
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0088
+
+# Once the change log grows past this many entries it is dropped and every process rebuilds
+MAX_LOG_ENTRIES = 5000
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def get_cell(lat, lng):
+    return math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES)
+
+
+class SpatialGrid:
+    """In-memory grid of {name: (latitude, longitude, title)} bucketed into fixed-size cells"""
+
+    def __init__(self):
+        self.points = {}
+        self.cells = {}
+        # Bounding rows/cols of every cell ever used; only grows, which keeps it a safe bound
+        self.bounds = None
+        self.generation = None
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    def upsert(self, name, lat, lng, title=None):
+        self.remove(name)
+        self.points[name] = (lat, lng, title)
+        row, col = get_cell(lat, lng)
+        self.cells.setdefault((row, col), set()).add(name)
+
+        if self.bounds is None:
+            self.bounds = (row, col, row, col)
+        else:
+            min_row, min_col, max_row, max_col = self.bounds
+            self.bounds = (min(min_row, row), min(min_col, col), max(max_row, row), max(max_col, col))
+
+    def remove(self, name):
+        point = self.points.pop(name, None)
+        if point is None:
+            return
+
+        cell = get_cell(point[0], point[1])
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(name)
+            if not members:
+                del self.cells[cell]
+
+    def apply(self, changes):
+        """Apply [name, lat, lng, title] change-log entries; a null latitude removes the point"""
+        for name, lat, lng, title in changes:
+            if lat is None:
+                self.remove(name)
+            else:
+                self.upsert(name, lat, lng, title)
+
+    def _cell_candidates(self, cells, lat, lng, exclude):
+        for cell in cells:
+            for name in self.cells.get(cell, ()):
+                if name == exclude:
+                    continue
+                p_lat, p_lng, title = self.points[name]
+                yield haversine_km(lat, lng, p_lat, p_lng), name
+
+    def nearest(self, lat, lng, k=10, exclude=None):
+        """
+        Return the k nearest points as [(distance_km, name)], closest first
+
+        Cells are visited in square rings around the query point. After ring r,
+        any unvisited point is at least r cell widths away, so the search stops
+        once k points closer than that have been found.
+        """
+        if not self.cells or k <= 0:
+            return []
+
+        center_row, center_col = get_cell(lat, lng)
+        min_row, min_col, max_row, max_col = self.bounds
+        max_ring = max(
+            abs(center_row - min_row), abs(center_row - max_row),
+            abs(center_col - min_col), abs(center_col - max_col),
+        )
+        ring_km = CELL_DEGREES * KM_PER_DEGREE * math.cos(math.radians(lat))
+
+        best = []
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                cells = [(center_row, center_col)]
+            else:
+                cells = [
+                    (center_row + dr, center_col + dc)
+                    for dr in range(-ring, ring + 1)
+                    for dc in range(-ring, ring + 1)
+                    if max(abs(dr), abs(dc)) == ring
+                ]
+
+            for distance, name in self._cell_candidates(cells, lat, lng, exclude):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, name))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, name))
+
+            if len(best) == k and -best[0][0] <= ring * ring_km:
+                break
+
+        return sorted((-distance, name) for distance, name in best)
+
+    def within(self, lat, lng, radius_km, exclude=None, limit=None):
+        """Return every point within radius_km as [(distance_km, name)], closest first"""
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        min_row, min_col = get_cell(lat - lat_span, lng - lng_span)
+        max_row, max_col = get_cell(lat + lat_span, lng + lng_span)
+
+        cells = [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+        matches = sorted(
+            (distance, name)
+            for distance, name in self._cell_candidates(cells, lat, lng, exclude)
+            if distance <= radius_km
+        )
+        return matches[:limit] if limit else matches
+
+
+_grids = {}
+
+
+def _cache_key(doctype, suffix):
+    return f"spatial_index:{frappe.scrub(doctype)}:{suffix}"
+
+
+def _validate_doctype(doctype):
+    if doctype not in TITLE_FIELDS:
+        frappe.throw(f"Spatial search is not available for {doctype}")
+
+
+def build_grid(doctype):
+    """Build a grid from the latitude/longitude columns with a single query"""
+    title_field = TITLE_FIELDS[doctype]
+    grid = SpatialGrid()
+    for row in frappe.get_all(
+        doctype,
+        # Float columns are NOT NULL, so records without coordinates hold 0
+        filters=[["latitude", "!=", 0]],
+        fields=["name", "latitude", "longitude", title_field],
+    ):
+        grid.upsert(row.name, row.latitude, row.longitude, row.get(title_field))
+    return grid
+
+
+def get_grid(doctype):
+    """
+    Return this process's grid for a DocType, brought up to date with the change log
+
+    Rebuilds from the database only on first use or after the log was compacted.
+    """
+    _validate_doctype(doctype)
+    cache = frappe.cache()
+    log_key = _cache_key(doctype, "log")
+    generation_key = _cache_key(doctype, "generation")
+
+    generation = cache.get_value(generation_key)
+    if generation is None:
+        generation = frappe.generate_hash(length=10)
+        cache.set_value(generation_key, generation)
+
+    grid_key = (frappe.local.site, doctype)
+    grid = _grids.get(grid_key)
+
+    if grid is None or grid.generation != generation:
+        # Read the log position first: entries published during the rebuild are replayed, which is harmless
+        offset = cache.llen(log_key)
+        grid = build_grid(doctype)
+        grid.generation = generation
+        grid.offset = offset
+        _grids[grid_key] = grid
+    else:
+        entries = cache.lrange(log_key, grid.offset, -1)
+        for entry in entries:
+            grid.apply(json.loads(entry))
+        grid.offset += len(entries)
+
+    return grid
+
+
+def publish_locations(doctype, locations):
+    """
+    Append committed location changes to the DocType's change log
+
+    Args:
+        doctype (str): Indexed DocType
+        locations (list): [name, latitude, longitude, title] entries; a None latitude removes the record
+    """
+    if not locations:
+        return
+
+    cache = frappe.cache()
+    log_key = _cache_key(doctype, "log")
+    cache.rpush(log_key, json.dumps(list(locations)))
+
+    if cache.llen(log_key) > MAX_LOG_ENTRIES:
+        # New generation first, so processes reading the dropped log still rebuild
+        cache.set_value(_cache_key(doctype, "generation"), frappe.generate_hash(length=10))
+        cache.delete_key(log_key)
+
+
+def publish_after_commit(doctype, locations):
+    """Publish location changes once the current transaction commits"""
+    frappe.db.after_commit.add(partial(publish_locations, doctype, locations))
+
+
+def sync_coordinates(doc, method=None):
+    """
+    before_save hook: keep latitude/longitude in step with geolocation
+
+    Runs after the geocoding hook, so it also sees coordinates that hook
+    filled from the cache or cleared because the address changed.
+    """
+    lat, lng = extract_coordinates(doc.geolocation)
+    doc.latitude, doc.longitude = lat or 0, lng or 0
+
+    title_field = TITLE_FIELDS[doc.doctype]
+    if doc.is_new() or doc.has_value_changed("geolocation") or doc.has_value_changed(title_field):
+        publish_after_commit(doc.doctype, [[doc.name, lat, lng, doc.get(title_field)]])
+
+
+def remove_from_index(doc, method=None):
+    """on_trash hook: drop a deleted record from every process's index"""
+    publish_after_commit(doc.doctype, [[doc.name, None, None, None]])
+
+
+def get_origin(grid, latitude, longitude, name):
+    if name:
+        point = grid.points.get(name)
+        if not point:
+            frappe.throw(f"{name} has no stored geolocation")
+        return point[0], point[1]
+
+    if latitude in (None, "") or longitude in (None, ""):
+        frappe.throw("Provide either a record name or latitude and longitude")
+    return float(latitude), float(longitude)
+
+
+def format_results(grid, matches):
+    results = []
+    for distance, match in matches:
+        lat, lng, title = grid.points[match]
+        results.append({
+            "name": match,
+            "title": title,
+            "latitude": lat,
+            "longitude": lng,
+            "distance_km": round(distance, 3),
+        })
+    return results
+
+
+@frappe.whitelist()
+def find_nearest(doctype="Beneficiary", latitude=None, longitude=None, name=None, k=10):
+    """
+    Find the k records closest to a point or to another record
+
+    Args:
+        doctype (str): Beneficiary or Beneficiary Family
+        latitude, longitude (float, optional): Search origin
+        name (str, optional): Record to search around instead of a coordinate (excluded from results)
+        k (int): Number of results
+
+    Returns:
+        list: [{name, title, latitude, longitude, distance_km}] closest first
+    """
+    frappe.only_for(SEARCH_ROLES)
+    grid = get_grid(doctype)
+    lat, lng = get_origin(grid, latitude, longitude, name)
+    return format_results(grid, grid.nearest(lat, lng, k=min(int(k), 500), exclude=name))
+
+
+@frappe.whitelist()
+def find_within_radius(doctype="Beneficiary", latitude=None, longitude=None, name=None, radius_km=2, limit=100):
+    """
+    Find every record within a radius of a point or of another record
+
+    Args:
+        doctype (str): Beneficiary or Beneficiary Family
+        latitude, longitude (float, optional): Search origin
+        name (str, optional): Record to search around instead of a coordinate (excluded from results)
+        radius_km (float): Search radius in kilometres
+        limit (int): Maximum number of results
+
+    Returns:
+        list: [{name, title, latitude, longitude, distance_km}] closest first
+    """
+    frappe.only_for(SEARCH_ROLES)
+    grid = get_grid(doctype)
+    lat, lng = get_origin(grid, latitude, longitude, name)
+    matches = grid.within(lat, lng, float(radius_km), exclude=name, limit=int(limit) if limit else None)
+    return format_results(grid, matches)
+
+
+def rebuild_coordinates(doctypes=None, chunk_size=5000):
+    """
+    Backfill latitude/longitude from stored geolocations and reset the indexes
+
+    Args:
+        doctypes (list, optional): DocTypes to backfill (default: all indexed DocTypes)
+        chunk_size (int): Records written per chunk
+    """
+    from rdss_social_work.db_utils import bulk_update_column
+
+    for doctype in doctypes or list(TITLE_FIELDS):
+        records = frappe.get_all(doctype, filters=[["geolocation", "is", "set"]], fields=["name", "geolocation"])
+
+        for start in range(0, len(records), chunk_size):
+            latitudes, longitudes = {}, {}
+            for record in records[start:start + chunk_size]:
+                lat, lng = extract_coordinates(record.geolocation)
+                latitudes[record.name], longitudes[record.name] = lat or 0, lng or 0
+
+            bulk_update_column(doctype, "latitude", latitudes)
+            bulk_update_column(doctype, "longitude", longitudes)
+            frappe.db.commit()
+
+        # Every process rebuilds its grid on the next query
+        frappe.cache().set_value(_cache_key(doctype, "generation"), frappe.generate_hash(length=10))
+        frappe.cache().delete_key(_cache_key(doctype, "log"))
+        print(f"{doctype}: stored coordinates for {len(records)} records")